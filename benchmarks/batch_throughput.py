@@ -0,0 +1,40 @@
+"""Batch analysis throughput (questions/second) against the local mock server.
+
+Usage:
+    python -m benchmarks.batch_throughput [--questions 200] [--latency 0.1]
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.mock_grok_server import MockGrokServer
+from src.api.batch import analyze_batch
+from src.api.grok_client import GrokClient
+from src.api.transport import HttpTransport
+
+async def run(client, questions, concurrency, rate):
+    started = time.perf_counter()
+    failures = 0
+    async for result in analyze_batch(client, questions, concurrency=concurrency, rate=rate):
+        failures += result.error is not None
+    return time.perf_counter() - started, failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.1, help='mock server latency (s)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 32])
+    parser.add_argument('--rate', type=float, default=None, help='token bucket rate (req/s)')
+    args = parser.parse_args()
+
+    questions = [f"Question {i}: what is {i} + {i}?" for i in range(args.questions)]
+    with MockGrokServer(latency=args.latency) as server:
+        for concurrency in args.concurrency:
+            client = GrokClient('mock-key', transport=HttpTransport(pool_size=concurrency))
+            client.api_url = server.url
+            elapsed, failures = asyncio.run(run(client, questions, concurrency, args.rate))
+            print(f"concurrency {concurrency:3}: {len(questions) / elapsed:8.1f} questions/s "
+                  f"({elapsed:.2f} s, {failures} failed)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Several windows sharing one analysis daemon vs. each running its own pipeline.
+
+Usage:
+    python -m benchmarks.daemon [--clients 6] [--questions 40] [--pool 60]
+        [--latency 0.1] [--workers 4] [--max-queue 16]
+
+Every client asks --questions questions drawn from a shared pool of
+--pool, two at a time, like windows showing the same quiz. In 'separate'
+mode each client has its own pipeline, caches and connection pool; in
+'daemon' mode they are thin clients of one AnalysisDaemon. Prints wall
+time, client latency, upstream API requests and connections, and the
+daemon's per-client throughput and queue wait.
+"""
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.mock_grok_server import MockGrokServer
+from benchmarks.suite import latency_stats
+from src.api.answer_cache import AnswerCache
+from src.api.daemon_client import DaemonClient
+from src.api.similarity_index import SimilarityIndex
+from src.api.single_flight import SingleFlight
+from src.api.transport import HttpTransport
+from src.daemon import AnalysisDaemon
+from src.pipeline import AnalysisPipeline
+
+def make_pipeline(server: MockGrokServer, directory: Path) -> AnalysisPipeline:
+    """A pipeline with its own caches and connections, like one more process would have"""
+    directory.mkdir(parents=True, exist_ok=True)
+    pipeline = AnalysisPipeline('mock-key', transport=HttpTransport(),
+                                cache=AnswerCache(directory / 'answers.sqlite3'),
+                                similarity_index=SimilarityIndex(directory / 'similarity.sqlite3'),
+                                api_url=server.url, tiers=[], use_bank=False)
+    pipeline.answer_client.single_flight = pipeline.quiz_client.single_flight = SingleFlight()
+    return pipeline
+
+def workload(args):
+    rng = random.Random(args.seed)
+    words = [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(4, 9)))
+             for _ in range(2000)]
+    # Distinct enough that the similarity index doesn't treat them as near-duplicates
+    pool = [f"Which {' '.join(rng.sample(words, 8))}?" for _ in range(args.pool)]
+    return [[rng.choice(pool) for _ in range(args.questions)] for _ in range(args.clients)]
+
+def drive(analyzers, questions):
+    """Run every client's questions (two in flight per client); returns latencies and failures"""
+    samples, failures, lock = [], [0], threading.Lock()
+
+    def client(analyze, asked):
+        def ask(question):
+            started = time.perf_counter()
+            record = analyze(question)
+            with lock:
+                samples.append((time.perf_counter() - started) * 1000)
+                failures[0] += 'error' in record
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(ask, asked))
+
+    threads = [threading.Thread(target=client, args=(analyze, asked))
+               for analyze, asked in zip(analyzers, questions)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, samples, failures[0]
+
+def report(server, elapsed, samples, failures, connections) -> dict:
+    return {'wall_s': round(elapsed, 2), 'questions_per_s': round(len(samples) / elapsed, 1),
+            'latency': latency_stats(samples), 'failures': failures,
+            'api_requests': server.requests, 'api_connections': connections}
+
+def run_separate(args, questions, workdir: Path) -> dict:
+    with MockGrokServer(latency=args.latency, seed=args.seed) as server:
+        pipelines = [make_pipeline(server, workdir / f"separate-{i}") for i in range(args.clients)]
+        elapsed, samples, failures = drive([p.analyze_text for p in pipelines], questions)
+        connections = sum(p.transport.stats()['new_connections'] for p in pipelines)
+        return report(server, elapsed, samples, failures, connections)
+
+def run_daemon(args, questions, workdir: Path) -> dict:
+    with MockGrokServer(latency=args.latency, seed=args.seed) as server:
+        pipeline = make_pipeline(server, workdir / 'daemon')
+        daemon = AnalysisDaemon(pipeline, port=0, workers=args.workers, max_queue=args.max_queue)
+        threading.Thread(target=daemon.serve_forever, daemon=True).start()
+        clients = [DaemonClient(daemon.url, f"client-{i}", transport=HttpTransport(),
+                                token=daemon.token)
+                   for i in range(args.clients)]
+        elapsed, samples, failures = drive([c.analyze_text for c in clients], questions)
+        stats = daemon.stats()
+        daemon.shutdown()
+        result = report(server, elapsed, samples, failures,
+                        pipeline.transport.stats()['new_connections'])
+        result['clients'] = {name: {key: client[key] for key in
+                                    ('completed', 'rejected', 'throughput_per_s',
+                                     'queue_wait_p50_ms', 'queue_wait_p95_ms')}
+                             for name, client in sorted(stats['clients'].items())}
+        return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=6)
+    parser.add_argument('--questions', type=int, default=40, help='questions per client')
+    parser.add_argument('--pool', type=int, default=60, help='distinct questions shared by clients')
+    parser.add_argument('--latency', type=float, default=0.1, help='mock server latency (s)')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--max-queue', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    questions = workload(args)
+    with tempfile.TemporaryDirectory(prefix='quiz-daemon-') as workdir:
+        results = {'separate': run_separate(args, questions, Path(workdir)),
+                   'daemon': run_daemon(args, questions, Path(workdir))}
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Tail latency with and without hedged requests against the local mock server.
+
+Usage:
+    python -m benchmarks.hedging [--requests 400] [--latency 0.05] [--jitter 0.02]
+        [--slow-rate 0.03] [--slow-latency 1.0] [--budget 0.1] [--stream]
+
+The mock server stalls a slow_rate fraction of completions. Each mode
+starts on a fresh server with the same seed, warms the latency window
+up, then times --requests calls; p50/p95/p99 are printed for both modes
+along with how many extra requests the hedges cost.
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.mock_grok_server import MockGrokServer
+from benchmarks.suite import latency_stats
+from src.api.grok_client import GrokClient
+from src.api.hedging import HedgePolicy
+from src.api.single_flight import SingleFlight
+from src.api.transport import HttpTransport
+
+def run(args, budget: float) -> dict:
+    with MockGrokServer(latency=args.latency, jitter=args.jitter, slow_rate=args.slow_rate,
+                        slow_latency=args.slow_latency, seed=args.seed) as server:
+        policy = HedgePolicy(budget=budget)
+        client = GrokClient('mock-key', transport=HttpTransport(pool_size=2 * args.concurrency),
+                            single_flight=SingleFlight(), hedge=policy)
+        client.api_url = server.url
+
+        def ask(i):
+            started = time.perf_counter()
+            if args.stream:
+                stream = client.stream_question(f"Question {i}: what is {i} + {i}?")
+                for _ in stream:
+                    break  # Time to the first token
+            else:
+                client.analyze_question(f"Question {i}: what is {i} + {i}?")
+            return (time.perf_counter() - started) * 1000
+
+        for i in range(args.warmup):
+            ask(-1 - i)
+        sent = server.requests
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            samples = list(executor.map(ask, range(args.requests)))
+        time.sleep(args.slow_latency)  # Let losing attempts finish before counting requests
+        return {'latency': latency_stats(samples),
+                'extra_requests': server.requests - sent - args.requests,
+                'hedged': policy.hedged, 'hedge_wins': policy.hedge_wins,
+                'slow_injected': server.stats()['slow']}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--warmup', type=int, default=40, help='untimed calls before measuring')
+    parser.add_argument('--latency', type=float, default=0.05, help='mock server latency (s)')
+    parser.add_argument('--jitter', type=float, default=0.02, help='extra random latency (s)')
+    parser.add_argument('--slow-rate', type=float, default=0.03,
+                        help='fraction of replies delayed by --slow-latency')
+    parser.add_argument('--slow-latency', type=float, default=1.0, help='extra seconds')
+    parser.add_argument('--budget', type=float, default=0.1, help='hedge budget when hedging')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--stream', action='store_true', help='time streamed first tokens')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results = {'before': run(args, budget=0.0), 'after': run(args, budget=args.budget)}
+    print(json.dumps(results, indent=2))
+    before, after = results['before']['latency'], results['after']['latency']
+    print(f"p99 {before['p99_ms']:.1f} ms -> {after['p99_ms']:.1f} ms, "
+          f"{results['after']['extra_requests']} extra requests "
+          f"({results['after']['extra_requests'] / args.requests:.1%})")
+
+if __name__ == "__main__":
+    main()
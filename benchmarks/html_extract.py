@@ -0,0 +1,97 @@
+"""Parse time and peak RSS of quiz text extraction on large pages.
+
+Usage:
+    python -m benchmarks.html_extract [page.html ...] [--size-mb 5] [--runs 3]
+
+Compares the previous BeautifulSoup/html.parser approach with the
+streaming HtmlExtractor backends. Each measurement runs in a fresh
+subprocess so peak RSS is not polluted by earlier runs.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKENDS = ['bs4', 'html.parser', 'lxml']
+
+def synthetic_page(size_mb: float) -> str:
+    """A large page full of boilerplate with the quiz question near the end"""
+    block = ('<nav><a href="/">Home</a><a href="/quizzes">Quizzes</a></nav>'
+             '<script>window.dataLayer = window.dataLayer || [];</script>'
+             '<div class="card"><h2>Related article</h2><p>Lorem ipsum dolor sit amet, '
+             'consectetur adipiscing elit, sed do eiusmod tempor incididunt.</p></div>\n')
+    repeats = int(size_mb * 1024 * 1024 / len(block))
+    return ('<html><head><style>.card{margin:0}</style></head><body>' + block * repeats +
+            '<div class="quiz-question">Which gas do plants absorb? A) O2 B) CO2 C) N2</div>'
+            '</body></html>')
+
+def legacy_extract(html: str) -> str:
+    """The original WebScraper logic: four select_one passes, then get_text()"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    for selector in ['.question-text', '.quiz-question', '[data-testid="question"]', '.mcq-question']:
+        element = soup.select_one(selector)
+        if element:
+            return element.text.strip()
+    return soup.get_text()
+
+def measure(backend: str, path: str, runs: int) -> dict:
+    """Run inside the child process: time extraction and report peak RSS"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        if backend == 'bs4':
+            text = legacy_extract(data.decode('utf-8'))
+        else:
+            from src.utils.html_extract import HtmlExtractor
+            extractor = HtmlExtractor(backend=backend)
+            chunks = (data[i:i + 65536] for i in range(0, len(data), 65536))
+            text = extractor.extract_stream(chunks)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {'backend': backend, 'best_ms': min(timings), 'peak_rss_delta_kb': peak - baseline,
+            'chars': len(text)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('pages', nargs='*', help='saved HTML pages')
+    parser.add_argument('--size-mb', type=float, default=5.0, help='synthetic page size')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--child', nargs=2, metavar=('BACKEND', 'PAGE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child[0], args.child[1], args.runs)))
+        return
+
+    pages = args.pages
+    if not pages:
+        tmp = tempfile.NamedTemporaryFile('w', suffix='.html', delete=False, encoding='utf-8')
+        tmp.write(synthetic_page(args.size_mb))
+        tmp.close()
+        pages = [tmp.name]
+
+    for page in pages:
+        print(page)
+        for backend in BACKENDS:
+            child = subprocess.run([sys.executable, '-m', 'benchmarks.html_extract', '--runs',
+                                    str(args.runs), '--child', backend, page],
+                                   capture_output=True, text=True)
+            if child.returncode != 0:
+                print(f"  {backend:12} failed: {child.stderr.strip().splitlines()[-1]}")
+                continue
+            result = json.loads(child.stdout)
+            print(f"  {backend:12} {result['best_ms']:9.1f} ms   "
+                  f"peak RSS +{result['peak_rss_delta_kb'] / 1024:7.1f} MB   "
+                  f"{result['chars']} chars extracted")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Local stand-in for https://api.x.ai/v1/chat/completions.
+
+Usage:
+    python -m benchmarks.mock_grok_server [--port 8765] [--latency 0.2]
+        [--token-delay 0.02] [--error-rate 0.05] [--slow-rate 0.02 --slow-latency 2]
+        [--pages benchmarks/fixtures/html]
+
+Point a client at it with `client.api_url = server.url`. Requests with
+"stream": true get server-sent events, one chunk per word. GET requests
+serve quiz pages from `pages` so scraping can be measured offline too.
+Prompts asking for a CONFIDENCE line get one (low for a configurable
+fraction), and model_latency gives individual models their own latency.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+
+CANNED_ANSWER = ("ANSWER: B) Mitochondria\n"
+                 "EXPLANATION: Mitochondria produce most of the cell's ATP.")
+USAGE = {'prompt_tokens': 50, 'completion_tokens': 20, 'total_tokens': 70}
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            request_id = server.requests
+            roll = server.rng.random()
+            unsure = server.rng.random() < server.low_confidence_rate
+            delay = server.model_latency.get(body.get('model'), server.latency) + \
+                server.rng.uniform(0, server.jitter)
+            if server.rng.random() < server.slow_rate:
+                server.slow += 1
+                delay += server.slow_latency
+        time.sleep(delay)
+
+        if roll < server.error_rate:
+            return self._fail(500, 'injected server error')
+        if roll < server.error_rate + server.rate_limit_rate:
+            return self._fail(429, 'injected rate limit', {'Retry-After': '0'})
+
+        answer = CANNED_ANSWER
+        prompt = (body.get('messages') or [{}])[-1].get('content', '')
+        if 'CONFIDENCE:' in prompt:
+            answer += f"\nCONFIDENCE: {30 if unsure else 90}"
+
+        if body.get('stream'):
+            with server.lock:
+                server.streams += 1
+            return self._stream(request_id, body.get('model'), answer)
+
+        result = {
+            'id': f"mock-{request_id}",
+            'model': body.get('model'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': answer},
+                         'finish_reason': 'stop'}],
+            'usage': USAGE
+        }
+        self._send(200, json.dumps(result).encode('utf-8'), 'application/json')
+
+    def do_GET(self):
+        page = self.server.pages.get(self.path.split('?')[0].lstrip('/'))
+        if page is None:
+            return self._fail(404, 'no such page')
+        self._send(200, page, 'text/html; charset=utf-8')
+
+    def _stream(self, request_id: int, model: Optional[str], answer: str):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        words = answer.split(' ')
+        for i, word in enumerate(words):
+            delta = word if i == len(words) - 1 else word + ' '
+            chunk = {'id': f"mock-{request_id}", 'model': model,
+                     'choices': [{'index': 0, 'delta': {'content': delta}, 'finish_reason': None}]}
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            if self.server.token_delay:
+                time.sleep(self.server.token_delay)
+        final = {'id': f"mock-{request_id}", 'model': model,
+                 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}], 'usage': USAGE}
+        self._write_chunk(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode('utf-8'))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _fail(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        with self.server.lock:
+            self.server.errors += 1
+        payload = json.dumps({'error': {'message': message}}).encode('utf-8')
+        self._send(status, payload, 'application/json', headers)
+
+    def _send(self, status: int, payload: bytes, content_type: str,
+              headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def load_pages(directory: str) -> Dict[str, bytes]:
+    """Map file names to contents for every .html file in directory"""
+    return {path.name: path.read_bytes() for path in sorted(Path(directory).glob('*.html'))}
+
+class MockGrokServer:
+    """Threaded mock completions endpoint running in the background.
+
+    latency (+ up to jitter) seconds pass before each response starts and
+    token_delay between streamed chunks. error_rate and rate_limit_rate
+    are the fractions of completions answered with 500 and 429, and
+    low_confidence_rate that of replies reporting CONFIDENCE: 30. A
+    slow_rate fraction of completions stalls slow_latency seconds more.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, token_delay: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, pages: Optional[Dict[str, bytes]] = None,
+                 seed: int = 0, model_latency: Optional[Dict[str, float]] = None,
+                 low_confidence_rate: float = 0.0, slow_rate: float = 0.0,
+                 slow_latency: float = 0.0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.jitter = jitter
+        self.httpd.token_delay = token_delay
+        self.httpd.error_rate = error_rate
+        self.httpd.rate_limit_rate = rate_limit_rate
+        self.httpd.model_latency = model_latency or {}
+        self.httpd.low_confidence_rate = low_confidence_rate
+        self.httpd.slow_rate = slow_rate
+        self.httpd.slow_latency = slow_latency
+        self.httpd.pages = pages or {}
+        self.httpd.rng = random.Random(seed)
+        self.httpd.requests = 0
+        self.httpd.streams = 0
+        self.httpd.errors = 0
+        self.httpd.slow = 0
+        self.httpd.lock = threading.Lock()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/v1/chat/completions"
+
+    def page_url(self, name: str) -> str:
+        return f"{self.base_url}/{name}"
+
+    @property
+    def requests(self) -> int:
+        return self.httpd.requests
+
+    def stats(self) -> Dict[str, int]:
+        with self.httpd.lock:
+            return {'requests': self.httpd.requests, 'streams': self.httpd.streams,
+                    'errors': self.httpd.errors, 'slow': self.httpd.slow}
+
+    def start(self) -> 'MockGrokServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Grok completions server")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds per response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random latency (s)')
+    parser.add_argument('--token-delay', type=float, default=0.0,
+                        help='seconds between streamed chunks')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 500 replies')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                        help='fraction of 429 replies')
+    parser.add_argument('--pages', metavar='DIR', help='serve the .html files in DIR over GET')
+    parser.add_argument('--model-latency', action='append', default=[], metavar='MODEL=SECONDS',
+                        help='latency for one model (repeatable)')
+    parser.add_argument('--low-confidence-rate', type=float, default=0.0,
+                        help='fraction of replies reporting low confidence')
+    parser.add_argument('--slow-rate', type=float, default=0.0,
+                        help='fraction of replies delayed by --slow-latency')
+    parser.add_argument('--slow-latency', type=float, default=0.0,
+                        help='extra seconds for slow replies')
+    args = parser.parse_args()
+
+    model_latency = {model: float(seconds) for model, seconds in
+                     (item.split('=', 1) for item in args.model_latency)}
+    server = MockGrokServer(port=args.port, latency=args.latency, jitter=args.jitter,
+                            token_delay=args.token_delay, error_rate=args.error_rate,
+                            rate_limit_rate=args.rate_limit_rate, model_latency=model_latency,
+                            low_confidence_rate=args.low_confidence_rate,
+                            slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+                            pages=load_pages(args.pages) if args.pages else None)
+    print(f"Serving mock completions on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
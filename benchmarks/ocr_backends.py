@@ -0,0 +1,67 @@
+"""Per-capture OCR latency: in-process tesserocr vs. pytesseract subprocess.
+
+Usage:
+    python -m benchmarks.ocr_backends [image.png ...] [--runs N]
+
+Without image arguments a synthetic quiz screenshot is rendered with PIL.
+"""
+import argparse
+import statistics
+import time
+
+from PIL import Image, ImageDraw
+
+from src.utils.ocr import ENGINES
+
+SAMPLE_TEXT = [
+    "Question 3 of 10",
+    "Which organelle is known as the powerhouse of the cell?",
+    "A) Nucleus",
+    "B) Mitochondria",
+    "C) Ribosome",
+    "D) Golgi apparatus",
+]
+
+def render_sample(width: int = 900, line_height: int = 36) -> Image.Image:
+    image = Image.new('RGB', (width, line_height * (len(SAMPLE_TEXT) + 1)), 'white')
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(SAMPLE_TEXT):
+        draw.text((20, 15 + i * line_height), line, fill='black')
+    return image.resize((image.width * 2, image.height * 2))
+
+def time_engine(engine, images, runs: int):
+    timings = []
+    for _ in range(runs):
+        for image in images:
+            started = time.perf_counter()
+            engine.image_to_string(image)
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('images', nargs='*', help='screenshots to recognize')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    images = [Image.open(path).convert('RGB') for path in args.images] or [render_sample()]
+
+    for name, engine_class in ENGINES.items():
+        try:
+            engine = engine_class()
+            engine.image_to_string(images[0])  # Warm-up, excluded from timings
+        except Exception as e:
+            print(f"{name:12} unavailable: {e}")
+            continue
+        try:
+            timings = time_engine(engine, images, args.runs)
+        finally:
+            engine.close()
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0]
+        print(f"{name:12} mean {statistics.mean(timings):8.1f} ms   "
+              f"p50 {statistics.median(timings):8.1f} ms   p95 {p95:8.1f} ms   "
+              f"({len(timings)} captures)")
+
+if __name__ == "__main__":
+    main()
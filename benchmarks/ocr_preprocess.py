@@ -0,0 +1,147 @@
+"""OCR time and character accuracy per image preprocessing profile.
+
+Usage:
+    python -m benchmarks.ocr_preprocess [fixture_dir] [--profiles none,fast,default,quality]
+                                        [--backend auto] [--save-fixtures DIR]
+
+A fixture is an image (shot.png) with its expected text next to it
+(shot.txt). Without a fixture directory a set of synthetic screenshots is
+rendered: light and dark themes, small text, a noisy gradient, a skewed
+capture and a translucent RGBA overlay.
+"""
+import argparse
+import random
+import statistics
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+
+from src.utils.image_preprocess import PROFILES, ImagePreprocessor
+from src.utils.ocr import create_ocr_engine
+
+FIXTURE_TEXT = [
+    "Question 7 of 20",
+    "Which planet has the shortest year in the solar system?",
+    "A) Venus",
+    "B) Mercury",
+    "C) Mars",
+    "D) Neptune",
+]
+
+def _render(size: int, fg, bg, mode: str = 'RGB', width: int = 1100) -> Image.Image:
+    font = ImageFont.load_default(size=size)
+    line_height = int(size * 1.6)
+    image = Image.new(mode, (width, line_height * len(FIXTURE_TEXT) + 3 * size), bg)
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(FIXTURE_TEXT):
+        draw.text((size * 2, size + i * line_height), line, fill=fg, font=font)
+    return image
+
+def _noisy_gradient() -> Image.Image:
+    image = _render(16, (40, 40, 40), (255, 255, 255))
+    rng = random.Random(7)
+    pixels = image.load()
+    for y in range(image.height):
+        for x in range(image.width):
+            r, g, b = pixels[x, y]
+            shade = int(70 * x / image.width) + rng.randint(-18, 18)
+            pixels[x, y] = tuple(max(0, min(255, c - shade)) for c in (r, g, b))
+    return image
+
+def synthetic_fixtures():
+    """(name, image, expected text) for the built-in screenshot set"""
+    text = '\n'.join(FIXTURE_TEXT)
+    fixtures = [
+        ('light', _render(18, 'black', 'white')),
+        ('dark-mode', _render(18, (220, 220, 220), (30, 32, 36))),
+        ('small-text', _render(10, (60, 60, 60), (250, 250, 250), width=700)),
+        ('noisy-gradient', _noisy_gradient()),
+        ('skewed', _render(18, 'black', 'white').rotate(3, expand=True, fillcolor='white')),
+        ('rgba-overlay', _render(18, (0, 0, 0, 255), (255, 255, 255, 0), mode='RGBA')),
+    ]
+    # Wide margins around the text, as in a loosely dragged selection
+    padded = Image.new('RGB', (2000, 1200), (245, 245, 245))
+    padded.paste(_render(18, 'black', 'white'), (450, 400))
+    fixtures.append(('loose-selection', padded))
+    return [(name, image, text) for name, image in fixtures]
+
+def load_fixtures(directory: str):
+    fixtures = []
+    for path in sorted(Path(directory).glob('*.png')):
+        expected = path.with_suffix('.txt')
+        if expected.exists():
+            image = Image.open(path)
+            image.load()
+            fixtures.append((path.stem, image, expected.read_text(encoding='utf-8')))
+    return fixtures
+
+def edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+def char_accuracy(expected: str, actual: str) -> float:
+    """1 - character error rate, compared with whitespace collapsed"""
+    expected, actual = ' '.join(expected.split()), ' '.join(actual.split())
+    if not expected:
+        return 1.0 if not actual else 0.0
+    return max(0.0, 1 - edit_distance(expected, actual) / len(expected))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('fixture_dir', nargs='?', help='directory of NAME.png + NAME.txt pairs')
+    parser.add_argument('--profiles', default=','.join(PROFILES))
+    parser.add_argument('--backend', default='auto', help='OCR backend (auto, tesserocr, pytesseract)')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--save-fixtures', metavar='DIR', help='write the synthetic set and exit')
+    args = parser.parse_args()
+
+    if args.save_fixtures:
+        out = Path(args.save_fixtures)
+        out.mkdir(parents=True, exist_ok=True)
+        for name, image, text in synthetic_fixtures():
+            image.save(out / f"{name}.png")
+            (out / f"{name}.txt").write_text(text, encoding='utf-8')
+        print(f"wrote fixtures to {out}")
+        return
+
+    fixtures = load_fixtures(args.fixture_dir) if args.fixture_dir else synthetic_fixtures()
+    try:
+        engine = create_ocr_engine(args.backend)
+        engine.image_to_string(fixtures[0][1])  # Warm-up, excluded from timings
+    except Exception as e:
+        engine = None
+        print(f"OCR unavailable ({e}); reporting preprocessing only")
+
+    print(f"{len(fixtures)} fixtures")
+    for profile in args.profiles.split(','):
+        preprocessor = ImagePreprocessor(profile)
+        prep_ms, ocr_ms, accuracy, pixels = [], [], [], []
+        for name, image, expected in fixtures:
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                cleaned = preprocessor.process(image)
+                prep_ms.append((time.perf_counter() - started) * 1000)
+            pixels.append(cleaned.width * cleaned.height / (image.width * image.height))
+            if engine:
+                started = time.perf_counter()
+                text = engine.image_to_string(cleaned)
+                ocr_ms.append((time.perf_counter() - started) * 1000)
+                accuracy.append(char_accuracy(expected, text))
+
+        line = (f"{profile:8} preprocess {statistics.mean(prep_ms):7.1f} ms   "
+                f"pixels {statistics.mean(pixels) * 100:5.0f}% of input")
+        if engine:
+            line += (f"   OCR {statistics.mean(ocr_ms):7.1f} ms   "
+                     f"accuracy {statistics.mean(accuracy) * 100:5.1f}%")
+        print(line)
+    if engine:
+        engine.close()
+
+if __name__ == "__main__":
+    main()
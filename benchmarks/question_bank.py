@@ -0,0 +1,112 @@
+"""Question bank import throughput and lookup latency at scale.
+
+Usage:
+    python -m benchmarks.question_bank [--rows 1000000] [--queries 2000] [--keep DIR]
+
+Generates a synthetic JSONL bank (Zipf-distributed vocabulary, four
+options per question), streams it into a fresh QuestionBank and reports
+rows/s, peak memory and on-disk size, then the latency of exact,
+OCR-noisy and unknown questions with their hit rates.
+"""
+import argparse
+import itertools
+import json
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.suite import latency_stats
+from src.api.question_bank import QuestionBank
+
+def vocabulary(rng: random.Random, size: int):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = {''.join(rng.choices(letters, k=rng.randint(3, 10))) for _ in range(size * 2)}
+    words = sorted(words)[:size]
+    rng.shuffle(words)
+    weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+    return words, weights
+
+def make_question(seed: int, words, weights) -> dict:
+    rng = random.Random(seed)  # Row i can be regenerated for queries without storing it
+    text = ' '.join(rng.choices(words, cum_weights=weights, k=rng.randint(6, 14)))
+    options = [' '.join(rng.choices(words, cum_weights=weights, k=rng.randint(1, 3)))
+               for _ in range(4)]
+    return {'question': f"What is the {text}?", 'options': options,
+            'answer': 'abcd'[rng.randrange(4)], 'explanation': f"Because {options[0]}."}
+
+def write_bank(path: Path, rows: int, words, weights):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(rows):
+            f.write(json.dumps(make_question(i, words, weights)) + '\n')
+
+def ocr_noise(rng: random.Random, text: str) -> str:
+    """Drop one word and garble one character, like a slightly bad capture"""
+    tokens = text.split()
+    tokens.pop(rng.randrange(len(tokens)))
+    i = rng.randrange(len(tokens))
+    word = tokens[i]
+    if len(word) > 3:
+        j = rng.randrange(len(word))
+        tokens[i] = word[:j] + 'l' + word[j + 1:]
+    return ' '.join(tokens)
+
+def measure(bank: QuestionBank, texts):
+    samples, hits = [], 0
+    for text in texts:
+        started = time.perf_counter()
+        hits += bank.match(text) is not None
+        samples.append((time.perf_counter() - started) * 1000)
+    return {'latency': latency_stats(samples), 'hit_rate': round(hits / len(texts), 3)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--vocabulary', type=int, default=30_000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--keep', metavar='DIR', help='write the bank and index here and keep them')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words, weights = vocabulary(rng, args.vocabulary)
+    workdir = Path(args.keep or tempfile.mkdtemp(prefix='question-bank-'))
+    workdir.mkdir(parents=True, exist_ok=True)
+    source, db = workdir / 'bank.jsonl', workdir / 'bank.sqlite3'
+    for path in (db, Path(f"{db}-wal"), Path(f"{db}-shm")):
+        path.unlink(missing_ok=True)
+
+    print(f"generating {args.rows} rows...", file=sys.stderr)
+    write_bank(source, args.rows, words, weights)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    bank = QuestionBank(db)
+    started = time.perf_counter()
+    counts = bank.import_file(source, args.batch_size)
+    imported = time.perf_counter() - started
+    bank.optimize()
+    optimized = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    sample = [make_question(rng.randrange(args.rows), words, weights) for _ in range(args.queries)]
+    exact = [q['question'] + '\n' + '\n'.join(q['options']) for q in sample]
+    noisy = [ocr_noise(rng, q['question']) for q in sample]
+    unknown = [make_question(args.rows + i, words, weights)['question']
+               for i in range(args.queries)]
+    results = {
+        'rows': args.rows, **counts,
+        'import_rows_per_s': round(args.rows / imported),
+        'import_s': round(imported, 2), 'optimize_s': round(optimized - imported, 2),
+        'peak_rss_growth_mb': round((rss_after - rss_before) / 1024, 1),  # ru_maxrss is in KiB
+        'source_mb': round(source.stat().st_size / 2 ** 20, 1),
+        'index_mb': round(db.stat().st_size / 2 ** 20, 1),
+        'exact': measure(bank, exact),
+        'ocr_noise': measure(bank, noisy),
+        'unknown': measure(bank, unknown),
+    }
+    bank.close()
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Offline benchmark suite: scrape, OCR, analysis and full-pipeline latency.
+
+Usage:
+    python -m benchmarks.suite [--only scrape,ocr,analysis,pipeline] [--runs 5]
+        [--latency 0.05] [--token-delay 0.005] [--error-rate 0.0]
+        [--out FILE] [--compare OLD.json]
+
+Everything runs against local fixtures: the quiz pages in fixtures/html
+are served by the mock Grok server, which also answers the completions,
+and OCR reads the captures in fixtures/screenshots. Results are written
+to benchmarks/results/<commit>.json; --compare prints how every latency
+and throughput figure moved against an earlier results file.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.mock_grok_server import MockGrokServer, load_pages
+from benchmarks.ocr_preprocess import char_accuracy, load_fixtures
+from src.utils.tracing import get_tracer, percentile
+
+HERE = Path(__file__).parent
+HTML_DIR = HERE / 'fixtures' / 'html'
+SCREENSHOT_DIR = HERE / 'fixtures' / 'screenshots'
+RESULTS_DIR = HERE / 'results'
+SECTIONS = ['scrape', 'ocr', 'analysis', 'pipeline']
+
+def latency_stats(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    return {'count': len(ordered),
+            'mean_ms': round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+            'p50_ms': round(percentile(ordered, 0.5), 2),
+            'p95_ms': round(percentile(ordered, 0.95), 2),
+            'p99_ms': round(percentile(ordered, 0.99), 2),
+            'max_ms': round(ordered[-1], 2) if ordered else 0.0}
+
+def timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - started) * 1000
+
+def ocr_unavailable(fixtures):
+    """Why OCR cannot run here, or None after a successful warm-up"""
+    from src.utils.ocr import get_ocr_engine
+    if not fixtures:
+        return f"no fixtures in {SCREENSHOT_DIR}"
+    try:
+        get_ocr_engine().image_to_string(fixtures[0][1])
+    except Exception as e:
+        return f"OCR unavailable: {e}"
+    return None
+
+def bench_scrape(server: MockGrokServer, expected: Dict[str, str], runs: int) -> Dict[str, Any]:
+    from src.api.transport import HttpTransport
+    from src.utils.web_scraper import WebScraper
+
+    scraper = WebScraper(transport=HttpTransport())
+    per_page, samples, found = {}, [], 0
+    started = time.perf_counter()
+    for name, question in expected.items():
+        url = server.page_url(name)
+        timings = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            content = scraper.scrape_quiz_content(url)
+            timings.append((time.perf_counter() - t0) * 1000)
+        found += question in content['question']
+        per_page[name] = latency_stats(timings)
+        samples.extend(timings)
+    elapsed = time.perf_counter() - started
+    return {'latency': latency_stats(samples), 'pages_per_s': round(len(samples) / elapsed, 1),
+            'questions_found': f"{found}/{len(expected)}", 'pages': per_page}
+
+def bench_ocr(fixtures, runs: int) -> Dict[str, Any]:
+    from src.utils.image_preprocess import create_preprocessor
+    from src.utils.ocr import get_ocr_engine
+
+    reason = ocr_unavailable(fixtures)  # Also the warm-up, excluded from timings
+    if reason:
+        return {'skipped': reason}
+
+    engine = get_ocr_engine()
+    preprocessor = create_preprocessor()
+    preprocess_ms, ocr_ms, accuracy = [], [], []
+    for _ in range(runs):
+        for _, image, text in fixtures:
+            t0 = time.perf_counter()
+            cleaned = preprocessor.process(image)
+            t1 = time.perf_counter()
+            recognized = engine.image_to_string(cleaned)
+            preprocess_ms.append((t1 - t0) * 1000)
+            ocr_ms.append((time.perf_counter() - t1) * 1000)
+            accuracy.append(char_accuracy(text, recognized))
+    return {'backend': engine.name, 'preprocess': latency_stats(preprocess_ms),
+            'ocr': latency_stats(ocr_ms),
+            'char_accuracy': round(sum(accuracy) / len(accuracy), 4)}
+
+def bench_analysis(server: MockGrokServer, runs: int, concurrency: int) -> Dict[str, Any]:
+    from src.api.grok_client import GrokClient
+    from src.api.transport import HttpTransport
+
+    transport = HttpTransport(pool_size=concurrency)
+    client = GrokClient('mock-key', transport=transport)  # No cache: every call hits the server
+    client.api_url = server.url
+    questions = [f"Question {i}: what is {i} + {i}?" for i in range(10 * runs)]
+
+    def ask(question):
+        try:
+            client.analyze_question(question)
+            return True
+        except Exception:
+            return False
+
+    blocking = [timed(ask, q) for q in questions[:2 * runs]]
+
+    ttft, total = [], []
+    for question in questions[:2 * runs]:
+        try:
+            stream = client.stream_question(question)
+            for _ in stream:
+                pass
+        except Exception:
+            continue
+        ttft.append(stream.ttft * 1000)
+        total.append(stream.total_time * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        ok = sum(executor.map(ask, questions))
+    elapsed = time.perf_counter() - started
+    return {'blocking': latency_stats(blocking),
+            'stream_ttft': latency_stats(ttft), 'stream_total': latency_stats(total),
+            'concurrency': concurrency,
+            'questions_per_s': round(len(questions) / elapsed, 1),
+            'failed': len(questions) - ok, 'retries': transport.stats()['retries']}
+
+def bench_pipeline(server: MockGrokServer, pages: List[str], fixtures, runs: int) -> Dict[str, Any]:
+    from src.pipeline import AnalysisPipeline
+
+    pipeline = AnalysisPipeline('mock-key', use_cache=False, api_url=server.url,
+                                use_bank=False)  # A user's real bank would skew the numbers
+    tracer = get_tracer()
+    tracer.spans.clear()
+
+    url_ms, failed = [], 0
+    for _ in range(runs):
+        for name in pages:
+            record = pipeline.analyze_url(server.page_url(name))
+            failed += 'error' in record
+            url_ms.append(record['elapsed_ms'])
+    result = {'url': latency_stats(url_ms)}
+
+    reason = ocr_unavailable(fixtures)
+    if reason:
+        result['image'] = {'skipped': reason}
+    else:
+        image_ms = []
+        for _ in range(runs):
+            pipeline.ocr_cache.clear()  # Cold OCR on every run
+            for name, image, _ in fixtures:
+                record = pipeline.analyze_image(name, image=image)
+                failed += 'error' in record
+                image_ms.append(record['elapsed_ms'])
+        result['image'] = latency_stats(image_ms)
+    result['failed'] = failed
+    result['stages'] = {stage: {k: round(v, 2) for k, v in stats.items()}
+                        for stage, stats in tracer.stats().items()}
+    return result
+
+def git_revision() -> Dict[str, Any]:
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=HERE.parent, capture_output=True, text=True)
+    commit = git('rev-parse', '--short', 'HEAD').stdout.strip() or 'unknown'
+    return {'commit': commit, 'dirty': bool(git('status', '--porcelain', '--untracked-files=no').stdout)}
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], threshold: float, path: str = '') -> List[str]:
+    """Lines describing every latency/throughput figure present in both results"""
+    lines = []
+    for key, value in new.items():
+        name = f"{path}.{key}" if path else key
+        previous = old.get(key) if isinstance(old, dict) else None
+        if isinstance(value, dict):
+            lines.extend(compare(previous or {}, value, threshold, name))
+        elif isinstance(value, (int, float)) and isinstance(previous, (int, float)) and \
+                (key.endswith(('p50_ms', 'p95_ms', 'p99_ms')) or key.endswith('_per_s')) and previous:
+            change = (value - previous) / previous
+            worse = change < -threshold if key.endswith('_per_s') else change > threshold
+            lines.append(f"{'REGRESSION ' if worse else '           '}{name}: "
+                         f"{previous} -> {value} ({change * 100:+.1f}%)")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', default=','.join(SECTIONS), help='comma-separated sections')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.05, help='mock server latency (s)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random latency (s)')
+    parser.add_argument('--token-delay', type=float, default=0.005,
+                        help='seconds between streamed chunks')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 500 replies')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                        help='fraction of 429 replies')
+    parser.add_argument('--slow-rate', type=float, default=0.0,
+                        help='fraction of replies delayed by --slow-latency')
+    parser.add_argument('--slow-latency', type=float, default=1.0,
+                        help='extra seconds for slow replies')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--out', help='results file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', metavar='OLD', help='earlier results file to diff against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative change reported as a regression')
+    args = parser.parse_args()
+
+    sections = [s for s in args.only.split(',') if s]
+    expected = json.loads((HTML_DIR / 'expected.json').read_text(encoding='utf-8'))
+    fixtures = load_fixtures(SCREENSHOT_DIR)
+    config = {k: v for k, v in vars(args).items() if k not in ('out', 'compare')}
+    report: Dict[str, Any] = {
+        **git_revision(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(), 'platform': platform.platform(),
+        'cpus': os.cpu_count(), 'config': config, 'results': {}}
+
+    with MockGrokServer(latency=args.latency, jitter=args.jitter, token_delay=args.token_delay,
+                        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                        slow_rate=args.slow_rate, slow_latency=args.slow_latency, pages=load_pages(HTML_DIR)) as server:
+        for section in sections:
+            print(f"{section}...", file=sys.stderr)
+            if section == 'scrape':
+                result = bench_scrape(server, expected, args.runs)
+            elif section == 'ocr':
+                result = bench_ocr(fixtures, args.runs)
+            elif section == 'analysis':
+                result = bench_analysis(server, args.runs, args.concurrency)
+            elif section == 'pipeline':
+                result = bench_pipeline(server, list(expected), fixtures, args.runs)
+            else:
+                parser.error(f"unknown section {section!r}")
+            report['results'][section] = result
+        report['server'] = server.stats()
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{report['commit']}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+    print(json.dumps(report['results'], indent=2))
+    print(f"results written to {out}", file=sys.stderr)
+
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        print(f"\nchanges since {old.get('commit', args.compare)}:")
+        for line in compare(old.get('results', {}), report['results'], args.threshold):
+            print(line)
+
+if __name__ == "__main__":
+    main()
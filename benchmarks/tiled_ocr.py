@@ -0,0 +1,81 @@
+"""Wall time of tiled OCR against the number of bands on a tall capture.
+
+Usage:
+    python -m benchmarks.tiled_ocr [capture.png] [--lines 120] [--tiles 1,2,4,8] [--runs 3]
+
+Without an image a long scrolling quiz page is rendered. Bands run in a
+process pool with one worker per band, so speedups flatten out at the
+number of physical cores.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from benchmarks.ocr_preprocess import char_accuracy
+from src.utils.ocr import create_ocr_engine
+from src.utils.tiled_ocr import TiledOcrEngine
+
+def render_page(lines: int, width: int = 1400):
+    font = ImageFont.load_default(size=22)
+    text = []
+    for i in range(lines):
+        if i % 5 == 0:
+            text.append(f"Question {i // 5 + 1}: which of the following statements is correct?")
+        else:
+            text.append(f"{'ABCD'[i % 5 - 1]}) Option {i % 5} for question {i // 5 + 1}")
+    image = Image.new('L', (width, 40 + 38 * lines), 255)
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(text):
+        draw.text((30, 20 + 38 * i), line, fill=0, font=font)
+    return image, '\n'.join(text)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('image', nargs='?', help='tall capture to recognize')
+    parser.add_argument('--lines', type=int, default=120, help='lines on the synthetic page')
+    parser.add_argument('--tiles', default=None, help='band counts to try (default: 1,2,4.. cores)')
+    parser.add_argument('--backend', default='auto')
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.image:
+        image, expected = Image.open(args.image).convert('L'), None
+    else:
+        image, expected = render_page(args.lines)
+    cores = os.cpu_count() or 1
+    counts = [int(n) for n in args.tiles.split(',')] if args.tiles else \
+        sorted({1, *[2 ** i for i in range(1, cores.bit_length() + 1) if 2 ** i <= cores], cores})
+
+    try:
+        engine = TiledOcrEngine(create_ocr_engine(args.backend), workers=max(counts))
+        engine.image_to_string(image.crop((0, 0, image.width, 200)))
+    except Exception as e:
+        print(f"OCR unavailable: {e}")
+        return
+
+    print(f"{image.width}x{image.height} px, {cores} cores, backend {engine.engine.name}")
+    try:
+        baseline = None
+        for tiles in counts:
+            engine.image_to_string(image, tiles=tiles)  # Warm-up: spawns the pool workers
+            timings = []
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                text = engine.image_to_string(image, tiles=tiles)
+                timings.append(time.perf_counter() - started)
+            best = min(timings)
+            baseline = baseline or best
+            line = (f"  {tiles:3} bands   best {best * 1000:8.0f} ms   "
+                    f"median {statistics.median(timings) * 1000:8.0f} ms   "
+                    f"speedup {baseline / best:4.2f}x")
+            if expected:
+                line += f"   accuracy {char_accuracy(expected, text) * 100:5.1f}%"
+            print(line)
+    finally:
+        engine.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,3 @@
-from src.app import QuizHelperApp  # Imports the main app class that handles core functionality
-from src.ui.main_window import MainWindow  # Imports the GUI window class for the user interface
 import os  # For accessing environment variables and file paths
 from dotenv import load_dotenv  # For loading API keys securely from .env files
 
@@ -39,6 +37,9 @@ def main():
     api_key = os.getenv('GROK_API')  # Get API key from environment
     
     # Create and start the main application window
+    # Imported here so the GUI stack only loads when the GUI is actually started
+    # (use `python -m src` for the headless command line version)
+    from src.ui.main_window import MainWindow
     window = MainWindow(api_key)  # Initialize GUI with API key
     window.root.mainloop()  # Start the event loop (blocks until window closed)
 
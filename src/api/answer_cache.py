@@ -0,0 +1,132 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from src.utils.paths import user_data_dir
+
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_question(text: str) -> str:
+    """Canonical form of a question so re-pasted copies map to one key"""
+    text = unicodedata.normalize('NFKC', text)
+    return _WHITESPACE.sub(' ', text).strip().lower()
+
+def cache_key(content: str, model: str, temperature: float, system_prompt: str) -> str:
+    """Content address of a completion request"""
+    parts = [normalize_question(content), model, repr(float(temperature)), system_prompt.strip()]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+class AnswerCache:
+    """SQLite-backed cache of API responses keyed by cache_key().
+
+    Entries expire after ttl seconds and the least recently used ones are
+    evicted once more than max_entries are stored. Access times of hits
+    are buffered in memory and written with the next put() so a hit is
+    a single primary-key read. Eviction listeners get the keys each put()
+    removed, e.g. so an index over the keys can drop them too.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, max_entries: int = 5000,
+                 ttl: Optional[float] = 30 * 24 * 3600):
+        self.path = Path(path) if path else user_data_dir() / 'answers.sqlite3'
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._touched: Dict[str, float] = {}
+        self._listeners = set()  # A set, so a listener added by several clients runs once
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('''CREATE TABLE IF NOT EXISTS answers (
+            key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            created REAL NOT NULL,
+            accessed REAL NOT NULL
+        )''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS answers_accessed ON answers (accessed)')
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                'SELECT response, created FROM answers WHERE key = ?', (key,)).fetchone()
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = now
+        return json.loads(row[0])
+
+    def add_eviction_listener(self, listener: Callable[[List[str]], None]):
+        with self._lock:
+            self._listeners.add(listener)
+
+    def put(self, key: str, response: dict):
+        now = time.time()
+        with self._lock:
+            self._flush_touched()
+            self._db.execute(
+                'INSERT OR REPLACE INTO answers (key, response, created, accessed) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(response), now, now))
+            evicted = self._evict(now)
+            self._db.commit()
+            listeners = list(self._listeners) if evicted else []
+        for listener in listeners:
+            listener(evicted)
+
+    def _flush_touched(self):
+        if self._touched:
+            self._db.executemany('UPDATE answers SET accessed = ? WHERE key = ?',
+                                 [(accessed, key) for key, accessed in self._touched.items()])
+            self._touched.clear()
+
+    def _evict(self, now: float) -> List[str]:
+        """Delete expired and least recently used entries; returns their keys"""
+        evicted = []
+        if self.ttl is not None:
+            evicted += [key for key, in self._db.execute(
+                'SELECT key FROM answers WHERE created < ?', (now - self.ttl,))]
+            self._db.execute('DELETE FROM answers WHERE created < ?', (now - self.ttl,))
+        count = self._db.execute('SELECT COUNT(*) FROM answers').fetchone()[0]
+        if count > self.max_entries:
+            oldest = [key for key, in self._db.execute(
+                'SELECT key FROM answers ORDER BY accessed LIMIT ?', (count - self.max_entries,))]
+            self._db.executemany('DELETE FROM answers WHERE key = ?', [(key,) for key in oldest])
+            evicted += oldest
+        return evicted
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def summary(self) -> str:
+        """Short hit/miss text for status bars"""
+        stats = self.stats()
+        return f"cache {stats['hits']} hits / {stats['misses']} misses"
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._db.commit()
+            self._db.close()
+
+_shared_cache: Optional[AnswerCache] = None
+_shared_lock = threading.Lock()
+
+def get_answer_cache() -> AnswerCache:
+    """Return the process-wide answer cache, opening it on first use"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = AnswerCache()
+        return _shared_cache
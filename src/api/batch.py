@@ -0,0 +1,94 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterable, Optional
+
+from src.api.grok_client import GrokClient
+from src.api.prompts import answer_prompt
+
+class TokenBucket:
+    """Asyncio token bucket: `rate` requests per second with bursts up to `burst`"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class BatchResult:
+    """One finished question; exactly one of `response` and `error` is set"""
+
+    def __init__(self, index: int, question: str, response: Optional[dict] = None,
+                 error: Optional[Exception] = None, elapsed: float = 0.0):
+        self.index = index
+        self.question = question
+        self.response = response
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def answer(self) -> Optional[str]:
+        if self.response is None:
+            return None
+        return self.response['choices'][0]['message']['content']
+
+async def analyze_batch(client: GrokClient, questions: Iterable[str], concurrency: int = 4,
+                        rate: Optional[float] = None, burst: Optional[int] = None,
+                        build_prompt: Callable[[str], str] = answer_prompt) -> AsyncIterator[BatchResult]:
+    """Analyze many questions concurrently, yielding results in completion order.
+
+    At most `concurrency` requests are in flight and `questions` is read
+    lazily, so arbitrarily large question banks run in bounded memory.
+    `rate` (requests per second) enables the token-bucket limiter.
+    Failures are reported per question instead of aborting the batch.
+    """
+    loop = asyncio.get_running_loop()
+    bucket = TokenBucket(rate, burst) if rate else None
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch")
+
+    async def run_one(index: int, question: str) -> BatchResult:
+        if bucket:
+            await bucket.acquire()
+        started = time.perf_counter()
+        try:
+            response = await loop.run_in_executor(
+                executor, client.analyze_question, build_prompt(question), question)
+            return BatchResult(index, question, response=response,
+                               elapsed=time.perf_counter() - started)
+        except Exception as e:
+            return BatchResult(index, question, error=e, elapsed=time.perf_counter() - started)
+
+    pending = set()
+    source = enumerate(questions)
+    try:
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    index, question = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(run_one(index, question)))
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        executor.shutdown(wait=False)
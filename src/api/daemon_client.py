@@ -0,0 +1,161 @@
+import io
+import json
+import os
+import secrets
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from src.api.transport import HttpTransport, get_transport
+from src.utils.ocr import OcrEngine
+from src.utils.paths import user_data_dir
+from src.utils.tracing import percentile
+
+DEFAULT_DAEMON_URL = "http://127.0.0.1:8787"
+TOKEN_FILE = 'daemon.token'
+
+def daemon_token(create: bool = False) -> Optional[str]:
+    """The secret the daemon requires of its clients.
+
+    QUIZ_HELPER_DAEMON_TOKEN overrides the per-user token file, which
+    only its owner can read; create=True writes a new one if missing.
+    """
+    token = os.getenv('QUIZ_HELPER_DAEMON_TOKEN', '').strip()
+    if token:
+        return token
+    path = user_data_dir() / TOKEN_FILE
+    if create:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(secrets.token_urlsafe(32))
+        except FileExistsError:
+            pass
+    try:
+        return path.read_text(encoding='utf-8').strip() or None
+    except OSError:
+        return None
+
+class DaemonClient(OcrEngine):
+    """Thin client of a running `python -m src serve` daemon.
+
+    analyze_* return the same records as AnalysisPipeline, with the
+    daemon's queue wait under 'daemon'. Requests go through the shared
+    transport, whose retries honour the daemon's Retry-After when it is
+    busy, and carry the daemon token (daemon_token() by default). Also
+    usable as the OCR engine of a CapturePipeline.
+    """
+
+    name = "daemon"
+
+    def __init__(self, url: str = DEFAULT_DAEMON_URL, client_name: str = 'client',
+                 transport: Optional[HttpTransport] = None, read_timeout: float = 120.0,
+                 token: Optional[str] = None):
+        self.url = url.rstrip('/')
+        self.client_name = f"{client_name}-{os.getpid()}"
+        self.transport = transport or get_transport()
+        token = token or daemon_token()
+        self.headers = {'Authorization': f"Bearer {token}"} if token else {}
+        self.timeout = (2.0, read_timeout)  # Queue waits count against the read timeout
+        self.calls = 0
+        self._waits = deque(maxlen=256)
+        self._lock = threading.Lock()
+
+    def health(self) -> Optional[Dict[str, Any]]:
+        """The daemon's /health reply, or None when it is not running or rejects our token"""
+        try:
+            response = self.transport.get(f"{self.url}/health", headers=self.headers,
+                                          timeout=(0.5, 2.0))
+            return response.json() if response.ok else None
+        except (requests.exceptions.RequestException, ValueError):
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Daemon-wide stats, including every client's throughput and queue wait"""
+        response = self.transport.get(f"{self.url}/stats", headers=self.headers,
+                                      timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _post(self, path: str, stream: bool = False, **kwargs) -> requests.Response:
+        headers = {**self.headers, 'X-Quiz-Client': self.client_name, **kwargs.pop('headers', {})}
+        response = self.transport.post(f"{self.url}{path}", headers=headers, stream=stream,
+                                       timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.calls += 1
+            if 'daemon' in record:
+                self._waits.append(record['daemon']['queue_wait_ms'])
+        return record
+
+    def _analyze(self, path: str, payload: Dict[str, Any],
+                 on_delta: Optional[Callable[[str], None]]) -> Dict[str, Any]:
+        if on_delta is None:
+            return self._record(self._post(path, json=payload).json())
+        with self._post(path, stream=True, json={**payload, 'stream': True}) as response:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                message = json.loads(line)
+                if 'delta' in message:
+                    on_delta(message['delta'])
+                elif 'record' in message:
+                    return self._record(message['record'])
+        raise requests.exceptions.ConnectionError("Daemon closed the stream before the answer")
+
+    def analyze_text(self, question: str,
+                     on_delta: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Answer question; on_delta receives the answer as it streams in"""
+        return self._analyze('/text', {'question': question}, on_delta)
+
+    def analyze_url(self, url: str,
+                    on_delta: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Scrape and answer url; multi-question pages come back in one piece"""
+        return self._analyze('/url', {'url': url}, on_delta)
+
+    @staticmethod
+    def _png(image) -> bytes:
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    def analyze_image(self, image) -> Dict[str, Any]:
+        """OCR a PIL image on the daemon and answer its text"""
+        return self._record(self._post('/image', data=self._png(image),
+                                       headers={'Content-Type': 'image/png'}).json())
+
+    def image_to_string(self, image) -> str:
+        """OcrEngine interface: text of an already preprocessed image, via the daemon's engine"""
+        result = self._record(self._post('/ocr', data=self._png(image),
+                                         headers={'Content-Type': 'image/png'}).json())
+        if 'error' in result:
+            raise RuntimeError(f"Daemon OCR failed: {result['error']}")
+        return result['text']
+
+    def summary(self) -> str:
+        """Short queue wait text for status bars"""
+        with self._lock:
+            waits = sorted(self._waits)
+            calls = self.calls
+        return f"daemon: {calls} calls, queue wait p50 {percentile(waits, 0.5):.0f} ms"
+
+def connect_daemon(client_name: str) -> Optional[DaemonClient]:
+    """A client of the daemon named by QUIZ_HELPER_DAEMON, if it is running.
+
+    QUIZ_HELPER_DAEMON is the daemon's URL (or '1' for the default
+    address); unset or unreachable means analysis runs in process.
+    """
+    url = os.getenv('QUIZ_HELPER_DAEMON', '')
+    if url.lower() in ('', '0', 'off', 'none'):
+        return None
+    if url.lower() in ('1', 'on', 'auto'):
+        url = DEFAULT_DAEMON_URL
+    elif '://' not in url:
+        url = f"http://{url}"
+    client = DaemonClient(url, client_name)
+    return client if client.health() else None
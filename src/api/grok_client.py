@@ -1,38 +1,276 @@
-import requests
-from typing import Dict, Any
+import json
+import time
+from typing import Callable, Dict, Any, Iterator, Optional
+from src.api.answer_cache import AnswerCache, cache_key
+from src.api.hedging import HedgePolicy
+from src.api.prompts import QUIZ_SYSTEM_PROMPT
+from src.api.similarity_index import SimilarityIndex
+from src.api.single_flight import SingleFlight, get_single_flight
+from src.api.transport import HttpTransport, get_transport
+from src.utils.tracing import get_tracer
+
+def usage_attrs(usage: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """Prompt/completion token counts from an API usage block, for tracing"""
+    usage = usage or {}
+    return {name: usage[name] for name in ('prompt_tokens', 'completion_tokens') if name in usage}
+
+class CompletionStream:
+    """Iterable over the text deltas of a streamed completion.
+
+    Timing fields are filled in while the stream is consumed: ttft is the
+    time from sending the request to the first content chunk, total_time
+    the time until the server sent [DONE] (both in seconds).
+
+    on_close runs when the stream ends, with the full response or None if
+    it was cut off. A consumer that stops iterating early still reads the
+    rest of the answer when keep_reading() says others are waiting on it.
+    """
+
+    def __init__(self, response, started: float,
+                 on_complete: Optional[Callable[[dict], None]] = None,
+                 on_close: Optional[Callable[[Optional[dict]], None]] = None,
+                 keep_reading: Optional[Callable[[], bool]] = None):
+        self.response = response
+        self.started = started
+        self.on_complete = on_complete
+        self.on_close = on_close
+        self.keep_reading = keep_reading
+        self.finished = False
+        self.cached = False
+        self.coalesced = False  # Replayed from an identical request that was already in flight
+        self.banked = False  # Answered from the local question bank
+        self.ttft: Optional[float] = None
+        self.total_time: Optional[float] = None
+        self.usage: Optional[Dict[str, Any]] = None
+        self.parts = []
+
+    @classmethod
+    def from_response(cls, result: dict, started: float, cached: bool = True,
+                      coalesced: bool = False, banked: bool = False) -> 'CompletionStream':
+        """Replay an already complete response (e.g. a cache hit or shared result) as one delta"""
+        stream = cls(None, started)
+        stream.cached = cached
+        stream.coalesced = coalesced
+        stream.banked = banked
+        stream.usage = result.get('usage')
+        stream.parts = [result['choices'][0]['message']['content']]
+        return stream
+
+    @property
+    def text(self) -> str:
+        return ''.join(self.parts)
+
+    def __iter__(self) -> Iterator[str]:
+        if self.response is None:
+            self.ttft = self.total_time = time.perf_counter() - self.started
+            if self.cached or self.coalesced:  # Otherwise the request was traced already
+                get_tracer().record('api', self.started, stream=True, cached=self.cached,
+                                    coalesced=self.coalesced)
+            yield from self.parts
+            return
+
+        deltas = self._read()
+        try:
+            for delta in deltas:  # Not `yield from`: closing this must leave `deltas` readable
+                yield delta
+        finally:
+            if not self.finished and self.keep_reading and self.keep_reading():
+                try:
+                    for _ in deltas:
+                        pass  # Abandoned, but identical requests are waiting for this answer
+                except Exception:
+                    pass
+            self.total_time = time.perf_counter() - self.started
+            self.response.close()
+            get_tracer().record('api', self.started, stream=True, cached=False,
+                                complete=self.finished,
+                                ttft_ms=self.ttft * 1000 if self.ttft is not None else None,
+                                **usage_attrs(self.usage))
+            if self.finished and self.on_complete:
+                self.on_complete(self.as_response())
+            if self.on_close:
+                self.on_close(self.as_response() if self.finished else None)
+
+    def _read(self) -> Iterator[str]:
+        for line in self.response.iter_lines(decode_unicode=True):
+            # SSE frames look like "data: {...}"; blank lines separate events
+            if not line or not line.startswith('data:'):
+                continue
+            payload = line[len('data:'):].strip()
+            if payload == '[DONE]':
+                self.finished = True
+                return
+
+            chunk = json.loads(payload)
+            if chunk.get('usage'):
+                self.usage = chunk['usage']
+            choices = chunk.get('choices') or []
+            delta = choices[0].get('delta', {}).get('content') if choices else None
+            if not delta:
+                continue
+
+            if self.ttft is None:
+                self.ttft = time.perf_counter() - self.started
+            self.parts.append(delta)
+            yield delta
+
+    def as_response(self) -> dict:
+        """Shape the collected text like a non-streaming completion"""
+        result = {'choices': [{'message': {'role': 'assistant', 'content': self.text}}]}
+        if self.usage:
+            result['usage'] = self.usage
+        return result
 
 class GrokClient:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, transport: Optional[HttpTransport] = None,
+                 system_prompt: str = QUIZ_SYSTEM_PROMPT, model: str = 'grok-3-latest',
+                 temperature: float = 0.7, cache: Optional[AnswerCache] = None,
+                 similarity_index: Optional[SimilarityIndex] = None,
+                 single_flight: Optional[SingleFlight] = None, max_tokens: Optional[int] = None,
+                 hedge: Optional[HedgePolicy] = None, store_results: bool = True):
         self.api_key = api_key
         self.api_url = "https://api.x.ai/v1/chat/completions"
+        self.transport = transport or get_transport()
+        self.system_prompt = system_prompt
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.cache = cache
+        self.similarity_index = similarity_index  # Only consulted when a cache is set
+        if cache and similarity_index:
+            # Entries the cache drops must not keep matching near-duplicates
+            cache.add_eviction_listener(similarity_index.remove_keys)
+        # False: answers are only cached through store(), e.g. once a router accepted them
+        self.store_results = store_results
+        # Identical requests already in flight are joined instead of sent again
+        self.single_flight = single_flight or get_single_flight()
+        # Per client, since every model has its own latency profile
+        self.hedge = hedge or HedgePolicy.from_env()
 
-    def analyze_question(self, content: str) -> dict:
-        headers = {
+    def _headers(self) -> Dict[str, str]:
+        return {
             'Content-Type': 'application/json',
             'Authorization': f'Bearer {self.api_key}'
         }
-        
-        data = {
+
+    def _post(self, data: Dict[str, Any], stream: bool = False):
+        """Send a completion request with an adaptive read timeout, hedged when it runs slow"""
+        kind = 'stream' if stream else 'complete'  # Time to headers vs. the whole answer
+        connect, read = self.transport.timeout
+        timeout = (connect, min(read, self.hedge.read_timeout(kind)))
+
+        def attempt():
+            response = self.transport.post(self.api_url, headers=self._headers(), json=data,
+                                           stream=stream, timeout=timeout)
+            if not response.ok:
+                response.content  # Buffer the error body so callers can still report it
+                response.raise_for_status()
+            return response
+        return self.hedge.call(attempt, kind, discard=lambda response: response.close())
+
+    def build_payload(self, content: str, stream: bool = False) -> Dict[str, Any]:
+        payload = {
             'messages': [
                 {
                     'role': 'system',
-                    'content': '''You are a quiz assistant. Analyze web content to:
-                    1. Identify quiz questions
-                    2. Provide accurate answers
-                    3. Give brief explanations
-                    Use available context to ensure accuracy.'''
+                    'content': self.system_prompt
                 },
                 {
                     'role': 'user',
                     'content': content
                 }
             ],
-            'model': 'grok-3-latest',
-            'stream': False,
-            'temperature': 0.7
+            'model': self.model,
+            'stream': stream,
+            'temperature': self.temperature
         }
-        
-        response = requests.post(self.api_url, headers=headers, json=data, timeout=30)
-        response.raise_for_status()
-        
-        return response.json()
\ No newline at end of file
+        if self.max_tokens:
+            payload['max_tokens'] = self.max_tokens
+        return payload
+
+    def cache_key(self, content: str) -> str:
+        return cache_key(content, self.model, self.temperature, self.system_prompt)
+
+    @property
+    def index_namespace(self) -> str:
+        """Near-duplicate matches stay within one model, temperature and system prompt"""
+        return cache_key('', self.model, self.temperature, self.system_prompt)
+
+    def _cached_response(self, key: str, question: str) -> Optional[dict]:
+        """Exact cache hit, else the answer stored for a near-identical question"""
+        cached = self.cache.get(key)
+        if cached is not None or not self.similarity_index:
+            return cached
+        for similar_key in self.similarity_index.candidates(question, self.index_namespace):
+            cached = self.cache.get(similar_key) if similar_key != key else None
+            if cached is not None:
+                self.similarity_index.record_near_hit()
+                return cached
+            self.similarity_index.remove(similar_key)  # Its answer expired or was evicted
+        return None
+
+    def _store(self, key: str, question: str, result: dict):
+        self.cache.put(key, result)
+        if self.similarity_index:
+            self.similarity_index.add(question, key, self.index_namespace)
+
+    def store(self, content: str, result: dict, question: Optional[str] = None):
+        """Cache result as the answer to content (for clients with store_results=False)"""
+        if self.cache:
+            self._store(self.cache_key(content), question or content, result)
+
+    def analyze_question(self, content: str, question: Optional[str] = None) -> dict:
+        """Analyze content; question is the raw text used for near-duplicate matching"""
+        question = question or content
+        with get_tracer().span('api', model=self.model, stream=False, cached=False) as span:
+            key = self.cache_key(content)
+            if self.cache:
+                cached = self._cached_response(key, question)
+                if cached is not None:
+                    span.set(cached=True)
+                    return cached
+
+            def request():
+                response = self._post(self.build_payload(content))
+
+                result = response.json()
+                span.set(bytes=len(response.content), **usage_attrs(result.get('usage')))
+                if self.cache and self.store_results:
+                    self._store(key, question, result)
+                return result
+
+            result, shared = self.single_flight.do(key, request)
+            span.set(coalesced=shared)
+            return result
+
+    def stream_question(self, content: str, question: Optional[str] = None) -> CompletionStream:
+        """Start a streamed completion; iterate the result for text deltas"""
+        question = question or content
+        started = time.perf_counter()
+        key = self.cache_key(content)
+        if self.cache:
+            cached = self._cached_response(key, question)
+            if cached is not None:
+                return CompletionStream.from_response(cached, started)
+
+        flight, leader = self.single_flight.acquire(key)
+        if not leader:
+            shared = self.single_flight.follow(flight)
+            if shared is not None:
+                return CompletionStream.from_response(shared, started, cached=False, coalesced=True)
+            flight = None  # The leader gave up; send our own request without leading
+
+        try:
+            response = self._post(self.build_payload(content, stream=True), stream=True)
+        except BaseException as e:
+            if flight:
+                self.single_flight.release(key, flight, error=e)
+            raise
+
+        on_complete = ((lambda result: self._store(key, question, result))
+                       if self.cache and self.store_results else None)
+        if not flight:
+            return CompletionStream(response, started, on_complete)
+        return CompletionStream(response, started, on_complete,
+                                on_close=lambda result: self.single_flight.release(key, flight, result),
+                                keep_reading=lambda: flight.waiters > 0)
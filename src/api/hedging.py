@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+from src.utils.tracing import get_tracer, percentile
+
+class HedgePolicy:
+    """Adaptive read timeouts and hedged requests from observed latencies.
+
+    Latencies of successful attempts are kept per kind of call (e.g.
+    'complete' and 'stream', which measure different things). Once
+    `min_samples` are known, a call still running after the `hedge_at`
+    percentile gets a second, identical request and whichever succeeds
+    first wins. Hedges are paid for from a token bucket that every call
+    adds `budget` to, so at most about that fraction of calls is doubled.
+    The read timeout follows p99 * timeout_factor within [min, max].
+    """
+
+    def __init__(self, hedge_at: float = 0.95, budget: float = 0.1, burst: float = 2.0,
+                 min_samples: int = 20, window: int = 200, timeout_factor: float = 3.0,
+                 min_timeout: float = 5.0, max_timeout: float = 30.0):
+        self.hedge_at = hedge_at
+        self.budget = budget
+        self.burst = burst
+        self.min_samples = min_samples
+        self.window = window
+        self.timeout_factor = timeout_factor
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._tokens = burst if budget > 0 else 0.0
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @classmethod
+    def from_env(cls) -> 'HedgePolicy':
+        """QUIZ_HELPER_HEDGE_BUDGET: fraction of calls that may be hedged (0 disables)"""
+        return cls(budget=float(os.getenv('QUIZ_HELPER_HEDGE_BUDGET', '0.1')))
+
+    def observe(self, kind: str, seconds: float):
+        with self._lock:
+            window = self._latencies.setdefault(kind, deque(maxlen=self.window))
+            window.append(seconds)
+
+    def quantile(self, kind: str, fraction: float) -> Optional[float]:
+        """Latency quantile in seconds, None until min_samples calls succeeded"""
+        with self._lock:
+            samples = sorted(self._latencies.get(kind, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return percentile(samples, fraction)
+
+    def hedge_delay(self, kind: str) -> Optional[float]:
+        return self.quantile(kind, self.hedge_at) if self.budget > 0 else None
+
+    def read_timeout(self, kind: str) -> float:
+        p99 = self.quantile(kind, 0.99)
+        if p99 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, p99 * self.timeout_factor))
+
+    def _take_hedge(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            self.hedged += 1
+            return True
+
+    def _attempt(self, fn: Callable[[], Any], kind: str) -> Any:
+        started = time.perf_counter()
+        result = fn()
+        self.observe(kind, time.perf_counter() - started)
+        return result
+
+    def call(self, fn: Callable[[], Any], kind: str = 'complete',
+             discard: Optional[Callable[[Any], None]] = None) -> Any:
+        """Run fn, hedging it once if it is slow; discard(result) releases a losing result"""
+        with self._lock:
+            self.calls += 1
+            self._tokens = min(self._tokens + self.budget, self.burst)
+        delay = self.hedge_delay(kind)
+        if delay is None:
+            return self._attempt(fn, kind)
+
+        executor = get_hedge_executor()
+        primary = executor.submit(self._attempt, fn, kind)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_hedge():
+            return primary.result()
+
+        started = time.perf_counter()
+        hedge = executor.submit(self._attempt, fn, kind)
+        winner, error, pending = None, None, {primary, hedge}
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    winner = future
+                    break
+                error = future.exception()
+        if winner is None:
+            raise error
+
+        won = winner is hedge
+        with self._lock:
+            self.hedge_wins += won
+        get_tracer().record('hedge', started, kind=kind, delay_ms=round(delay * 1000, 1), won=won)
+        loser = primary if won else hedge
+        if discard:
+            loser.add_done_callback(
+                lambda future: discard(future.result()) if future.exception() is None else None)
+        return winner.result()
+
+    def stats(self) -> Dict[str, Any]:
+        kinds = {}
+        with self._lock:
+            windows = {kind: sorted(samples) for kind, samples in self._latencies.items()}
+            calls, hedged, wins = self.calls, self.hedged, self.hedge_wins
+        for kind, samples in windows.items():
+            kinds[kind] = {'samples': len(samples),
+                           'p50_ms': percentile(samples, 0.5) * 1000,
+                           'p95_ms': percentile(samples, 0.95) * 1000,
+                           'p99_ms': percentile(samples, 0.99) * 1000,
+                           'read_timeout_s': self.read_timeout(kind)}
+        return {'calls': calls, 'hedged': hedged, 'hedge_wins': wins,
+                'hedge_rate': hedged / calls if calls else 0.0, 'latency': kinds}
+
+    def summary(self) -> str:
+        return f"{self.hedged} hedged ({self.hedge_wins} won) of {self.calls} calls"
+
+_shared_executor: Optional[ThreadPoolExecutor] = None
+_shared_lock = threading.Lock()
+
+def get_hedge_executor() -> ThreadPoolExecutor:
+    """Threads that run hedged attempts; the losing attempt finishes in the background"""
+    global _shared_executor
+    with _shared_lock:
+        if _shared_executor is None:
+            _shared_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+        return _shared_executor
@@ -0,0 +1,266 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from src.api.grok_client import CompletionStream, GrokClient
+from src.api.question_bank import QuestionBank
+from src.utils.tracing import get_tracer, percentile
+
+# Appended to prompts sent to the fast tier so its answers carry a confidence signal
+CONFIDENCE_INSTRUCTION = "\nCONFIDENCE: [0-100, how sure you are of the answer]"
+# Replies meaning the tier's model or parameters are wrong, so it is no longer tried
+TIER_FATAL_STATUSES = (400, 404, 422)
+
+_ANSWER_LINE = re.compile(r'^\s*\**ANSWER\**\s*:\s*\S', re.I | re.M)
+_EXPLANATION_LINE = re.compile(r'^\s*\**EXPLANATION\**\s*:', re.I | re.M)
+_CONFIDENCE = re.compile(r'^\s*\**CONFIDENCE\**\s*:\s*(\d{1,3})', re.I | re.M)
+_CONFIDENCE_LINE = re.compile(r'^[ \t]*\**CONFIDENCE\**[ \t]*:.*(?:\n|$)', re.I | re.M)
+
+def format_ok(text: str) -> bool:
+    """True when a reply has the ANSWER: and EXPLANATION: lines the prompts ask for"""
+    return bool(_ANSWER_LINE.search(text) and _EXPLANATION_LINE.search(text))
+
+def confidence(text: str) -> Optional[int]:
+    """Self-reported CONFIDENCE: 0-100 of a reply, None when it gave none"""
+    match = _CONFIDENCE.search(text)
+    return min(int(match.group(1)), 100) if match else None
+
+def without_confidence(result: dict) -> dict:
+    """Copy of a completion with the CONFIDENCE line, which is only for routing, removed"""
+    message = result['choices'][0]['message']
+    text = _CONFIDENCE_LINE.sub('', message['content']).rstrip()
+    return {**result, 'choices': [{**result['choices'][0], 'message': {**message, 'content': text}}]}
+
+class ModelTier:
+    """A cheaper model tried before the client's own model"""
+
+    def __init__(self, name: str, model: str, temperature: float = 0.0,
+                 max_tokens: Optional[int] = 300, min_confidence: int = 70):
+        self.name = name
+        self.model = model
+        self.temperature = temperature  # Deterministic: the same question gets the same answer
+        self.max_tokens = max_tokens
+        self.min_confidence = min_confidence  # Escalate below this self-reported confidence
+
+class TierStats:
+    def __init__(self, history: int = 512):
+        self.calls = 0
+        self.accepted = 0  # Answers returned to the caller from this tier
+        self.escalations: Dict[str, int] = {}  # Reason -> count
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies = deque(maxlen=history)
+        self.confidences = deque(maxlen=history)
+
+    def record(self, latency_ms: float, usage: Optional[Dict[str, Any]] = None,
+               score: Optional[int] = None, escalated: Optional[str] = None):
+        self.calls += 1
+        self.latencies.append(latency_ms)
+        usage = usage or {}
+        self.prompt_tokens += usage.get('prompt_tokens', 0)
+        self.completion_tokens += usage.get('completion_tokens', 0)
+        if score is not None:
+            self.confidences.append(score)
+        if escalated:
+            self.escalations[escalated] = self.escalations.get(escalated, 0) + 1
+        else:
+            self.accepted += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        escalated = sum(self.escalations.values())
+        return {
+            'calls': self.calls,
+            'accepted': self.accepted,
+            'escalation_rate': escalated / self.calls if self.calls else 0.0,
+            'escalations': dict(self.escalations),
+            'p50_ms': percentile(latencies, 0.5),
+            'p95_ms': percentile(latencies, 0.95),
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'mean_confidence': (sum(self.confidences) / len(self.confidences)
+                                if self.confidences else None),
+        }
+
+class ModelRouter:
+    """Answers with a small, fast model first and escalates to the client's model.
+
+    A fast-tier reply is accepted when it has the ANSWER/EXPLANATION
+    format and reports a confidence of at least the tier's threshold;
+    otherwise (or on an API error) the next tier is asked. The client's
+    own model is the last tier and is streamed when streaming is asked
+    for. Fast tiers share the client's transport, cache and single-flight
+    group, but a fast answer is only cached once it has been accepted, so
+    an escalated question never finds the rejected reply. The CONFIDENCE
+    line is removed from answers before they are returned. A
+    question_bank is consulted before any model and answers a question
+    it knows without touching the network.
+    Call-compatible with GrokClient.analyze_question/stream_question.
+    """
+
+    def __init__(self, client: GrokClient, tiers: Optional[List[ModelTier]] = None,
+                 question_bank: Optional[QuestionBank] = None):
+        self.client = client
+        self.tiers = default_tiers() if tiers is None else tiers
+        self.question_bank = question_bank
+        self.clients = [GrokClient(client.api_key, transport=client.transport,
+                                   system_prompt=client.system_prompt, model=tier.model,
+                                   temperature=tier.temperature, cache=client.cache,
+                                   similarity_index=client.similarity_index,
+                                   single_flight=client.single_flight, max_tokens=tier.max_tokens,
+                                   store_results=False)
+                        for tier in self.tiers]
+        self.disabled: Dict[str, str] = {}  # Tier name -> why it stopped being tried
+        self.stats: Dict[str, TierStats] = {tier.name: TierStats() for tier in self.tiers}
+        self.stats['full'] = TierStats()
+        if question_bank is not None:
+            self.stats['bank'] = TierStats()
+        self._lock = threading.Lock()
+
+    def _sync(self, client: GrokClient):
+        # The API key and endpoint can be changed on the main client at runtime
+        client.api_key = self.client.api_key
+        client.api_url = self.client.api_url
+
+    def _bank_answer(self, question: str) -> Optional[dict]:
+        """The question bank's answer, when it has the question"""
+        if self.question_bank is None:
+            return None
+        with get_tracer().span('route.bank') as span:
+            match = self.question_bank.match(question)
+            span.set(hit=match is not None, score=match and round(match.score, 3))
+        with self._lock:
+            self.stats['bank'].record(span.duration_ms, escalated=None if match else 'miss')
+        return match.as_response() if match else None
+
+    def _try_tiers(self, content: str, question: str) -> Optional[dict]:
+        """The first acceptable fast-tier response, if any"""
+        for tier, client in zip(self.tiers, self.clients):
+            if tier.name in self.disabled:
+                continue
+            self._sync(client)
+            with get_tracer().span(f"route.{tier.name}", model=tier.model) as span:
+                try:
+                    result = client.analyze_question(content + CONFIDENCE_INSTRUCTION,
+                                                     question=question)
+                except requests.exceptions.HTTPError as e:
+                    status = e.response.status_code if e.response is not None else None
+                    if status in TIER_FATAL_STATUSES:
+                        # Unknown model, bad parameters...: retrying every question won't help.
+                        # Auth errors are not: the key may still be being typed in
+                        self.disabled[tier.name] = f"HTTP {status}"
+                    result, reason, score = None, 'error', None
+                except requests.exceptions.RequestException:
+                    result, reason, score = None, 'error', None
+                else:
+                    text = result['choices'][0]['message']['content']
+                    score = confidence(text)
+                    if not format_ok(text):
+                        reason = 'format'
+                    elif score is None or score < tier.min_confidence:
+                        reason = 'confidence'
+                    else:
+                        reason = None
+                span.set(confidence=score, escalated=reason)
+            with self._lock:
+                self.stats[tier.name].record(span.duration_ms, result and result.get('usage'),
+                                             score, reason)
+            if reason is None:
+                client.store(content + CONFIDENCE_INSTRUCTION, result, question)
+                return without_confidence(result)
+        return None
+
+    def analyze_question(self, content: str, question: Optional[str] = None) -> dict:
+        question = question or content
+        result = self._bank_answer(question)
+        if result is not None:
+            return result
+        result = self._try_tiers(content, question)
+        if result is not None:
+            return result
+        started = time.perf_counter()
+        with get_tracer().span('route.full', model=self.client.model):
+            result = self.client.analyze_question(content, question=question)
+        with self._lock:
+            self.stats['full'].record((time.perf_counter() - started) * 1000, result.get('usage'))
+        return result
+
+    def stream_question(self, content: str, question: Optional[str] = None) -> CompletionStream:
+        """Fast tiers answer in one piece; an escalation streams from the full model"""
+        question = question or content
+        started = time.perf_counter()
+        result = self._bank_answer(question)
+        if result is not None:
+            return CompletionStream.from_response(result, started, cached=False, banked=True)
+        result = self._try_tiers(content, question)
+        if result is not None:
+            return CompletionStream.from_response(result, started, cached=False)
+
+        stream = self.client.stream_question(content, question=question)
+        if stream.response is None:  # Cache hit or shared result: nothing left to time
+            with self._lock:
+                self.stats['full'].record((time.perf_counter() - started) * 1000, stream.usage)
+            return stream
+        on_close = stream.on_close
+
+        def record(response):
+            with self._lock:
+                self.stats['full'].record((time.perf_counter() - started) * 1000,
+                                          response and response.get('usage'))
+            if on_close:
+                on_close(response)
+        stream.on_close = record
+        return stream
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {name: tier.as_dict() for name, tier in self.stats.items()}
+        return {'tiers': stats, 'disabled': dict(self.disabled)}
+
+    def hedge_stats(self) -> Dict[str, Any]:
+        """Hedging and adaptive-timeout stats of every tier's client"""
+        clients = dict(zip((tier.name for tier in self.tiers), self.clients))
+        clients['full'] = self.client
+        return {name: client.hedge.stats() for name, client in clients.items()}
+
+    def hedge_summary(self) -> str:
+        policies = [client.hedge for client in self.clients + [self.client]]
+        calls = sum(policy.calls for policy in policies)
+        hedged = sum(policy.hedged for policy in policies)
+        wins = sum(policy.hedge_wins for policy in policies)
+        return f"{hedged} hedged ({wins} won) of {calls} calls"
+
+    def summary(self) -> str:
+        with self._lock:
+            banked = self.stats['bank'].accepted if 'bank' in self.stats else 0
+        if banked:
+            return f"{banked} from question bank, " + self._routing_summary()
+        return self._routing_summary()
+
+    def _routing_summary(self) -> str:
+        with self._lock:
+            fast_calls = sum(self.stats[tier.name].calls for tier in self.tiers)
+            fast_accepted = sum(self.stats[tier.name].accepted for tier in self.tiers)
+        if not self.tiers:
+            return "routing off"
+        if self.disabled:
+            return "fast model off (" + ', '.join(self.disabled.values()) + ")"
+        if not fast_calls:
+            return "no routed calls"
+        return (f"{fast_accepted}/{fast_calls} answered by fast model, "
+                f"{(fast_calls - fast_accepted) / fast_calls:.0%} escalated")
+
+def default_tiers() -> List[ModelTier]:
+    """The fast tier named by QUIZ_HELPER_FAST_MODEL ('off' disables routing).
+
+    QUIZ_HELPER_MIN_CONFIDENCE sets the escalation threshold (default 70).
+    """
+    model = os.getenv('QUIZ_HELPER_FAST_MODEL', 'grok-3-mini')
+    if model.lower() in ('', '0', 'off', 'none'):
+        return []
+    return [ModelTier('fast', model, min_confidence=int(os.getenv('QUIZ_HELPER_MIN_CONFIDENCE', '70')))]
@@ -0,0 +1,44 @@
+"""Prompt templates shared by the desktop UIs and the API client"""
+from typing import List
+
+# System prompt used when analyzing scraped web content
+QUIZ_SYSTEM_PROMPT = '''You are a quiz assistant. Analyze web content to:
+                    1. Identify quiz questions
+                    2. Provide accurate answers
+                    3. Give brief explanations
+                    Use available context to ensure accuracy.'''
+
+# System prompt used when answering a single captured or pasted question
+ANSWER_SYSTEM_PROMPT = 'You are a helpful quiz assistant. Provide clear, accurate answers with brief explanations.'
+
+
+def answer_prompt(question_text: str) -> str:
+    """Prompt asking for an ANSWER/EXPLANATION pair for one question"""
+    return f"""Please help me answer this quiz question:
+
+{question_text}
+
+Format your response as:
+ANSWER: [Your answer]
+EXPLANATION: [Brief explanation of why this is correct]"""
+
+
+def question_with_options(question: str, options: List[str]) -> str:
+    """One scraped question followed by its answer options, one per line"""
+    return '\n'.join([question, *options])
+
+
+def url_prompt(url: str, content: str) -> str:
+    """Prompt asking the model to find and answer the question on a page"""
+    return f"""Context: This is from the webpage {url}
+                
+                Content found:
+                {content}
+                
+                Please find the likely quiz question in this content and answer it.
+                
+                Format your response as:
+                QUESTION: [The likely quiz question]
+                ANSWER: [The correct answer]
+                EXPLANATION: [Brief explanation of why this is correct]
+                """
@@ -0,0 +1,366 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, IO, Iterator, List, Optional, Union
+
+from src.api.similarity_index import fingerprint_text
+from src.utils.paths import user_data_dir
+
+# Dropped from indexed and query text: they are in nearly every question and only slow BM25 down
+STOPWORDS = frozenset('''
+a an and are as at be by can do does for from has have how in is it its of on or that the
+their there these this to was were what when where which who whom whose why will with
+would you your following best true false not select choose answer question
+'''.split())
+# Stopwords that flip what is asked ("which is NOT ...", "true or false: ..."); matching
+# checks them separately so such a question never takes the positive question's answer
+POLARITY_WORDS = frozenset('not no never except incorrect true false'.split())
+
+_QUESTION_FIELDS = ('question', 'q', 'prompt', 'text')
+_ANSWER_FIELDS = ('answer', 'correct', 'correct_answer', 'solution')
+_OPTION_FIELDS = ('options', 'choices', 'answers')
+_EXPLANATION_FIELDS = ('explanation', 'rationale')
+_LETTERS = 'abcdefghij'
+_OPTION_LINE = re.compile(r'^\s*\(?([a-j])[).:]\s*(\S.*)$', re.IGNORECASE | re.MULTILINE)
+
+def bank_tokens(text: str) -> List[str]:
+    """Normalized, deduplicated content words of text in order of appearance"""
+    seen = {}
+    for token in fingerprint_text(text).split():
+        if (len(token) > 1 or token.isdigit()) and token not in STOPWORDS:
+            seen.setdefault(token, None)
+    return list(seen)
+
+def polarity_words(text: str) -> set:
+    return POLARITY_WORDS.intersection(fingerprint_text(text).split())
+
+def query_options(text: str) -> Dict[str, str]:
+    """Lettered option lines ("A) ...", "(b) ...", "c. ...") of a query, by lower-case letter"""
+    return {letter.lower(): option.strip() for letter, option in _OPTION_LINE.findall(text)}
+
+def _question_hash(tokens: List[str]) -> int:
+    digest = hashlib.blake2b(' '.join(tokens).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)  # SQLite integers are signed
+
+def _field(row: Dict[str, Any], names) -> Any:
+    for name in names:
+        value = row.get(name)
+        if value not in (None, ''):
+            return value
+    return None
+
+def _options(row: Dict[str, Any]) -> List[str]:
+    options = _field(row, _OPTION_FIELDS)
+    if isinstance(options, str):
+        text = options.strip()
+        if text.startswith('['):
+            options = json.loads(text)
+        else:
+            options = text.split('\n' if '\n' in text else '|')
+    if not options:
+        # CSV banks often use one column per option: a, b, c, ... or option_a, ...
+        options = [_field(row, (letter, f'option_{letter}', f'choice_{letter}'))
+                   for letter in _LETTERS]
+        options = options[:next((i for i, o in enumerate(options) if o is None), len(options))]
+    return [str(option).strip() for option in options if str(option).strip()]
+
+def normalize_row(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Bank entry from a CSV/JSON row with any of the usual column names, or None if unusable"""
+    row = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+    question, answer = _field(row, _QUESTION_FIELDS), _field(row, _ANSWER_FIELDS)
+    if question is None or answer is None:
+        return None
+    explanation = _field(row, _EXPLANATION_FIELDS)
+    return {'question': str(question).strip(), 'options': _options(row),
+            'answer': str(answer).strip(),
+            'explanation': str(explanation).strip() if explanation is not None else None}
+
+def _iter_json_array(f: IO[str], chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Elements of a top-level JSON array, decoded one at a time from a text stream"""
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError("expected a JSON array of question objects")
+    buffer, eof = buffer[1:], False
+    while True:
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except ValueError:
+            if eof:
+                raise
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+        if len(buffer) < chunk_size and not eof:
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+
+def iter_bank_rows(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """Stream the raw rows of a .csv, .json (array) or .jsonl question bank"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if suffix == '.csv':
+            yield from csv.DictReader(f)
+        elif suffix in ('.jsonl', '.ndjson'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        elif suffix == '.json':
+            yield from _iter_json_array(f)
+        else:
+            raise ValueError(f"unsupported question bank format: {path.name}")
+
+class BankMatch:
+    """A stored question judged to be the one asked"""
+
+    def __init__(self, row_id: int, question: str, options: List[str], answer: str,
+                 explanation: Optional[str], score: float, elapsed_ms: float, query: str = ''):
+        self.id = row_id
+        self.question = question
+        self.options = options
+        self.answer = answer
+        self.explanation = explanation
+        self.score = score
+        self.elapsed_ms = elapsed_ms
+        self.query = query
+
+    def answer_option(self) -> Optional[str]:
+        """Text of the correct option, whether the bank stores its letter or its text"""
+        letter = self.answer.strip().rstrip(').').lower()
+        if len(letter) == 1 and letter in _LETTERS[:len(self.options)]:
+            return self.options[_LETTERS.index(letter)]
+        answer = fingerprint_text(self.answer)
+        return next((option for option in self.options if fingerprint_text(option) == answer), None)
+
+    def answer_text(self) -> str:
+        """The answer, as "B) option" with the letter the query gave that option.
+
+        The bank's option order need not be the one on screen, so its
+        letters are never shown; without a matching lettered option in the
+        query the option text stands alone.
+        """
+        option = self.answer_option()
+        if option is None:
+            return self.answer
+        wanted = fingerprint_text(option)
+        for letter, text in query_options(self.query).items():
+            if fingerprint_text(text) == wanted:
+                return f"{letter.upper()}) {text}"
+        return option
+
+    def as_response(self) -> dict:
+        """Shape the match like a completion so callers need no special case"""
+        content = f"ANSWER: {self.answer_text()}\nEXPLANATION: " + \
+            (self.explanation or "From your question bank.")
+        return {'choices': [{'message': {'role': 'assistant', 'content': content}}],
+                'question_bank': {'id': self.id, 'score': round(self.score, 3)}}
+
+class QuestionBank:
+    """Local BM25 index (SQLite FTS5) of imported questions with known answers.
+
+    Questions and options are reduced to their normalized content words;
+    the FTS table is contentless, so that text is stored only as index
+    postings next to the original row, plus a per-word document count.
+    A lookup searches for the rarest query words the index knows, up to
+    `probe_tokens` of them and about `max_postings` matching rows, or for
+    rows with both of the two rarest when those are common words (BM25
+    over common words would score a large part of the bank, and OCR
+    garbage matches nothing). It ranks up to `candidates` rows by BM25 and
+    accepts the best one when its question words are (nearly) all in the
+    query and the query is mostly made of its question and option words,
+    i.e. min(coverage, precision) >= threshold, and it asks the same way
+    round: negations and true/false are compared on their own, since they
+    are too common to index.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, threshold: float = 0.75,
+                 candidates: int = 5, probe_tokens: int = 4, max_postings: int = 2000,
+                 max_query_tokens: int = 32):
+        self.path = Path(path) if path else user_data_dir() / 'question_bank.sqlite3'
+        self.threshold = threshold
+        self.candidates = candidates
+        self.probe_tokens = probe_tokens
+        self.max_postings = max_postings
+        self.max_query_tokens = max_query_tokens
+        self.lookups = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('''CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY,
+            hash INTEGER NOT NULL UNIQUE,
+            question TEXT NOT NULL,
+            options TEXT,
+            answer TEXT NOT NULL,
+            explanation TEXT
+        )''')
+        self._db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts "
+                         "USING fts5(body, content='')")
+        # Kept here rather than read from fts5vocab, which walks a word's whole posting list
+        self._db.execute('''CREATE TABLE IF NOT EXISTS terms (
+            term TEXT PRIMARY KEY,
+            docs INTEGER NOT NULL
+        ) WITHOUT ROWID''')
+        self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM questions').fetchone()[0]
+
+    def import_rows(self, rows, batch_size: int = 5000) -> Dict[str, int]:
+        """Add normalized rows in batches; a question already present gets the new answer.
+
+        Memory stays bounded by batch_size however long the iterable is.
+        """
+        counts = {'added': 0, 'updated': 0, 'skipped': 0}
+        batch = []
+        for row in rows:
+            entry = normalize_row(row) if isinstance(row, dict) else None
+            if entry is None or not bank_tokens(entry['question']):
+                counts['skipped'] += 1
+                continue
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                self._insert(batch, counts)
+                batch = []
+        if batch:
+            self._insert(batch, counts)
+        return counts
+
+    def _insert(self, batch: List[Dict[str, Any]], counts: Dict[str, int]):
+        postings, terms = [], Counter()
+        with self._lock:
+            for entry in batch:
+                question_tokens = bank_tokens(entry['question'])
+                option_tokens = bank_tokens(' '.join(entry['options']))
+                options = json.dumps(entry['options'], ensure_ascii=False) if entry['options'] else None
+                values = (entry['question'], options, entry['answer'], entry['explanation'])
+                key = _question_hash(question_tokens + ['\x1f'] + option_tokens)
+                cursor = self._db.execute(
+                    'INSERT OR IGNORE INTO questions (hash, question, options, answer, explanation) '
+                    'VALUES (?, ?, ?, ?, ?)', (key,) + values)
+                if cursor.rowcount:
+                    body = dict.fromkeys(question_tokens + option_tokens)
+                    postings.append((cursor.lastrowid, ' '.join(body)))
+                    terms.update(body.keys())
+                    counts['added'] += 1
+                else:
+                    self._db.execute('UPDATE questions SET question = ?, options = ?, answer = ?, '
+                                     'explanation = ? WHERE hash = ?', values + (key,))
+                    counts['updated'] += 1
+            self._db.executemany('INSERT INTO questions_fts (rowid, body) VALUES (?, ?)', postings)
+            self._db.executemany('INSERT INTO terms (term, docs) VALUES (?, ?) ON CONFLICT (term) '
+                                 'DO UPDATE SET docs = docs + excluded.docs', terms.items())
+            self._db.commit()
+
+    def import_file(self, path: Union[str, Path], batch_size: int = 5000) -> Dict[str, int]:
+        return self.import_rows(iter_bank_rows(path), batch_size)
+
+    def optimize(self):
+        """Merge the index segments written by imports into one; speeds up lookups"""
+        with self._lock:
+            self._db.execute("INSERT INTO questions_fts (questions_fts) VALUES ('optimize')")
+            self._db.commit()
+
+    def _score(self, query: set, polarity: set, question: str, options: List[str]) -> float:
+        question_polarity = polarity_words(question)
+        # The stored question's negations must be asked too (a missing "true or false:"
+        # prefix is fine), and the query's must be in the stored question or its options
+        if question_polarity - {'true', 'false'} - polarity or \
+                polarity - question_polarity - polarity_words(' '.join(options)):
+            return 0.0
+        question_tokens = set(bank_tokens(question))
+        known = question_tokens | set(bank_tokens(' '.join(options)))
+        coverage = len(question_tokens & query) / len(question_tokens)
+        precision = len(known & query) / len(query)
+        return min(coverage, precision)
+
+    def match(self, text: str) -> Optional[BankMatch]:
+        """The stored question text asks, if one matches confidently"""
+        started = time.perf_counter()
+        tokens = bank_tokens(text)
+        if len(tokens) < 2:
+            return None
+        query, polarity = set(tokens), polarity_words(text)
+        probe = tokens[:self.max_query_tokens]
+
+        with self._lock:
+            self.lookups += 1
+            counts = self._db.execute(
+                f"SELECT term, docs FROM terms WHERE term IN ({','.join('?' * len(probe))})",
+                probe).fetchall()
+            if not counts:
+                return None
+            rarest = sorted(counts, key=lambda count: count[1])[:self.probe_tokens]
+            fit, postings = 0, 0
+            while fit < len(rarest) and postings + rarest[fit][1] <= self.max_postings:
+                postings += rarest[fit][1]
+                fit += 1
+            if fit >= 2 or len(rarest) == 1:
+                expression = ' OR '.join(f'"{term}"' for term, _ in rarest[:max(fit, 1)])
+            else:
+                # Only common words: ranking every row holding one of them takes too long,
+                # so require the two rarest together
+                expression = ' AND '.join(f'"{term}"' for term, _ in rarest[:2])
+            rows = self._db.execute(
+                'SELECT q.id, q.question, q.options, q.answer, q.explanation '
+                'FROM (SELECT rowid, rank FROM questions_fts WHERE questions_fts MATCH ? '
+                '      ORDER BY rank LIMIT ?) AS hit '
+                'JOIN questions q ON q.id = hit.rowid ORDER BY hit.rank',
+                (expression, self.candidates)).fetchall()
+
+            best, best_score = None, 0.0
+            for row_id, question, options, answer, explanation in rows:  # Best BM25 rank first
+                options = json.loads(options) if options else []
+                score = self._score(query, polarity, question, options)
+                if score >= self.threshold and score > best_score:
+                    best, best_score = (row_id, question, options, answer, explanation), score
+            if best is None:
+                return None
+            self.hits += 1
+        return BankMatch(*best, score=best_score,
+                         elapsed_ms=(time.perf_counter() - started) * 1000, query=text)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'lookups': self.lookups, 'hits': self.hits}
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return f"question bank {stats['hits']}/{stats['lookups']} hits"
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+_shared_bank: Optional[QuestionBank] = None
+_shared_lock = threading.Lock()
+
+def get_question_bank() -> Optional[QuestionBank]:
+    """The process-wide question bank; QUIZ_HELPER_QUESTION_BANK is a path or 'off'"""
+    global _shared_bank
+    setting = os.getenv('QUIZ_HELPER_QUESTION_BANK', '')
+    if setting.lower() in ('0', 'off', 'none'):
+        return None
+    with _shared_lock:
+        if _shared_bank is None:
+            _shared_bank = QuestionBank(setting or None)
+        return _shared_bank
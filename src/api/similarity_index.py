@@ -0,0 +1,169 @@
+import hashlib
+import random
+import re
+import sqlite3
+import struct
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from src.utils.paths import user_data_dir
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+_NON_WORD = re.compile(r'[\W_]+')
+
+# Fixed seed: signatures are persisted, so the hash family must never change between runs
+_rng = random.Random(0x51A1)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                 for _ in range(NUM_PERMUTATIONS)]
+
+def fingerprint_text(text: str) -> str:
+    """Normalize OCR/scraped text: case, punctuation and line breaks are dropped"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    return _NON_WORD.sub(' ', text).strip()
+
+def shingles(text: str, size: int = 4) -> set:
+    text = fingerprint_text(text)
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+def minhash(text: str, shingle_size: int = 4) -> List[int]:
+    """MinHash signature of the character shingles of the normalized text"""
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little')
+              for s in shingles(text, shingle_size)]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+def estimated_similarity(a: List[int], b: List[int]) -> float:
+    """Fraction of matching minhashes, an estimate of the shingle Jaccard index"""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+def _band_keys(signature: List[int], namespace: str = '') -> List[int]:
+    """LSH band keys; a namespace salts them so other namespaces' entries never collide"""
+    salt = namespace.encode('utf-8') + b'\0' if namespace else b''
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(salt + struct.pack(f'<{ROWS_PER_BAND}Q', *rows),
+                                 digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))  # SQLite integers are signed
+    return keys
+
+class SimilarityIndex:
+    """Persistent near-duplicate index mapping question fingerprints to cache keys.
+
+    Signatures are split into 16 bands of 4 minhashes (LSH). Two questions
+    become candidates only when a whole band matches, which is likely for
+    near-identical text and practically impossible otherwise, so a lookup
+    costs 16 indexed probes however large the history gets. Candidates
+    are then checked against the tunable Jaccard threshold.
+
+    Entries added under a namespace (e.g. one model and system prompt)
+    are only found by lookups in the same namespace.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, threshold: float = 0.8,
+                 shingle_size: int = 4, min_length: int = 20):
+        self.path = Path(path) if path else user_data_dir() / 'similarity.sqlite3'
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.min_length = min_length  # Short texts have too few shingles to compare reliably
+        self.lookups = 0
+        self.near_hits = 0
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('''CREATE TABLE IF NOT EXISTS signatures (
+            key TEXT PRIMARY KEY,
+            signature BLOB NOT NULL
+        )''')
+        self._db.execute('''CREATE TABLE IF NOT EXISTS bands (
+            band_key INTEGER NOT NULL,
+            key TEXT NOT NULL
+        )''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band_key)')
+        self._db.commit()
+
+    def _signature(self, text: str) -> Optional[List[int]]:
+        if len(fingerprint_text(text)) < self.min_length:
+            return None
+        return minhash(text, self.shingle_size)
+
+    def add(self, text: str, key: str, namespace: str = ''):
+        signature = self._signature(text)
+        if signature is None:
+            return
+        with self._lock:
+            self._db.execute('DELETE FROM bands WHERE key = ?', (key,))
+            self._db.execute('INSERT OR REPLACE INTO signatures (key, signature) VALUES (?, ?)',
+                             (key, struct.pack(f'<{NUM_PERMUTATIONS}Q', *signature)))
+            self._db.executemany('INSERT INTO bands (band_key, key) VALUES (?, ?)',
+                                 [(band_key, key) for band_key in _band_keys(signature, namespace)])
+            self._db.commit()
+
+    def candidates(self, text: str, namespace: str = '') -> List[str]:
+        """Keys of the questions stored in namespace at or above threshold, most similar first"""
+        signature = self._signature(text)
+        if signature is None:
+            return []
+        band_keys = _band_keys(signature, namespace)
+        placeholders = ','.join('?' * len(band_keys))
+
+        with self._lock:
+            self.lookups += 1
+            rows = self._db.execute(
+                f'SELECT DISTINCT s.key, s.signature FROM bands b '
+                f'JOIN signatures s ON s.key = b.key WHERE b.band_key IN ({placeholders})',
+                band_keys).fetchall()
+
+        scored = [(estimated_similarity(signature, struct.unpack(f'<{NUM_PERMUTATIONS}Q', blob)), key)
+                  for key, blob in rows]
+        return [key for score, key in sorted(scored, reverse=True) if score >= self.threshold]
+
+    def lookup(self, text: str, namespace: str = '') -> Optional[str]:
+        """Key of the most similar question stored in namespace at or above threshold, if any"""
+        keys = self.candidates(text, namespace)
+        if keys:
+            self.record_near_hit()
+        return keys[0] if keys else None
+
+    def record_near_hit(self):
+        """Count a candidate that was actually used (callers of candidates())"""
+        with self._lock:
+            self.near_hits += 1
+
+    def remove(self, key: str):
+        self.remove_keys([key])
+
+    def remove_keys(self, keys: List[str]):
+        """Forget keys, e.g. the ones an AnswerCache just evicted"""
+        rows = [(key,) for key in keys]
+        with self._lock:
+            self._db.executemany('DELETE FROM bands WHERE key = ?', rows)
+            self._db.executemany('DELETE FROM signatures WHERE key = ?', rows)
+            self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'lookups': self.lookups, 'near_hits': self.near_hits}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+_shared_index: Optional[SimilarityIndex] = None
+_shared_lock = threading.Lock()
+
+def get_similarity_index() -> SimilarityIndex:
+    """Return the process-wide similarity index, opening it on first use"""
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = SimilarityIndex()
+        return _shared_index
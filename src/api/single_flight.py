@@ -0,0 +1,111 @@
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+class Flight:
+    """One in-flight call that any number of identical callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        """The leader's result, or None if it gave up or took longer than timeout.
+
+        Re-raises the leader's exception so duplicates fail the same way.
+        """
+        if not self.done.wait(timeout):
+            return None
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one.
+
+    The first caller for a key (the leader) runs the call; callers that
+    arrive while it is in flight wait for and share its result instead
+    of sending the same request again. Nothing is kept once the call
+    finishes; repeated questions after that are the answer cache's job.
+    """
+
+    def __init__(self, timeout: Optional[float] = 60.0):
+        self.timeout = timeout  # Longest a duplicate waits before calling on its own
+        self._flights: Dict[str, Flight] = {}
+        self._lock = threading.Lock()
+        self.calls = 0  # Calls actually made by leaders
+        self.coalesced = 0  # Duplicate calls answered from a leader's result
+        self.fallbacks = 0  # Duplicates whose leader gave up, so they called themselves
+
+    def acquire(self, key: str) -> Tuple[Flight, bool]:
+        """The flight for key and whether the caller leads it (and must release it)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = Flight()
+            self.calls += 1
+            return flight, True
+
+    def release(self, key: str, flight: Flight, result: Any = None,
+                error: Optional[BaseException] = None):
+        """Publish the leader's outcome; result None means waiters call on their own"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result = result
+        flight.error = error
+        flight.done.set()
+
+    def follow(self, flight: Flight) -> Any:
+        """Wait for a flight led by someone else; None when the caller must call itself"""
+        with self._lock:
+            flight.waiters += 1
+        try:
+            result = flight.wait(self.timeout)
+        except BaseException:
+            with self._lock:
+                self.coalesced += 1  # Shared the leader's failure; still one call fewer
+            raise
+        with self._lock:
+            if result is None:
+                self.fallbacks += 1
+            else:
+                self.coalesced += 1
+        return result
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn once per concurrent key; returns (result, shared with a leader)"""
+        flight, leader = self.acquire(key)
+        if not leader:
+            result = self.follow(flight)
+            if result is not None:
+                return result, True
+            return fn(), False
+        try:
+            result = fn()
+        except BaseException as e:
+            self.release(key, flight, error=e)
+            raise
+        self.release(key, flight, result)
+        return result, False
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'calls': self.calls, 'coalesced': self.coalesced,
+                    'fallbacks': self.fallbacks, 'in_flight': len(self._flights)}
+
+    def summary(self) -> str:
+        return f"{self.coalesced} duplicate calls saved"
+
+_shared_flights: Optional[SingleFlight] = None
+_shared_lock = threading.Lock()
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide single-flight group shared by every client"""
+    global _shared_flights
+    with _shared_lock:
+        if _shared_flights is None:
+            _shared_flights = SingleFlight()
+        return _shared_flights
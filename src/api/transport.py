@@ -0,0 +1,169 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class _RetryPolicy(Retry):
+    """Retry that resends POST only when the server surely has not acted on it.
+
+    Idempotent methods are retried on any listed failure. A POST is retried
+    after a connection error or a listed status carrying Retry-After, but
+    never after a read timeout: the completion may already be running (and
+    billed), so resending it would run it twice.
+    """
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if not self._is_method_retryable(method):
+            return bool(self.total and has_retry_after and self.respect_retry_after_header
+                        and status_code in (self.status_forcelist or ()))
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class _PoolCounters:
+    """Thread-safe counters shared by every connection pool of a transport"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.new_connections = 0
+
+    def checkout(self):
+        with self._lock:
+            self.checkouts += 1
+
+    def connection_opened(self):
+        with self._lock:
+            self.new_connections += 1
+
+
+def _counting_pool(base):
+    """Build a urllib3 pool class that reports checkouts and new connections"""
+
+    class CountingPool(base):
+        counters: Optional[_PoolCounters] = None
+
+        def _get_conn(self, timeout=None):
+            if self.counters:
+                self.counters.checkout()
+            return super()._get_conn(timeout=timeout)
+
+        def _new_conn(self):
+            if self.counters:
+                self.counters.connection_opened()
+            return super()._new_conn()
+
+    CountingPool.__name__ = f"Counting{base.__name__}"
+    return CountingPool
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools feed a shared _PoolCounters instance"""
+
+    def __init__(self, counters: _PoolCounters, **kwargs):
+        self.counters = counters
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        pool_classes = {}
+        for scheme, base in (('http', HTTPConnectionPool), ('https', HTTPSConnectionPool)):
+            pool_class = _counting_pool(base)
+            pool_class.counters = self.counters
+            pool_classes[scheme] = pool_class
+        self.poolmanager.pool_classes_by_scheme = pool_classes
+
+
+class HttpTransport:
+    """Pooled keep-alive HTTP session shared by every outgoing request.
+
+    Reusing one session means the TCP and TLS handshakes with the API host
+    happen once per pooled connection instead of once per question.
+    """
+
+    def __init__(self, pool_size: int = 10, max_retries: int = 3,
+                 backoff_factor: float = 0.5, connect_timeout: float = 5.0,
+                 read_timeout: float = 30.0):
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self._counters = _PoolCounters()
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+
+        retry = _RetryPolicy(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,  # POST: see _RetryPolicy
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = _CountingAdapter(
+            self._counters,
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry
+        )
+
+        self.session = requests.Session()
+        self.session.headers.update({'Connection': 'keep-alive'})
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the pooled session with default timeouts"""
+        kwargs.setdefault('timeout', self.timeout)
+        response = self.session.request(method, url, **kwargs)
+
+        retries = getattr(response.raw, 'retries', None)
+        with self._stats_lock:
+            self._requests += 1
+            if retries is not None:
+                self._retries += len(retries.history)
+        return response
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def stats(self) -> Dict[str, int]:
+        """Return request, connection and reuse counts for this transport"""
+        with self._stats_lock:
+            requests_sent = self._requests
+            retries = self._retries
+        checkouts = self._counters.checkouts
+        new_connections = self._counters.new_connections
+        return {
+            'requests': requests_sent,
+            'retries': retries,
+            'pool_checkouts': checkouts,
+            'new_connections': new_connections,
+            'reused_connections': max(checkouts - new_connections, 0)
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_shared_transport: Optional[HttpTransport] = None
+_shared_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """Return the process-wide transport, creating it on first use"""
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = HttpTransport()
+        return _shared_transport
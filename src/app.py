@@ -1,23 +1,35 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-import pyautogui
-import pytesseract
-from PIL import Image, ImageTk
-import threading
 import requests
-import json
 import os
-from datetime import datetime
-import pynput
-from pynput import mouse, keyboard
 import time
 from dotenv import load_dotenv
-
-# Load environment variables from .env.local
-load_dotenv('.env.local')
+from src.api.answer_cache import get_answer_cache
+from src.api.daemon_client import connect_daemon
+from src.api.grok_client import GrokClient
+from src.api.model_router import ModelRouter
+from src.api.similarity_index import get_similarity_index
+from src.api.prompts import ANSWER_SYSTEM_PROMPT, answer_prompt
+from src.api.question_bank import get_question_bank
+from src.api.transport import get_transport
+from src.ui.speculation import Speculator
+from src.ui.stream_view import StreamingTextView
+from src.ui.stall_monitor import UiStallMonitor
+from src.ui.stats_panel import StageStatsPanel
+from src.utils.capture_pipeline import CapturePipeline, CaptureResult
+from src.utils.ocr import get_ocr_engine
+from src.utils.region_watch import RegionWatcher
+from src.utils.task_scheduler import INTERACTIVE, TaskCancelled, current_task, get_scheduler
+from src.utils.tracing import get_tracer
 
 class QuizHelperApp:
-    def __init__(self):
+    # Keys of the work this app queues on the shared scheduler
+    TASK_KEYS = ('app-analysis', 'app-screenshot')
+
+    def __init__(self, owns_scheduler: bool = True):
+        # Load environment variables from .env.local
+        load_dotenv('.env.local')
+        
         self.root = tk.Tk()
         self.root.title("Quiz Helper - Screenshot & Text Analysis")
         self.root.geometry("800x600")
@@ -27,15 +39,47 @@ class QuizHelperApp:
         self.start_pos = None
         self.end_pos = None
         self.overlay_window = None
-        self.threads = []  # Keep track of created threads
+        self.scheduler = get_scheduler()  # Shared bounded worker pool
+        self.owns_scheduler = owns_scheduler  # False when embedded in a window that shuts it down
         
         # Load API key from .env.local
         self.api_key = os.getenv('GROK_API')
-        self.api_url = "https://api.x.ai/v1/chat/completions"
+        self.transport = get_transport()  # Shared keep-alive connection pool
+        self.answer_cache = get_answer_cache()  # Persistent answers for repeated questions
+        self.grok_client = GrokClient(self.api_key, transport=self.transport,
+                                      system_prompt=ANSWER_SYSTEM_PROMPT, cache=self.answer_cache,
+                                      similarity_index=get_similarity_index())
+        # Tries a fast model first; escalates to grok_client's model when unsure
+        self.router = ModelRouter(self.grok_client, question_bank=get_question_bank())
+        self.stream_responses = True  # Show the answer token by token as it arrives
+        # Shared analysis daemon (QUIZ_HELPER_DAEMON): when one runs, OCR and analysis go
+        # to its warm engines and caches instead of this process
+        self.daemon = connect_daemon('app')
+        self.ocr_engine = self.daemon or get_ocr_engine()  # Warm tesseract handle reused across captures
+        self.save_screenshots = True  # Write each capture to a PNG in the background
+        self.region_watcher = None
+        self.watch_fps = 2.0  # Frames grabbed per second in watch mode
+        self.watch_threshold = 0.0001  # Fraction of changed samples that triggers OCR
+        self._watch_selection = False  # Next selected region starts watch mode
+        self._watch_text = None
+        
+        # Optionally answers the question in the background while it is typed or pasted
+        self.speculator = Speculator(self.root, self._speculate,
+                                     ready=lambda text: bool(self.api_key or self.daemon)
+                                     and len(text) >= 20)
         
         self.create_widgets()
         self.setup_hotkeys()
         
+        # Grab/OCR run on worker threads; results come back through root.after
+        self.capture_pipeline = CapturePipeline(
+            dispatch=lambda fn, *args: self.root.after(0, fn, *args),
+            ocr_engine=self.ocr_engine, executor=self.scheduler)
+        self.stall_monitor = UiStallMonitor(self.root)
+        self.stall_monitor.start()
+        
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
     def create_widgets(self):
         # Main frame
         main_frame = ttk.Frame(self.root, padding="10")
@@ -62,6 +106,10 @@ class QuizHelperApp:
                                        command=self.start_screenshot)
         self.screenshot_btn.pack(side=tk.LEFT, padx=5)
         
+        self.watch_btn = ttk.Button(button_frame, text="Watch Region",
+                                    command=self.toggle_watch)
+        self.watch_btn.pack(side=tk.LEFT, padx=5)
+        
         self.paste_btn = ttk.Button(button_frame, text="Paste Text (Ctrl+V)", 
                                   command=self.paste_text)
         self.paste_btn.pack(side=tk.LEFT, padx=5)
@@ -70,12 +118,24 @@ class QuizHelperApp:
                                   command=self.clear_all)
         self.clear_btn.pack(side=tk.LEFT, padx=5)
         
+        self.stats_btn = ttk.Button(button_frame, text="Stats",
+                                    command=lambda: StageStatsPanel(self.root))
+        self.stats_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.speculate_var = tk.BooleanVar(value=self.speculator.enabled)
+        self.speculate_check = ttk.Checkbutton(
+            button_frame, text="Analyze while typing", variable=self.speculate_var,
+            command=lambda: self.speculator.set_enabled(self.speculate_var.get()))
+        self.speculate_check.pack(side=tk.LEFT, padx=5)
+        
         # Input text area
         input_frame = ttk.LabelFrame(main_frame, text="Question Text", padding="10")
         input_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
         
         self.input_text = scrolledtext.ScrolledText(input_frame, height=8, wrap=tk.WORD)
         self.input_text.pack(fill=tk.BOTH, expand=True)
+        # Typing, pasting and OCR results all set the modified flag
+        self.input_text.bind('<<Modified>>', self._on_input_modified)
         
         # Analyze button
         self.analyze_btn = ttk.Button(main_frame, text="Analyze Question", 
@@ -88,6 +148,7 @@ class QuizHelperApp:
         
         self.output_text = scrolledtext.ScrolledText(output_frame, height=12, wrap=tk.WORD)
         self.output_text.pack(fill=tk.BOTH, expand=True)
+        self.output_stream = StreamingTextView(self.root, self.output_text)
         
         # Configure grid weights
         self.root.columnconfigure(0, weight=1)
@@ -105,24 +166,32 @@ class QuizHelperApp:
     def setup_hotkeys(self):
         """Setup global hotkeys"""
         try:
+            from pynput import keyboard  # Imported here so headless imports stay light
+            
             # F1 for screenshot
             keyboard.add_hotkey('f1', self.start_screenshot)
             self.status_var.set("Hotkeys active - F1 for screenshot")
         except:
             self.status_var.set("Hotkeys unavailable - use buttons instead")
     
+    def _on_input_modified(self, event=None):
+        if not self.input_text.edit_modified():
+            return  # The event fired again for the flag being cleared
+        self.input_text.edit_modified(False)
+        self.speculator.changed(self.input_text.get(1.0, tk.END))
+    
     def update_api_key(self, event=None):
         """Update API key from entry field"""
         self.api_key = self.api_key_entry.get()
+        self.grok_client.api_key = self.api_key
     
     def start_screenshot(self):
         """Start screenshot selection mode"""
         self.status_var.set("Click and drag to select area...")
         self.root.withdraw()  # Hide main window
-        time.sleep(0.5)  # Give time for window to hide
         
-        # Create transparent overlay
-        self.create_overlay()
+        # Create transparent overlay once the window had time to hide
+        self.root.after(500, self.create_overlay)
         
     def create_overlay(self):
         """Create transparent overlay for screenshot selection"""
@@ -167,47 +236,103 @@ class QuizHelperApp:
     
     def cancel_screenshot(self, event=None):
         """Cancel screenshot mode"""
+        self._watch_selection = False
         if self.overlay_window:
             self.overlay_window.destroy()
         self.root.deiconify()
         self.status_var.set("Screenshot cancelled")
     
     def take_screenshot(self):
-        """Take screenshot of selected area and extract text"""
-        try:
-            # Close overlay
-            if self.overlay_window:
-                self.overlay_window.destroy()
-            
-            # Calculate screenshot area
-            x1 = min(self.start_pos[0], self.end_pos[0])
-            y1 = min(self.start_pos[1], self.end_pos[1])
-            x2 = max(self.start_pos[0], self.end_pos[0])
-            y2 = max(self.start_pos[1], self.end_pos[1])
-            
-            # Take screenshot
-            screenshot = pyautogui.screenshot(region=(x1, y1, x2-x1, y2-y1))
-            
-            # Save screenshot
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            screenshot_path = f"screenshot_{timestamp}.png"
-            screenshot.save(screenshot_path)
-            
-            # Extract text using OCR
-            self.status_var.set("Extracting text from screenshot...")
-            extracted_text = pytesseract.image_to_string(screenshot)
-            
-            # Display extracted text
-            self.input_text.delete(1.0, tk.END)
-            self.input_text.insert(1.0, extracted_text.strip())
-            
-            self.status_var.set(f"Screenshot saved as {screenshot_path} - Text extracted")
-            
-        except Exception as e:
-            messagebox.showerror("Screenshot Error", f"Error taking screenshot: {str(e)}")
-            self.status_var.set("Screenshot failed")
-        finally:
+        """Capture the selected area and extract its text in the background"""
+        # Close overlay and let Tk repaint before the region is grabbed
+        if self.overlay_window:
+            self.overlay_window.destroy()
+            self.root.update_idletasks()
+        
+        # Calculate screenshot area
+        x1 = min(self.start_pos[0], self.end_pos[0])
+        y1 = min(self.start_pos[1], self.end_pos[1])
+        x2 = max(self.start_pos[0], self.end_pos[0])
+        y2 = max(self.start_pos[1], self.end_pos[1])
+        
+        if self._watch_selection:
+            self._watch_selection = False
             self.root.deiconify()
+            self.start_watch((x1, y1, x2, y2))
+            return
+        
+        self.stall_monitor.reset()
+        self.status_var.set("Capturing screenshot...")
+        self.capture_pipeline.save_png = self.save_screenshots
+        self.capture_pipeline.submit((x1, y1, x2, y2),
+                                     on_text=self._on_capture_text,
+                                     on_error=self._on_capture_error,
+                                     on_grabbed=self._on_capture_grabbed)
+    
+    def _on_capture_grabbed(self, result):
+        """Region grabbed - the main window can come back while OCR runs"""
+        self.root.deiconify()
+        self.status_var.set("Extracting text from screenshot...")
+    
+    def _on_capture_text(self, result):
+        """Display extracted text"""
+        self.input_text.delete(1.0, tk.END)
+        self.input_text.insert(1.0, result.text)
+        
+        saved = f"Screenshot saved as {result.path}" if result.path else "Screenshot captured"
+        self.status_var.set(f"{saved} - Text extracted (grab {result.timings['grab']:.0f} ms, "
+                            f"preprocess {result.timings['preprocess']:.0f} ms, "
+                            f"OCR {result.timings['ocr']:.0f} ms"
+                            f"{' cached' if result.ocr_cached else ''}, "
+                            f"{self.capture_pipeline.ocr_cache.summary()}, "
+                            f"UI stall {self.stall_monitor.max_stall_ms:.0f} ms)")
+    
+    def _on_capture_error(self, error):
+        self.root.deiconify()
+        messagebox.showerror("Screenshot Error", f"Error taking screenshot: {str(error)}")
+        self.status_var.set("Screenshot failed")
+    
+    def toggle_watch(self):
+        """Start watching a newly selected region, or stop the current watch"""
+        if self.region_watcher and self.region_watcher.running:
+            self.region_watcher.stop()
+            self.watch_btn.config(text="Watch Region")
+            self.status_var.set(f"Watch stopped - {self.region_watcher.stats.summary()}")
+            return
+        self._watch_selection = True
+        self.start_screenshot()
+    
+    def start_watch(self, bbox):
+        """Re-capture bbox continuously; OCR and analysis run only when it changes"""
+        self._watch_text = None
+        self.region_watcher = RegionWatcher(
+            bbox, self._on_watch_frame, screenshot_tool=self.capture_pipeline.screenshot_tool,
+            fps=self.watch_fps, threshold=self.watch_threshold,
+            on_error=lambda e: self.root.after(0, self._on_watch_error, e))
+        self.region_watcher.start()
+        self.watch_btn.config(text="Stop Watching")
+        self.status_var.set(f"Watching region at {self.watch_fps:g} fps...")
+    
+    def _on_watch_frame(self, image):
+        """Changed frame (watcher thread): OCR it and analyze only new text"""
+        result = self.capture_pipeline.recognize(image, CaptureResult(self.region_watcher.bbox))
+        if result.text and result.text != self._watch_text:
+            self._watch_text = result.text
+            self.root.after(0, self._on_watch_text, result)
+    
+    def _on_watch_text(self, result):
+        self.input_text.delete(1.0, tk.END)
+        self.input_text.insert(1.0, result.text)
+        self.status_var.set(f"New question detected (OCR {result.timings['ocr']:.0f} ms, "
+                            f"{self.region_watcher.stats.summary()})")
+        if self.api_key:
+            self.analyze_question()
+    
+    def _on_watch_error(self, error):
+        """Stop watching on the first failure instead of repeating it every frame"""
+        if self.region_watcher and self.region_watcher.running:
+            self.toggle_watch()
+        messagebox.showerror("Watch Error", f"Error watching region: {str(error)}")
     
     def paste_text(self):
         """Paste text from clipboard"""
@@ -233,76 +358,158 @@ class QuizHelperApp:
             messagebox.showwarning("No Question", "Please enter or capture a question first")
             return
         
-        if not self.api_key:
+        if not self.api_key and not self.daemon:
             messagebox.showwarning("No API Key", "Please enter your Grok API key")
             return
         
         # Show loading
         self.status_var.set("Analyzing question...")
         self.analyze_btn.config(state='disabled')
+        self.output_stream.reset()
         
-        # Run analysis in separate thread to avoid blocking UI
-        thread = threading.Thread(target=self.call_grok_api, args=(question_text,))
-        thread.daemon = True
-        thread.start()
-        
-        # Add a cleanup handler when the window closes
-        self.root.protocol("WM_DELETE_WINDOW", lambda: self.on_closing(thread))
+        # Run analysis on the shared pool; a newer analysis supersedes this one
+        speculation = self.speculator.claim(question_text)
+        self.scheduler.submit(self.call_grok_api, question_text, speculation,
+                              priority=INTERACTIVE, key='app-analysis')
 
-    def on_closing(self, thread):
+    def on_closing(self):
         """Handle window closing event"""
-        if thread and thread.is_alive():
-            thread.join(timeout=1.0)  # Wait up to 1 second for thread to finish
+        self.stall_monitor.stop()
+        self.speculator.set_enabled(False)
+        if self.region_watcher:
+            self.region_watcher.stop()
+        self.capture_pipeline.shutdown(wait=False)
+        self._stop_tasks()
+        self._dump_profile()
         self.root.destroy()
     
-    def call_grok_api(self, question_text):
+    def _dump_profile(self):
+        """Save the cProfile data of QUIZ_HELPER_PROFILE's stage, if one was profiled"""
+        tracer = get_tracer()
+        if tracer.profile_stage:
+            tracer.dump_profile(f"quiz_helper_{tracer.profile_stage}.prof")
+        tracer.close()
+    
+    def call_grok_api(self, question_text, speculation=None):
         """Call Grok API to analyze the question"""
+        with get_tracer().span('analysis', chars=len(question_text), speculated=bool(speculation)):
+            if speculation and self._use_speculation(speculation):
+                return
+            self._call_grok_api(question_text)
+    
+    def _speculate(self, question_text):
+        """Answer the question ahead of a click (scheduler thread); None when cut short"""
+        if self.daemon:
+            try:
+                record = self.daemon.analyze_text(question_text, on_delta=self._check_cancelled)
+            except TaskCancelled:
+                return None
+            if 'error' in record:
+                raise RuntimeError(record['error'])
+            return {'choices': [{'message': {'content': record['answer']}}]}
+        stream = self.router.stream_question(answer_prompt(question_text), question=question_text)
+        task = current_task()
+        for _ in stream:
+            if task and task.cancelled:
+                return None  # The question changed; closing the stream drops the request
+        if stream.response is not None and not stream.finished:
+            return None
+        return stream.as_response()
+    
+    def _use_speculation(self, speculation):
+        """Show the answer prepared while the question was entered, if there is one"""
+        result = self.speculator.collect(speculation)
+        if result is None:
+            return False
+        answer = result['choices'][0]['message']['content']
+        status = (f"Answer prepared while typing - {speculation.saved_ms:.0f} ms saved "
+                  f"({self.speculator.summary()})")
+        if self.stream_responses:
+            self.output_stream.push(answer)
+            self.output_stream.finish(lambda: self._finish_output(status))
+        else:
+            self.display_answer(answer, status)
+        return True
+    
+    @staticmethod
+    def _check_cancelled(delta=None):
+        """on_delta for daemon calls: stops reading once the task has been superseded"""
+        task = current_task()
+        if task and task.cancelled:
+            raise TaskCancelled()
+    
+    def _call_daemon(self, question_text):
+        """Analyze on the shared daemon, streaming its answer when streaming is on"""
+        def on_delta(delta):
+            self._check_cancelled()
+            self.output_stream.push(delta)
+        
         try:
-            headers = {
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {self.api_key}'
-            }
-            
-            data = {
-                'messages': [
-                    {
-                        'role': 'system',
-                        'content': 'You are a helpful quiz assistant. Provide clear, accurate answers with brief explanations.'
-                    },
-                    {
-                        'role': 'user',
-                        'content': f"""Please help me answer this quiz question:
-
-{question_text}
-
-Format your response as:
-ANSWER: [Your answer]
-EXPLANATION: [Brief explanation of why this is correct]"""
-                    }
-                ],
-                'model': 'grok-3-latest',
-                'stream': False,
-                'temperature': 0.7
-            }
-            
-            response = requests.post(self.api_url, headers=headers, json=data, timeout=30)
+            record = self.daemon.analyze_text(question_text,
+                                              on_delta=on_delta if self.stream_responses else None)
+        except TaskCancelled:
+            return  # Superseded by a newer analysis
+        if 'error' in record:
+            self.display_error(record['error'])
+            return
+        source = ("Answer from question bank" if 'question_bank' in record or record.get('banked') else
+                  "Answer from cache" if record.get('cached') else "Analysis complete")
+        status = (f"{source} - total {record['elapsed_ms']:.0f} ms, queue wait "
+                  f"{record['daemon']['queue_wait_ms']:.0f} ms ({self.daemon.summary()})")
+        if self.stream_responses:
+            self.output_stream.finish(lambda: self._finish_output(status))
+        else:
+            self.display_answer(record['answer'], status)
+    
+    def _call_grok_api(self, question_text):
+        try:
+            if self.daemon:
+                self._call_daemon(question_text)
+                return
+            prompt = answer_prompt(question_text)
+            started = time.perf_counter()
             
-            if response.status_code == 200:
-                result = response.json()
-                answer = result['choices'][0]['message']['content']
-                self.display_answer(answer)
+            if self.stream_responses:
+                # Render tokens as they arrive instead of waiting for the full answer
+                stream = self.router.stream_question(prompt, question=question_text)
+                task = current_task()
+                for delta in stream:
+                    if task and task.cancelled:
+                        return  # Superseded by a newer analysis
+                    self.output_stream.push(delta)
+                timing = f"first token {stream.ttft * 1000:.0f} ms, " if stream.ttft is not None else ""
+                timing += f"total {stream.total_time * 1000:.0f} ms"
+                source = ("Answer from question bank" if stream.banked else
+                          "Answer from cache" if stream.cached else
+                          "Shared with identical request" if stream.coalesced else "Analysis complete")
+                status = f"{source} - {timing}{self._stats_summary()}"
+                self.output_stream.finish(lambda: self._finish_output(status))
             else:
-                error_msg = f"API Error {response.status_code}: {response.text}"
-                self.display_error(error_msg)
+                result = self.router.analyze_question(prompt, question=question_text)
+                answer = result['choices'][0]['message']['content']
+                elapsed = (time.perf_counter() - started) * 1000
+                self.display_answer(answer, f"Analysis complete - total {elapsed:.0f} ms{self._stats_summary()}")
                 
+        except requests.exceptions.HTTPError as e:
+            response = e.response
+            self.display_error(f"API Error {response.status_code}: {response.text}")
         except requests.exceptions.RequestException as e:
             self.display_error(f"Network error: {str(e)}")
         except Exception as e:
             self.display_error(f"Error: {str(e)}")
     
-    def display_answer(self, answer):
+    def _stats_summary(self):
+        """Connection reuse and cache figures for the status bar"""
+        pool = self.transport.stats()
+        near = self.grok_client.similarity_index.stats()
+        return (f" ({pool['reused_connections']}/{pool['pool_checkouts']} connections reused, "
+                f"{self.answer_cache.summary()}, {near['near_hits']} near-duplicates, "
+                f"{self.grok_client.single_flight.summary()}, {self.router.summary()}, "
+                f"{self.router.hedge_summary()}, {self.scheduler.summary()})")
+    
+    def display_answer(self, answer, status="Analysis complete"):
         """Display the answer in the output area"""
-        self.root.after(0, lambda: self._update_output(answer, "Analysis complete"))
+        self.root.after(0, lambda: self._update_output(answer, status))
     
     def display_error(self, error_msg):
         """Display error message"""
@@ -310,30 +517,35 @@ EXPLANATION: [Brief explanation of why this is correct]"""
     
     def _update_output(self, text, status):
         """Update output text and status (must be called from main thread)"""
-        self.output_text.delete(1.0, tk.END)
-        self.output_text.insert(1.0, text)
+        with get_tracer().span('ui_update', chars=len(text)):
+            self.output_text.delete(1.0, tk.END)
+            self.output_text.insert(1.0, text)
+            self._finish_output(status)
+    
+    def _finish_output(self, status):
+        """Restore controls once an analysis has finished (main thread)"""
         self.status_var.set(status)
         self.analyze_btn.config(state='normal')
     
     def process_screenshot(self):
-        thread = threading.Thread(target=self._process_screenshot_thread)
-        self.threads.append(thread)
-        thread.start()
+        return self.scheduler.submit(self._process_screenshot_thread, key='app-screenshot')
+    
+    def _stop_tasks(self):
+        """Stop the scheduler if this app owns it, otherwise cancel only this app's tasks"""
+        if self.owns_scheduler:
+            self.scheduler.shutdown(deadline=1.0)  # Give running work up to 1 second
+        else:
+            for key in self.TASK_KEYS:
+                self.scheduler.cancel(key)
     
     def cleanup(self):
-        # Join all running threads before closing
-        for thread in self.threads:
-            thread.join()
+        # Cancel queued work and wait briefly for running tasks before closing
+        self._stop_tasks()
         # ...existing code...
     
     def _process_screenshot_thread(self):
-        try:
-            # ...existing screenshot processing code...
-            pass
-        finally:
-            # Remove thread from tracking list when done
-            if threading.current_thread() in self.threads:
-                self.threads.remove(threading.current_thread())
+        # ...existing screenshot processing code...
+        pass
     
     def run(self):
         """Start the application"""
@@ -0,0 +1,252 @@
+"""Headless command line entry point; no display required.
+
+Examples:
+    python -m src text "What is the capital of France?"
+    python -m src text --file questions.txt      # questions separated by blank lines
+    cat urls.txt | python -m src url -
+    python -m src image capture1.png capture2.png > answers.jsonl
+    python -m src crawl --sitemap https://example.com/sitemap.xml --analyze
+    python -m src import-bank biology.csv exams.jsonl
+    python -m src serve --port 8787              # shared daemon for the Tk windows
+
+Each result is written to stdout as one JSON object per line, in
+completion order; the 'index' field gives the position in the input.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List
+
+def _read_source(path: str) -> str:
+    if path == '-':
+        return sys.stdin.read()
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+def _paragraphs(text: str) -> List[str]:
+    """Split on blank lines so a question keeps its multi-line options"""
+    blocks, current = [], []
+    for line in text.splitlines():
+        if line.strip():
+            current.append(line.rstrip())
+        elif current:
+            blocks.append('\n'.join(current))
+            current = []
+    if current:
+        blocks.append('\n'.join(current))
+    return blocks
+
+def _lines(text: str) -> List[str]:
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+def collect_inputs(args) -> Iterator[str]:
+    split = _paragraphs if args.mode == 'text' else _lines
+    for value in args.inputs:
+        if value == '-':
+            yield from split(_read_source('-'))
+        else:
+            yield value
+    for path in args.file or []:
+        yield from split(_read_source(path))
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m src', description="Quiz Helper (headless)")
+    parser.add_argument('--api-key', help='Grok API key (default: GROK_API from .env.local)')
+    parser.add_argument('--api-url', help='completions endpoint (e.g. a local mock server)')
+    parser.add_argument('--concurrency', type=int, default=4, help='items analyzed in parallel')
+    parser.add_argument('--no-cache', action='store_true', help='always call the API')
+    parser.add_argument('--no-bank', action='store_true',
+                        help='do not answer from the local question bank')
+    parser.add_argument('--token-budget', type=int, default=1500,
+                        help='max estimated tokens of page text sent per URL')
+    parser.add_argument('--question-concurrency', type=int, default=4,
+                        help='questions of one multi-question page analyzed in parallel')
+    parser.add_argument('--fast-model',
+                        help="model tried before escalating to grok-3-latest (default grok-3-mini, "
+                             "'off' to disable)")
+    parser.add_argument('--min-confidence', type=int,
+                        help='fast-model answers below this self-reported confidence escalate '
+                             '(default 70)')
+    parser.add_argument('--hedge-budget', type=float,
+                        help='fraction of API calls that may send a second request once they run '
+                             'past the usual p95 latency (default 0.1, 0 to disable)')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='append per-stage timing spans to FILE as JSON lines')
+    parser.add_argument('--profile', metavar='STAGE',
+                        help='run STAGE (e.g. ocr, api) under cProfile; saved to STAGE.prof')
+
+    modes = parser.add_subparsers(dest='mode', required=True)
+    for mode, help_text in (('text', 'analyze question text'),
+                            ('url', 'scrape quiz pages and analyze them'),
+                            ('image', 'OCR image files and analyze the text')):
+        sub = modes.add_parser(mode, help=help_text)
+        sub.add_argument('inputs', nargs='*', help="values, or '-' to read stdin")
+        sub.add_argument('--file', action='append', help='read inputs from a file (repeatable)')
+
+    crawl = modes.add_parser('crawl', help='fetch many pages concurrently with an HTTP cache')
+    crawl.add_argument('inputs', nargs='*', help="URLs, or '-' to read stdin")
+    crawl.add_argument('--file', action='append', help='read URLs from a file (repeatable)')
+    crawl.add_argument('--sitemap', action='append', help='crawl every page listed in a sitemap')
+    crawl.add_argument('--per-host', type=int, default=2, help='concurrent requests per host')
+    crawl.add_argument('--analyze', action='store_true', help='also analyze each page')
+
+    bank = modes.add_parser('import-bank',
+                            help='add CSV/JSON/JSONL question banks to the local index')
+    bank.add_argument('inputs', nargs='+', help='question bank files')
+    bank.add_argument('--batch-size', type=int, default=5000, help='rows written per transaction')
+
+    serve = modes.add_parser('serve', help='run the local analysis daemon the Tk windows can share')
+    serve.add_argument('--host', default='127.0.0.1',
+                       help='address to listen on (default loopback; others need '
+                            'QUIZ_HELPER_DAEMON_TOKEN)')
+    serve.add_argument('--port', type=int, default=8787)
+    serve.add_argument('--workers', type=int, default=4, help='analyses run at the same time')
+    serve.add_argument('--max-queue', type=int, default=16,
+                       help='waiting requests before new ones are answered 503')
+    serve.add_argument('--max-per-client', type=int, default=4,
+                       help='requests one client may have in flight before 429')
+    return parser
+
+def import_bank(args) -> int:
+    """Stream every file into the question bank; per-file counts go to stdout"""
+    from src.api.question_bank import QuestionBank, get_question_bank
+
+    bank = get_question_bank() or QuestionBank()
+    failures = 0
+    for path in args.inputs:
+        started = time.perf_counter()
+        try:
+            record = {'file': path, **bank.import_file(path, args.batch_size)}
+        except (OSError, ValueError) as e:
+            record = {'file': path, 'error': str(e)}
+            failures += 1
+        record['elapsed_s'] = round(time.perf_counter() - started, 2)
+        print(json.dumps(record), flush=True)
+    bank.optimize()
+    print(json.dumps({'questions': len(bank)}), file=sys.stderr)
+    return 1 if failures else 0
+
+def serve(args, pipeline) -> int:
+    """Serve pipeline to local clients until interrupted; client stats go to stderr"""
+    from src.daemon import AnalysisDaemon
+
+    try:
+        daemon = AnalysisDaemon(pipeline, host=args.host, port=args.port, workers=args.workers,
+                                max_queue=args.max_queue, max_per_client=args.max_per_client)
+    except ValueError as e:  # A non-loopback address without a configured token
+        print(e, file=sys.stderr)
+        return 2
+    print(json.dumps({'warm': daemon.warm_up()}), file=sys.stderr)
+    print(f"Serving on {daemon.url} - set QUIZ_HELPER_DAEMON={daemon.url} for the Tk windows",
+          file=sys.stderr, flush=True)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.shutdown()
+        print(json.dumps({'clients': daemon.stats()['clients']}), file=sys.stderr)
+    return 0
+
+def crawl(args, pipeline) -> int:
+    """Scrape (and optionally analyze) pages; crawl statistics go to stderr"""
+    from src.utils.crawler import Crawler
+
+    crawler = Crawler(scraper=pipeline.web_scraper, max_workers=args.concurrency,
+                      per_host=args.per_host)
+    urls = list(collect_inputs(args))
+    for sitemap in args.sitemap or []:
+        urls.extend(crawler.sitemap_urls(sitemap))
+
+    failures = 0
+    for page in crawler.crawl(urls):
+        record = page
+        if args.analyze and 'error' not in page:
+            record = {'index': page['index'], 'cached': page['cached'],
+                      **pipeline.analyze_scraped(page['url'], page['question'],
+                                                 page.get('questions'))}
+        failures += 'error' in record
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
+        sys.stdout.flush()
+
+    print(json.dumps({'crawl_stats': crawler.stats.as_dict()}), file=sys.stderr)
+    return 1 if failures else 0
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    # Set before anything creates the shared tracer
+    if args.trace:
+        os.environ['QUIZ_HELPER_TRACE'] = args.trace
+    if args.profile:
+        os.environ['QUIZ_HELPER_PROFILE'] = args.profile
+    if args.fast_model is not None:
+        os.environ['QUIZ_HELPER_FAST_MODEL'] = args.fast_model
+    if args.min_confidence is not None:
+        os.environ['QUIZ_HELPER_MIN_CONFIDENCE'] = str(args.min_confidence)
+    if args.hedge_budget is not None:
+        os.environ['QUIZ_HELPER_HEDGE_BUDGET'] = str(args.hedge_budget)
+
+    from src.api.single_flight import get_single_flight
+    from src.utils.tracing import get_tracer
+    try:
+        return _run(args)
+    finally:
+        flights = get_single_flight().stats()
+        if flights['coalesced']:
+            print(json.dumps({'single_flight': flights}), file=sys.stderr)
+        tracer = get_tracer()
+        if tracer.spans:
+            stats = {stage: {k: round(v, 1) for k, v in s.items()} for stage, s in tracer.stats().items()}
+            print(json.dumps({'stage_stats': stats}), file=sys.stderr)
+        if tracer.profile_stage and tracer.dump_profile(f"{tracer.profile_stage}.prof"):
+            print(f"Profile of '{tracer.profile_stage}' saved to {tracer.profile_stage}.prof",
+                  file=sys.stderr)
+        tracer.close()
+
+def _run(args) -> int:
+    from dotenv import load_dotenv
+    load_dotenv('.env.local')
+    if args.mode == 'import-bank':
+        return import_bank(args)
+    api_key = args.api_key or os.getenv('GROK_API')
+    if not api_key:
+        print("No API key: set GROK_API in .env.local or pass --api-key", file=sys.stderr)
+        return 2
+
+    from src.pipeline import AnalysisPipeline
+    pipeline = AnalysisPipeline(api_key, use_cache=not args.no_cache, api_url=args.api_url,
+                                token_budget=args.token_budget,
+                                question_concurrency=args.question_concurrency,
+                                use_bank=not args.no_bank)
+    try:
+        return _dispatch(args, pipeline)
+    finally:
+        print(json.dumps({'routing': pipeline.routing_stats()}), file=sys.stderr)
+        print(json.dumps({'hedging': pipeline.hedging_stats()}), file=sys.stderr)
+
+def _dispatch(args, pipeline) -> int:
+    if args.mode == 'crawl':
+        return crawl(args, pipeline)
+    if args.mode == 'serve':
+        return serve(args, pipeline)
+
+    run = {'text': pipeline.analyze_text,
+           'url': pipeline.analyze_url,
+           'image': pipeline.analyze_image}[args.mode]
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = {executor.submit(run, value): index
+                   for index, value in enumerate(collect_inputs(args))}
+        for future in as_completed(futures):
+            record = {'index': futures[future], **future.result()}
+            failures += 'error' in record
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
+            sys.stdout.flush()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,402 @@
+"""Long-running local analysis service shared by every Quiz Helper window.
+
+    python -m src serve [--port 8787] [--workers 4] [--max-queue 16]
+
+One process keeps the warm OCR engine, pooled API connections and the
+answer, OCR and similarity caches, and serves them over HTTP on the
+loopback interface:
+
+    GET  /health               liveness and uptime
+    GET  /stats                per-client throughput and queue wait, routing, caches
+    POST /text  {"question"}   same record as AnalysisPipeline.analyze_text
+    POST /url   {"url"}        same record as AnalysisPipeline.analyze_url
+    POST /image  <image bytes> OCR the image and analyze its text
+    POST /ocr    <image bytes> text of an already preprocessed image
+
+Every request must carry `Authorization: Bearer <token>`, the per-user
+secret from daemon_token() (401 otherwise), so other users and other
+machines cannot spend the API key; binding beyond loopback also needs
+an explicit QUIZ_HELPER_DAEMON_TOKEN for the remote clients to use.
+
+JSON bodies with "stream": true get application/x-ndjson instead: one
+{"delta": ...} line per answer chunk, then {"record": ...}. Work runs
+on a bounded pool; when `max_queue` requests are already waiting the
+daemon answers 503, and a client with `max_per_client` requests in
+flight gets 429, both with a Retry-After header. Clients name
+themselves with the X-Quiz-Client header.
+"""
+import hmac
+import io
+import ipaddress
+import json
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+from src.api.daemon_client import daemon_token
+from src.pipeline import AnalysisPipeline
+from src.utils.task_scheduler import TaskCancelled, TaskHandle, TaskScheduler, current_task
+from src.utils.tracing import percentile
+
+DEFAULT_PORT = 8787
+MAX_BODY = 32 * 2 ** 20  # Largest accepted upload (bytes)
+
+class Busy(Exception):
+    """Raised by AnalysisDaemon.admit() when a request has to be turned away"""
+
+    def __init__(self, status: int, retry_after: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+class ClientStats:
+    """Requests, throughput and queue wait of one named client"""
+
+    def __init__(self, history: int = 512, window: float = 60.0):
+        self.requests = 0
+        self.completed = 0
+        self.errors = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.first_seen = time.time()
+        self.last_seen = self.first_seen
+        self.window = window  # Seconds of completions that throughput is measured over
+        self.waits = deque(maxlen=history)
+        self.services = deque(maxlen=history)
+        self.finished = deque()  # Completion times within the window
+
+    def record(self, wait_ms: float, service_ms: float, error: bool):
+        now = time.monotonic()
+        self.completed += 1
+        self.errors += error
+        self.waits.append(wait_ms)
+        self.services.append(service_ms)
+        self.finished.append(now)
+        while self.finished and self.finished[0] < now - self.window:
+            self.finished.popleft()
+
+    def as_dict(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        recent = sum(1 for finished in self.finished if finished >= now - self.window)
+        span = min(self.window, max(time.time() - self.first_seen, 1.0))
+        waits, services = sorted(self.waits), sorted(self.services)
+        return {
+            'requests': self.requests,
+            'completed': self.completed,
+            'errors': self.errors,
+            'rejected': self.rejected,
+            'in_flight': self.in_flight,
+            'throughput_per_s': round(recent / span, 3),
+            'queue_wait_p50_ms': round(percentile(waits, 0.5), 1),
+            'queue_wait_p95_ms': round(percentile(waits, 0.95), 1),
+            'service_p50_ms': round(percentile(services, 0.5), 1),
+            'service_p95_ms': round(percentile(services, 0.95), 1),
+            'last_seen_s_ago': round(time.time() - self.last_seen, 1),
+        }
+
+def is_loopback(host: str) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+class AnalysisDaemon:
+    """Serves one AnalysisPipeline to many local clients with bounded queueing.
+
+    token defaults to the per-user daemon token, created on first start.
+    """
+
+    def __init__(self, pipeline: AnalysisPipeline, host: str = '127.0.0.1',
+                 port: int = DEFAULT_PORT, workers: int = 4, max_queue: int = 16,
+                 max_per_client: int = 4, token: Optional[str] = None):
+        if not token and not is_loopback(host) and not os.getenv('QUIZ_HELPER_DAEMON_TOKEN'):
+            raise ValueError(f"refusing to listen on {host} without QUIZ_HELPER_DAEMON_TOKEN set")
+        self.token = token or daemon_token(create=True)
+        if not self.token:
+            raise RuntimeError("could not create the daemon token")
+        self.pipeline = pipeline
+        self.workers = workers
+        self.max_queue = max_queue  # Admitted requests still waiting for a worker
+        self.max_per_client = max_per_client  # One client can't take over the queue
+        self.scheduler = TaskScheduler(max_workers=workers)
+        self.clients: Dict[str, ClientStats] = {}
+        self.started = time.time()
+        self._waiting = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.service = self
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def warm_up(self) -> Dict[str, str]:
+        """Load the OCR engine and preprocessor now instead of on the first capture"""
+        loaded = {}
+        for name in ('ocr_engine', 'preprocessor', 'ocr_cache'):
+            try:
+                loaded[name] = type(getattr(self.pipeline, name)).__name__
+            except Exception as e:  # OCR is optional: text and URL analysis still work
+                loaded[name] = f"unavailable ({e})"
+        return loaded
+
+    def _client(self, name: str) -> ClientStats:
+        stats = self.clients.get(name)
+        if stats is None:
+            stats = self.clients[name] = ClientStats()
+        return stats
+
+    def _retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        services = [ms for stats in self.clients.values() for ms in stats.services]
+        typical = percentile(sorted(services), 0.5) / 1000 if services else 1.0
+        return max(1, math.ceil(self._waiting * typical / self.workers))
+
+    def admit(self, client: str) -> ClientStats:
+        """Reserve a queue slot for client, or raise Busy"""
+        with self._lock:
+            stats = self._client(client)
+            stats.requests += 1
+            stats.last_seen = time.time()
+            if stats.in_flight >= self.max_per_client:
+                stats.rejected += 1
+                raise Busy(429, 1, f"{stats.in_flight} requests from {client} already in flight")
+            if self._waiting >= self.max_queue:
+                stats.rejected += 1
+                raise Busy(503, self._retry_after(), f"{self._waiting} requests already queued")
+            stats.in_flight += 1
+            self._waiting += 1
+            return stats
+
+    def run(self, stats: ClientStats, fn: Callable, *args) -> TaskHandle:
+        """Queue fn(*args) for a client admitted by admit()"""
+        queued = [True]
+
+        def leave_queue():
+            with self._lock:
+                if queued[0]:
+                    queued[0] = False
+                    self._waiting -= 1
+
+        def job():
+            leave_queue()
+            return fn(*args)
+
+        def finished(handle):
+            leave_queue()  # Cancelled before a worker picked it up
+            begun = handle.started or handle.finished
+            try:
+                result = handle.result(0)
+                error = isinstance(result, dict) and 'error' in result
+            except Exception:
+                error = True
+            with self._lock:
+                stats.in_flight -= 1
+                stats.record((begun - handle.submitted) * 1000, (handle.finished - begun) * 1000,
+                             error)
+
+        handle = self.scheduler.submit(job)
+        handle.add_done_callback(finished)
+        return handle
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            clients = {name: stats.as_dict() for name, stats in self.clients.items()}
+            waiting = self._waiting
+        return {
+            'uptime_s': round(time.time() - self.started, 1),
+            'waiting': waiting,
+            'max_queue': self.max_queue,
+            'workers': self.workers,
+            'clients': clients,
+            'scheduler': self.scheduler.stats(),
+            'routing': self.pipeline.routing_stats(),
+            'transport': self.pipeline.transport.stats(),
+            'answer_cache': (self.pipeline.answer_client.cache.summary()
+                             if self.pipeline.answer_client.cache else 'off'),
+        }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (f"{len(stats['clients'])} clients, {stats['waiting']} waiting, "
+                f"{sum(c['completed'] for c in stats['clients'].values())} served")
+
+    def authorized(self, header: Optional[str]) -> bool:
+        """Whether an Authorization header carries this daemon's token"""
+        scheme, _, token = (header or '').partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(token.strip().encode('utf-8'),
+                                                                  self.token.encode('utf-8'))
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def shutdown(self, deadline: float = 2.0):
+        """Stop accepting requests and give running ones up to `deadline` seconds"""
+        self.httpd.shutdown()
+        self.scheduler.shutdown(deadline=deadline)
+        self.httpd.server_close()
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Clients keep their connection between requests
+    disable_nagle_algorithm = True  # Streamed deltas go out as soon as they are written
+
+    @property
+    def service(self) -> AnalysisDaemon:
+        return self.server.service
+
+    @property
+    def client_name(self) -> str:
+        return self.headers.get('X-Quiz-Client') or self.client_address[0]
+
+    def _authorized(self) -> bool:
+        """Check the token; on failure answer 401 and drop the connection"""
+        if self.service.authorized(self.headers.get('Authorization')):
+            return True
+        self.close_connection = True  # Any request body is left unread
+        self._json(401, {'error': 'missing or wrong daemon token'}, {'WWW-Authenticate': 'Bearer'})
+        return False
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        path = self.path.split('?')[0]
+        if path == '/health':
+            return self._json(200, {'ok': True, 'pid': os.getpid(),
+                                    'uptime_s': round(time.time() - self.service.started, 1)})
+        if path == '/stats':
+            return self._json(200, self.service.stats())
+        self._json(404, {'error': f"no such endpoint: {path}"})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        path = self.path.split('?')[0]
+        header = self.headers.get('Content-Length', '0').strip()
+        if not header.isdigit():  # Also rejects negative lengths
+            self.close_connection = True  # The body can't be read or skipped
+            return self._json(400, {'error': f"invalid Content-Length: {header!r}"})
+        length = int(header)
+        if path not in ROUTES and path not in ('/image', '/ocr'):
+            self.close_connection = True  # The body was not read
+            return self._json(404, {'error': f"no such endpoint: {path}"})
+        if length > MAX_BODY:
+            self.close_connection = True
+            return self._json(413, {'error': f"body larger than {MAX_BODY} bytes"})
+        body = self.rfile.read(length)
+        try:
+            fn, args, stream = self._route(path, body)
+        except (OSError, ValueError) as e:  # Not an image, not JSON or a missing field
+            return self._json(400, {'error': str(e)})
+
+        try:
+            stats = self.service.admit(self.client_name)
+        except Busy as e:
+            return self._json(e.status, {'error': str(e)}, {'Retry-After': str(e.retry_after)})
+        if stream:
+            return self._stream(stats, fn, args)
+        handle = self.service.run(stats, fn, *args)
+        try:
+            result = handle.result()
+        except TaskCancelled:
+            return self._json(503, {'error': 'daemon is shutting down'})
+        except Exception as e:
+            return self._json(500, {'error': str(e)})
+        self._json(200, self._annotate(result, handle))
+
+    def _route(self, path: str, body: bytes):
+        """(function, args, stream) for a POST; raises OSError/ValueError for bad requests"""
+        pipeline = self.service.pipeline
+        if path in ('/image', '/ocr'):
+            from PIL import Image
+            image = Image.open(io.BytesIO(body))
+            image.load()
+            if path == '/image':
+                return pipeline.analyze_image, ('<upload>', image), False
+
+            def ocr():
+                try:
+                    return {'text': pipeline.ocr_cache.recognize(image,
+                                                                 pipeline.ocr_engine.image_to_string)}
+                except Exception as e:  # A 5xx would be retried by the client's transport
+                    return {'error': str(e)}
+            return ocr, (), False
+        request = json.loads(body or b'{}')
+        field, analyze = ROUTES[path]
+        value = request.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"'{field}' is required")
+        if request.get('stream'):
+            return (lambda on_delta: analyze(pipeline, value, on_delta)), (), True
+        return (lambda: analyze(pipeline, value)), (), False
+
+    def _stream(self, stats: ClientStats, fn: Callable, args: tuple):
+        """Send answer chunks as NDJSON lines while the job runs, then the record"""
+        deltas = queue.Queue()
+
+        def on_delta(delta):
+            task = current_task()
+            if task and task.cancelled:
+                raise TaskCancelled()  # The client went away; stop reading the answer
+            deltas.put(delta)
+
+        handle = self.service.run(stats, fn, on_delta)
+        handle.add_done_callback(lambda handle: deltas.put(None))
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')  # Each line reaches the client at once
+            self.end_headers()
+            while True:
+                delta = deltas.get()
+                if delta is None:
+                    break
+                self._line({'delta': delta})
+            try:
+                self._line({'record': self._annotate(handle.result(), handle)})
+            except Exception as e:
+                self._line({'record': {'error': str(e)}})
+            self.wfile.write(b"0\r\n\r\n")
+        except OSError:
+            self.close_connection = True
+            handle.cancel()
+
+    def _annotate(self, result: Dict[str, Any], handle) -> Dict[str, Any]:
+        begun = handle.started or handle.finished
+        result['daemon'] = {'client': self.client_name,
+                            'queue_wait_ms': round((begun - handle.submitted) * 1000, 1),
+                            'service_ms': round((handle.finished - begun) * 1000, 1)}
+        return result
+
+    def _line(self, payload: Dict[str, Any]):
+        """Write one NDJSON line as its own chunk"""
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8') + b'\n'
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+# JSON endpoints: path -> (request field, analyze(pipeline, value, on_delta=None))
+ROUTES = {
+    '/text': ('question', lambda pipeline, value, on_delta=None: pipeline.analyze_text(value, on_delta)),
+    '/url': ('url', lambda pipeline, value, on_delta=None: pipeline.analyze_url(value, on_delta)),
+}
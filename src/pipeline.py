@@ -0,0 +1,214 @@
+"""Headless analysis pipelines: text, URL and image inputs to answers.
+
+Nothing here imports tkinter, pyautogui or pynput; OCR and scraping
+dependencies are only loaded when the matching pipeline first runs.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+from src.api.answer_cache import AnswerCache, get_answer_cache
+from src.api.grok_client import GrokClient
+from src.api.model_router import ModelRouter, ModelTier
+from src.api.prompts import (ANSWER_SYSTEM_PROMPT, QUIZ_SYSTEM_PROMPT, answer_prompt,
+                             question_with_options, url_prompt)
+from src.api.question_bank import QuestionBank, get_question_bank
+from src.api.similarity_index import SimilarityIndex, get_similarity_index
+from src.api.transport import HttpTransport, get_transport
+from src.utils.context_compactor import ContextCompactor
+
+class AnalysisPipeline:
+    """Runs scrape -> analyze, image -> OCR -> analyze and text -> analyze.
+
+    Every method returns a JSON-serializable record and never raises;
+    failures are reported in the record's 'error' field.
+    """
+
+    def __init__(self, api_key: str, transport: Optional[HttpTransport] = None,
+                 cache: Optional[AnswerCache] = None,
+                 similarity_index: Optional[SimilarityIndex] = None, use_cache: bool = True,
+                 api_url: Optional[str] = None, token_budget: int = 1500,
+                 question_concurrency: int = 4, tiers: Optional[List[ModelTier]] = None,
+                 question_bank: Optional[QuestionBank] = None, use_bank: bool = True):
+        self.transport = transport or get_transport()
+        if use_cache:
+            cache = cache or get_answer_cache()
+            similarity_index = similarity_index or get_similarity_index()
+        else:
+            cache = similarity_index = None
+
+        self.answer_client = GrokClient(api_key, transport=self.transport,
+                                        system_prompt=ANSWER_SYSTEM_PROMPT, cache=cache,
+                                        similarity_index=similarity_index)
+        self.quiz_client = GrokClient(api_key, transport=self.transport,
+                                      system_prompt=QUIZ_SYSTEM_PROMPT, cache=cache,
+                                      similarity_index=similarity_index)
+        if api_url:
+            self.answer_client.api_url = self.quiz_client.api_url = api_url
+        # Question bank, then the fast model, escalating to the clients' model (tiers=[]
+        # turns the fast model off)
+        question_bank = (question_bank or get_question_bank()) if use_bank else None
+        self.answer_router = ModelRouter(self.answer_client, tiers, question_bank)
+        self.quiz_router = ModelRouter(self.quiz_client, tiers, question_bank)
+        self.compactor = ContextCompactor(token_budget)  # Trims page text before it is sent
+        self.question_concurrency = question_concurrency  # Parallel calls per multi-question page
+        self._web_scraper = None
+        self._ocr_engine = None
+        self._preprocessor = None
+        self._ocr_cache = None
+
+    @property
+    def web_scraper(self):
+        if self._web_scraper is None:
+            from src.utils.web_scraper import WebScraper
+            self._web_scraper = WebScraper()
+        return self._web_scraper
+
+    @property
+    def ocr_engine(self):
+        if self._ocr_engine is None:
+            from src.utils.ocr import get_ocr_engine
+            self._ocr_engine = get_ocr_engine()
+        return self._ocr_engine
+
+    @property
+    def preprocessor(self):
+        if self._preprocessor is None:
+            from src.utils.image_preprocess import create_preprocessor
+            self._preprocessor = create_preprocessor()
+        return self._preprocessor
+
+    @property
+    def ocr_cache(self):
+        if self._ocr_cache is None:
+            from src.utils.ocr_cache import get_ocr_cache
+            self._ocr_cache = get_ocr_cache()
+        return self._ocr_cache
+
+    def routing_stats(self) -> Dict[str, Any]:
+        return {'answer': self.answer_router.as_dict(), 'quiz': self.quiz_router.as_dict()}
+
+    def hedging_stats(self) -> Dict[str, Any]:
+        return {'answer': self.answer_router.hedge_stats(), 'quiz': self.quiz_router.hedge_stats()}
+
+    @staticmethod
+    def _answer(response: dict) -> str:
+        return response['choices'][0]['message']['content']
+
+    def _record_answer(self, record: Dict[str, Any], response: dict):
+        record['answer'] = self._answer(response)
+        if 'question_bank' in response:
+            record['question_bank'] = response['question_bank']  # Answered offline
+
+    def _ask(self, record: Dict[str, Any], router: ModelRouter, prompt: str, question: str,
+             on_delta: Optional[Callable[[str], None]] = None):
+        """Answer through router; with on_delta the answer is also passed on as it streams in"""
+        if on_delta is None:
+            self._record_answer(record, router.analyze_question(prompt, question=question))
+            return
+        stream = router.stream_question(prompt, question=question)
+        for delta in stream:
+            on_delta(delta)
+        if stream.response is not None and not stream.finished:
+            raise RuntimeError("Answer stream ended before it was complete")
+        record['answer'] = stream.text
+        for flag in ('cached', 'coalesced', 'banked'):
+            if getattr(stream, flag):
+                record[flag] = True
+
+    def _run(self, source: str, value: str, steps) -> Dict[str, Any]:
+        record: Dict[str, Any] = {'source': source, 'input': value}
+        started = time.perf_counter()
+        try:
+            steps(record)
+        except Exception as e:
+            record['error'] = str(e)
+        record['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return record
+
+    def analyze_text(self, question: str,
+                     on_delta: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        def steps(record):
+            record['question'] = question
+            self._ask(record, self.answer_router, answer_prompt(question), question, on_delta)
+        return self._run('text', question, steps)
+
+    def analyze_url(self, url: str,
+                    on_delta: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Scrape and analyze a page; on_delta streams single-question answers only"""
+        def steps(record):
+            content = self.web_scraper.scrape_quiz_content(url)
+            if len(content['questions']) > 1:
+                self._analyze_questions(record, content['questions'])
+            else:
+                self._analyze_page(record, url, content['question'], on_delta)
+        return self._run('url', url, steps)
+
+    def analyze_scraped(self, url: str, question: str,
+                        questions: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Analyze text that was already extracted from a page (e.g. by the crawler)"""
+        def steps(record):
+            if questions and len(questions) > 1:
+                self._analyze_questions(record, questions)
+            else:
+                self._analyze_page(record, url, question)
+        return self._run('url', url, steps)
+
+    def _analyze_page(self, record: Dict[str, Any], url: str, page_text: str,
+                      on_delta: Optional[Callable[[str], None]] = None):
+        compacted = self.compactor.compact(page_text, url)
+        record['question'] = compacted.text
+        record['tokens_saved'] = compacted.tokens_saved
+        self._ask(record, self.quiz_router, url_prompt(url, compacted.text), compacted.text,
+                  on_delta)
+
+    def _analyze_questions(self, record: Dict[str, Any], questions: List[Dict[str, Any]]):
+        """Answer each scraped question in its own short prompt, concurrently"""
+        started = time.perf_counter()
+
+        def answer(question):
+            text = question_with_options(question['question'], question['options'])
+            response = self.answer_router.analyze_question(answer_prompt(text), question=text)
+            return self._answer(response), round((time.perf_counter() - started) * 1000, 1)
+
+        results = [dict(question) for question in questions]
+        workers = max(1, min(self.question_concurrency, len(questions)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="question") as executor:
+            futures = {executor.submit(answer, question): i for i, question in enumerate(questions)}
+            for future in as_completed(futures):
+                result = results[futures[future]]
+                try:
+                    result['answer'], result['elapsed_ms'] = future.result()
+                except Exception as e:
+                    result['error'] = str(e)
+                if 'first_answer_ms' not in record and 'answer' in result:
+                    record['first_answer_ms'] = result['elapsed_ms']
+
+        record['question'] = '\n\n'.join(question['question'] for question in questions)
+        record['questions'] = results
+        answered = [r for r in results if 'answer' in r]
+        if not answered:
+            raise RuntimeError(results[0]['error'])
+        record['answer'] = '\n\n'.join(f"{r['number']}. {r['answer']}" for r in answered)
+
+    def analyze_image(self, path: str, image=None) -> Dict[str, Any]:
+        """OCR an image file (or an already loaded PIL image) and analyze its text"""
+        def steps(record):
+            picture = image
+            if picture is None:
+                from PIL import Image
+                picture = Image.open(path)
+                picture.load()
+            text = self.recognize(picture)
+            if not text:
+                raise ValueError("No text recognized in image")
+            record['question'] = text
+            response = self.answer_router.analyze_question(answer_prompt(text), question=text)
+            self._record_answer(record, response)
+        return self._run('image', path, steps)
+
+    def recognize(self, image) -> str:
+        """Preprocess and OCR a PIL image; identical images reuse the cached text"""
+        from src.utils.ocr_cache import read_image
+        return read_image(image, self.preprocessor, self.ocr_engine.image_to_string,
+                          self.ocr_cache).text
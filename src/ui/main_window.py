@@ -1,29 +1,88 @@
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
 from ttkthemes import ThemedTk
 from src.ui.styles import AppStyles
+from src.api.answer_cache import get_answer_cache
+from src.api.daemon_client import connect_daemon
 from src.api.grok_client import GrokClient
+from src.api.model_router import ModelRouter
+from src.api.prompts import answer_prompt, question_with_options, url_prompt
+from src.api.question_bank import get_question_bank
+from src.api.similarity_index import get_similarity_index
+from src.ui.speculation import Speculator
+from src.ui.stats_panel import StageStatsPanel
+from src.ui.stream_view import StreamingTextView
+from src.utils.context_compactor import ContextCompactor
 from src.utils.web_scraper import WebScraper
-import threading
-from src.app import QuizHelperApp  # Add this import
+from src.utils.task_scheduler import INTERACTIVE, TaskCancelled, current_task, get_scheduler
+from src.utils.tracing import get_tracer
+
+class _QuestionRun:
+    """Answers for one multi-question page, filled in as they arrive"""
+
+    def __init__(self, questions: List[Dict[str, Any]]):
+        self.questions = questions
+        self.answers: List[Optional[str]] = [None] * len(questions)
+        self.started = time.perf_counter()
+        self.first_answer_ms: Optional[float] = None
+        self.remaining = len(questions)
+        self._lock = threading.Lock()
+
+    def finish(self, index: int, answer: str) -> bool:
+        """Store one answer; True once every question has one"""
+        with self._lock:
+            self.answers[index] = answer
+            if self.first_answer_ms is None:
+                self.first_answer_ms = (time.perf_counter() - self.started) * 1000
+            self.remaining -= 1
+            return self.remaining == 0
+
+    def render(self) -> str:
+        blocks = []
+        for question, answer in zip(self.questions, self.answers):
+            text = question_with_options(f"Q{question['number']}: {question['question']}",
+                                         question['options'])
+            blocks.append(f"{text}\n\n{answer or 'Analyzing...'}")
+        return ('\n\n' + '-' * 40 + '\n\n').join(blocks)
 
 class MainWindow:
     def __init__(self, api_key: str):
         self.root = ThemedTk(theme="arc")
         self.styles = AppStyles()
-        self.grok_client = GrokClient(api_key)
+        self.answer_cache = get_answer_cache()
+        self.grok_client = GrokClient(api_key, cache=self.answer_cache,
+                                      similarity_index=get_similarity_index())
+        # Question bank, then a fast model, escalating when unsure
+        self.router = ModelRouter(self.grok_client, question_bank=get_question_bank())
         self.web_scraper = WebScraper()
+        self.compactor = ContextCompactor()  # Fits page text to a token budget
+        self.scheduler = get_scheduler()  # Shared with the embedded QuizHelperApp
+        self.daemon = connect_daemon('main-window')  # Scrape and analyze there when it runs
+        self._question_run: Optional[_QuestionRun] = None  # Multi-question page being answered
+        # Optionally scrapes and answers a URL as soon as it has been typed or pasted
+        self.speculator = Speculator(self.root, self._speculate_url, ready=self._looks_like_url,
+                                     delay_ms=500)
         
         self.setup_window()
         self.create_widgets()
         self.setup_styles()
         
-        self.app = QuizHelperApp()
-        self.threads = []  # Track threads
+        self._app = None  # Screenshot app, built on first use (it owns a second Tk root)
         
         # Add window close handler
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
+    @property
+    def app(self):
+        if self._app is None:
+            from src.app import QuizHelperApp
+            self._app = QuizHelperApp(owns_scheduler=False)  # This window shuts the scheduler down
+        return self._app
+    
     def setup_window(self):
         self.root.title("Quiz Helper")
         self.root.geometry("800x600")
@@ -63,6 +122,10 @@ class MainWindow:
         
         self.url_entry = ttk.Entry(url_frame, width=50)
         self.url_entry.grid(row=0, column=1)
+        for event in ('<KeyRelease>', '<<Paste>>'):
+            # after_idle: a paste lands in the entry after its event handlers run
+            self.url_entry.bind(event, lambda e: self.root.after_idle(
+                lambda: self.speculator.changed(self.url_entry.get())))
         
         # Analyze Button
         self.analyze_btn = ttk.Button(
@@ -73,12 +136,28 @@ class MainWindow:
         )
         self.analyze_btn.grid(row=0, column=2, padx=(10, 0))
         
+        self.stats_btn = ttk.Button(url_frame, text="Stats",
+                                    command=lambda: StageStatsPanel(self.root))
+        self.stats_btn.grid(row=0, column=3, padx=(10, 0))
+        
+        self.speculate_var = tk.BooleanVar(value=self.speculator.enabled)
+        self.speculate_check = ttk.Checkbutton(
+            url_frame, text="Analyze while typing", variable=self.speculate_var,
+            command=lambda: self.speculator.set_enabled(self.speculate_var.get()))
+        self.speculate_check.grid(row=0, column=4, padx=(10, 0))
+        
         # Results Area
         self.result_text = scrolledtext.ScrolledText(
             self.main_frame, 
             height=20, 
             width=60)
         self.result_text.grid(row=2, column=0, pady=10)
+        self.result_stream = StreamingTextView(self.root, self.result_text)
+        
+        # Status bar
+        self.status_var = tk.StringVar(value="Ready")
+        status_bar = ttk.Label(self.main_frame, textvariable=self.status_var)
+        status_bar.grid(row=3, column=0, sticky="ew")
     
     def analyze_url(self):
         url = self.url_entry.get().strip()
@@ -89,37 +168,174 @@ class MainWindow:
         self.analyze_btn.config(state='disabled')
         self.result_text.delete(1.0, tk.END)
         self.result_text.insert(tk.END, "Analyzing quiz...\n\n")
+        self.result_stream.reset(clear_now=False)  # Placeholder stays until the first token
+        self.status_var.set("Analyzing quiz...")
         
-        thread = threading.Thread(target=self._process_url, args=(url,))
-        thread.daemon = True
-        thread.start()
+        # A newer URL analysis supersedes one still in flight
+        speculation = self.speculator.claim(url)
+        self.scheduler.submit(self._process_url, url, speculation,
+                              priority=INTERACTIVE, key='url-analysis')
+    
+    @staticmethod
+    def _looks_like_url(value):
+        parsed = urlparse(value)
+        return parsed.scheme in ('http', 'https') and '.' in parsed.netloc
+    
+    def _speculate_url(self, url):
+        """Scrape url and answer a single-question page ahead of a click; None when cut short"""
+        if self.daemon:
+            try:
+                record = self.daemon.analyze_url(url, on_delta=self._check_cancelled)
+            except TaskCancelled:
+                return None
+            if 'error' in record:
+                raise RuntimeError(record['error'])
+            return {'record': record}
+        content = self.web_scraper.scrape_quiz_content(url)
+        task = current_task()
+        if len(content['questions']) > 1 or (task and task.cancelled):
+            return {'content': content}  # Multi-question pages are fanned out on the click
+        compacted = self.compactor.compact(content['question'], url)
+        stream = self.router.stream_question(url_prompt(url, compacted.text),
+                                             question=compacted.text)
+        for _ in stream:
+            if task and task.cancelled:
+                return None
+        if stream.response is not None and not stream.finished:
+            return {'content': content}
+        return {'content': content, 'response': stream.as_response()}
+    
+    def _process_url(self, url, speculation=None):
+        with get_tracer().span('analysis', url=url, speculated=bool(speculation)):
+            self._analyze_url(url, speculation)
     
-    def _process_url(self, url):
+    def _analyze_url(self, url, speculation=None):
+        self._question_run = None
+        handed_off = False
         try:
-            # Scrape content
-            content = self.web_scraper.scrape_quiz_content(url)
+            # Scrape content, unless that was done while the URL was entered
+            prepared = self.speculator.collect(speculation) if speculation else None
+            if self.daemon:
+                source = (f"Answer prepared while typing - {speculation.saved_ms:.0f} ms saved"
+                          if prepared else None)
+                self._analyze_url_daemon(url, prepared and prepared['record'], source)
+                return
+            content = prepared['content'] if prepared else self.web_scraper.scrape_quiz_content(url)
+            if prepared and 'response' in prepared:
+                self.result_stream.push(prepared['response']['choices'][0]['message']['content'])
+                status = (f"Answer prepared while typing - {speculation.saved_ms:.0f} ms saved "
+                          f"({self.speculator.summary()})")
+                self.result_stream.finish(lambda: self.status_var.set(status))
+                return
+            if len(content['questions']) > 1:
+                # One short prompt per question, answered in parallel
+                self._analyze_questions(content['questions'])
+                handed_off = True
+                return
             
-            # Analyze with Grok
-            response = self.grok_client.analyze_question(
-                f"""Context: This is from the webpage {url}
-                
-                Content found:
-                {content['question']}
-                
-                Please analyze this content and provide:
-                1. The likely quiz question
-                2. The correct answer
-                3. A brief explanation
-                """
-            )
+            # Drop boilerplate and keep the likely question within the token budget
+            compacted = self.compactor.compact(content['question'], url)
             
-            # Update UI
-            self.root.after(0, self._update_results, response)
+            # Analyze with Grok, rendering the answer as it streams in
+            stream = self.router.stream_question(url_prompt(url, compacted.text),
+                                                 question=compacted.text)
+            task = current_task()
+            for delta in stream:
+                if task and task.cancelled:
+                    return
+                self.result_stream.push(delta)
+            
+            timing = f"First token {stream.ttft * 1000:.0f} ms, " if stream.ttft is not None else ""
+            timing += f"total {stream.total_time * 1000:.0f} ms"
+            source = ('Answer from question bank' if stream.banked else
+                      'Answer from cache' if stream.cached else
+                      'Shared with identical request' if stream.coalesced else 'Done')
+            status = (f"{source} - {timing}, {compacted.tokens_saved} prompt tokens saved "
+                      f"({self.answer_cache.summary()}, {self.grok_client.single_flight.summary()}, "
+                      f"{self.router.summary()}, {self.router.hedge_summary()}, "
+                      f"{self.scheduler.summary()})")
+            self.result_stream.finish(lambda: self.status_var.set(status))
             
         except Exception as e:
             self.root.after(0, self._show_error, str(e))
         finally:
-            self.root.after(0, lambda: self.analyze_btn.config(state='normal'))
+            if not handed_off:
+                self.root.after(0, lambda: self.analyze_btn.config(state='normal'))
+    
+    @staticmethod
+    def _check_cancelled(delta=None):
+        """on_delta for daemon calls: stops reading once the task has been superseded"""
+        task = current_task()
+        if task and task.cancelled:
+            raise TaskCancelled()
+    
+    def _analyze_url_daemon(self, url, record=None, source=None):
+        """Scrape and analyze on the shared daemon; record is one prepared ahead of the click"""
+        streamed = []
+        
+        def on_delta(delta):
+            self._check_cancelled()
+            streamed.append(delta)
+            self.result_stream.push(delta)
+        
+        if record is None:
+            try:
+                record = self.daemon.analyze_url(url, on_delta=on_delta)
+            except TaskCancelled:
+                return
+        if 'error' in record:
+            raise RuntimeError(record['error'])
+        if 'questions' in record:  # Multi-question page: same layout as when answered here
+            run = _QuestionRun(record['questions'])
+            run.answers = [q.get('answer') or f"Error: {q.get('error')}" for q in record['questions']]
+            self.result_stream.push(run.render())
+        elif not streamed:
+            self.result_stream.push(record['answer'])
+        source = source or ('Answer from question bank' if 'question_bank' in record or record.get('banked') else
+                            'Answer from cache' if record.get('cached') else 'Done')
+        status = (f"{source} - total {record['elapsed_ms']:.0f} ms, queue wait "
+                  f"{record['daemon']['queue_wait_ms']:.0f} ms ({self.daemon.summary()})")
+        self.result_stream.finish(lambda: self.status_var.set(status))
+    
+    def _analyze_questions(self, questions):
+        run = self._question_run = _QuestionRun(questions)
+        self.root.after(0, self._show_questions, run)
+        for index in range(len(questions)):
+            self.scheduler.submit(self._answer_question, run, index,
+                                  priority=INTERACTIVE, key=f'url-question-{index}')
+    
+    def _answer_question(self, run, index):
+        if run is not self._question_run:
+            return  # A newer analysis replaced this page
+        question = run.questions[index]
+        text = question_with_options(question['question'], question['options'])
+        try:
+            response = self.router.analyze_question(answer_prompt(text), question=text)
+            answer = response['choices'][0]['message']['content']
+        except Exception as e:
+            answer = f"Error: {e}"
+        run.finish(index, answer)
+        self.root.after(0, self._show_questions, run)
+    
+    def _show_questions(self, run):
+        """Redraw the per-question answers (main thread), keeping the scroll position"""
+        if run is not self._question_run:
+            return
+        with get_tracer().span('ui_update', questions=len(run.questions)):
+            top = self.result_text.yview()[0]
+            self.result_text.delete(1.0, tk.END)
+            self.result_text.insert(tk.END, run.render())
+            self.result_text.yview_moveto(top)
+        answered = len(run.questions) - run.remaining
+        first = f", first after {run.first_answer_ms:.0f} ms" if run.first_answer_ms else ""
+        if run.remaining:
+            self.status_var.set(f"{answered}/{len(run.questions)} questions answered{first}")
+            return
+        elapsed = (time.perf_counter() - run.started) * 1000
+        self.status_var.set(f"{answered} questions answered in {elapsed:.0f} ms{first} "
+                            f"({self.answer_cache.summary()}, {self.grok_client.single_flight.summary()}, "
+                            f"{self.router.summary()})")
+        self.analyze_btn.config(state='normal')
     
     def _update_results(self, response):
         self.result_text.delete(1.0, tk.END)
@@ -128,25 +344,21 @@ class MainWindow:
     def _show_error(self, error_msg):
         self.result_text.delete(1.0, tk.END)
         self.result_text.insert(tk.END, f"Error: {error_msg}")
+        self.status_var.set("Analysis failed")
     
     def start_screenshot_thread(self):
-        thread = threading.Thread(target=self.app.process_screenshot)
-        self.threads.append(thread)
-        thread.start()
+        return self.app.process_screenshot()  # Queued on the shared scheduler
     
     def capture_screenshot(self, event=None):
         """Handle screenshot capture request"""
         self.start_screenshot_thread()
     
     def on_closing(self):
-        """Clean up threads before closing"""
-        # Join all threads
-        for thread in self.threads:
-            if thread.is_alive():
-                thread.join()
-        self.root.destroy()
-    
-    def cleanup_thread(self, thread):
-        """Remove completed thread from tracking list"""
-        if thread in self.threads:
-            self.threads.remove(thread)
\ No newline at end of file
+        """Cancel pending work and stop within a bounded deadline"""
+        self.speculator.set_enabled(False)
+        self.scheduler.shutdown(deadline=2.0)
+        tracer = get_tracer()
+        if tracer.profile_stage:
+            tracer.dump_profile(f"quiz_helper_{tracer.profile_stage}.prof")
+        tracer.close()
+        self.root.destroy()
\ No newline at end of file
@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+import tkinter as tk
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from src.utils.task_scheduler import BACKGROUND, TaskScheduler, get_scheduler
+from src.utils.tracing import get_tracer, percentile
+
+def speculation_enabled() -> bool:
+    """QUIZ_HELPER_SPECULATE=1 turns on analysis while the question is entered"""
+    return os.getenv('QUIZ_HELPER_SPECULATE', '') not in ('', '0', 'off')
+
+class Speculation:
+    """Work started for `value` before anyone asked for it"""
+
+    def __init__(self, value: str, handle):
+        self.value = value
+        self.handle = handle
+        self.claimed: Optional[float] = None
+        self.saved_ms = 0.0  # Latency the caller did not have to wait for
+
+class SpeculationStats:
+    def __init__(self, history: int = 256):
+        self.started = 0
+        self.used = 0  # Claimed and delivered a result
+        self.wasted = 0  # Started, then the input changed before it was claimed
+        self.failed = 0  # Claimed, but failed or was cut off; the caller ran the work itself
+        self.missed = 0  # Requests with no speculation for their input
+        self.saved_ms = deque(maxlen=history)
+
+    def as_dict(self) -> Dict[str, Any]:
+        saved = sorted(self.saved_ms)
+        claims = self.used + self.failed + self.missed
+        return {'started': self.started, 'used': self.used, 'wasted': self.wasted,
+                'failed': self.failed, 'missed': self.missed,
+                'hit_rate': self.used / claims if claims else 0.0,
+                'saved_total_ms': sum(saved),
+                'saved_p50_ms': percentile(saved, 0.5)}
+
+    def summary(self) -> str:
+        claims = self.used + self.failed + self.missed
+        if not claims:
+            return f"{self.started} speculations, none claimed yet"
+        return (f"{self.used}/{claims} answers prepared ahead, "
+                f"{sum(self.saved_ms) / 1000:.1f} s saved, {self.wasted} discarded")
+
+class Speculator:
+    """Debounced background work for an input the user is still editing.
+
+    changed() is called (on the Tk thread) whenever the input changes.
+    Once it has stayed the same for delay_ms and ready(value) holds,
+    work(value) runs on the scheduler at background priority; an edit
+    after that cancels it, and the work is expected to check
+    current_task().cancelled and return None. claim() hands the
+    speculation for the exact value over to the request that needs it.
+    """
+
+    def __init__(self, root: tk.Misc, work: Callable[[str], Any],
+                 ready: Callable[[str], bool] = bool, delay_ms: int = 800,
+                 scheduler: Optional[TaskScheduler] = None, enabled: Optional[bool] = None):
+        self.root = root
+        self.work = work
+        self.ready = ready
+        self.delay_ms = delay_ms
+        self.scheduler = scheduler or get_scheduler()
+        self.enabled = speculation_enabled() if enabled is None else enabled
+        self.stats = SpeculationStats()
+        self._value: Optional[str] = None
+        self._timer = None
+        self._current: Optional[Speculation] = None
+        self._lock = threading.Lock()
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        if not enabled:
+            self._discard()
+
+    def changed(self, value: str):
+        value = value.strip()
+        if value == self._value:
+            return  # e.g. a modified flag being reset, or a paste of the same text
+        self._discard()
+        self._value = value
+        if self.enabled and self.ready(value):
+            self._timer = self.root.after(self.delay_ms, self._start, value)
+
+    def _start(self, value: str):
+        self._timer = None
+        handle = self.scheduler.submit(self._run, value, priority=BACKGROUND)
+        self._current = Speculation(value, handle)
+        with self._lock:
+            self.stats.started += 1
+
+    def _run(self, value: str):
+        with get_tracer().span('speculation', chars=len(value)):
+            return self.work(value)
+
+    def _discard(self):
+        """Drop the pending timer and cancel unclaimed work"""
+        self._value = None
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+        if self._current is not None:
+            self._current.handle.cancel()
+            self._current = None
+            with self._lock:
+                self.stats.wasted += 1
+
+    def claim(self, value: str) -> Optional[Speculation]:
+        """The speculation for value, if one was started; the caller must collect() it"""
+        value = value.strip()
+        speculation, self._current = self._current, None
+        if speculation is not None and speculation.value == value:
+            speculation.claimed = time.perf_counter()
+            self._value = None  # Asking again later starts afresh
+            if self._timer is not None:
+                self.root.after_cancel(self._timer)
+                self._timer = None
+            return speculation
+        self._current = speculation
+        self._discard()
+        if self.enabled:
+            with self._lock:
+                self.stats.missed += 1
+        return None
+
+    def collect(self, speculation: Speculation, timeout: Optional[float] = None) -> Any:
+        """Wait for a claimed speculation; None when it failed and the work must be redone"""
+        try:
+            result = speculation.handle.result(timeout)
+        except Exception:
+            result = None
+        with self._lock:
+            if result is None:
+                self.stats.failed += 1
+                return None
+            handle = speculation.handle
+            speculation.saved_ms = (min(speculation.claimed, handle.finished) - handle.submitted) * 1000
+            self.stats.used += 1
+            self.stats.saved_ms.append(speculation.saved_ms)
+        return result
+
+    def summary(self) -> str:
+        with self._lock:
+            return self.stats.summary()
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return self.stats.as_dict()
@@ -0,0 +1,39 @@
+import time
+import tkinter as tk
+
+class UiStallMonitor:
+    """Measures how long the Tk event loop is blocked.
+
+    A callback is scheduled every interval_ms; any lateness beyond the
+    interval is time the UI thread spent busy and unable to repaint.
+    """
+
+    def __init__(self, root: tk.Misc, interval_ms: int = 50):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.max_stall_ms = 0.0
+        self.total_stall_ms = 0.0
+        self._last = None
+        self._job = None
+
+    def start(self):
+        self._last = time.perf_counter()
+        self._job = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self._job:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def reset(self):
+        self.max_stall_ms = 0.0
+        self.total_stall_ms = 0.0
+
+    def _tick(self):
+        now = time.perf_counter()
+        stall = (now - self._last) * 1000 - self.interval_ms
+        if stall > 0:
+            self.max_stall_ms = max(self.max_stall_ms, stall)
+            self.total_stall_ms += stall
+        self._last = now
+        self._job = self.root.after(self.interval_ms, self._tick)
@@ -0,0 +1,42 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Optional
+from src.utils.tracing import Tracer, get_tracer
+
+class StageStatsPanel:
+    """Window listing p50/p95 latency per traced stage, refreshed while open"""
+
+    COLUMNS = ('count', 'p50', 'p95', 'max')
+
+    def __init__(self, root: tk.Misc, tracer: Optional[Tracer] = None, refresh_ms: int = 1000):
+        self.tracer = tracer or get_tracer()
+        self.refresh_ms = refresh_ms
+        self.window = tk.Toplevel(root)
+        self.window.title("Stage Timings (ms)")
+        self.window.geometry("420x260")
+
+        self.tree = ttk.Treeview(self.window, columns=self.COLUMNS, height=10)
+        self.tree.heading('#0', text='stage')
+        self.tree.column('#0', width=120)
+        for column in self.COLUMNS:
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=70, anchor=tk.E)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        self._job = None
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def refresh(self):
+        self.tree.delete(*self.tree.get_children())
+        for stage, stats in sorted(self.tracer.stats().items()):
+            self.tree.insert('', tk.END, text=stage,
+                             values=(stats['count'], f"{stats['p50']:.1f}",
+                                     f"{stats['p95']:.1f}", f"{stats['max']:.1f}"))
+        self._job = self.window.after(self.refresh_ms, self.refresh)
+
+    def close(self):
+        if self._job:
+            self.window.after_cancel(self._job)
+            self._job = None
+        self.window.destroy()
@@ -0,0 +1,65 @@
+import threading
+import tkinter as tk
+from typing import Callable, List, Optional
+from src.utils.tracing import get_tracer
+
+class StreamingTextView:
+    """Appends streamed text to a Tk text widget, about once per frame.
+
+    push() may be called from any thread. Deltas are buffered and the
+    widget is updated from the Tk event loop via root.after, so a fast
+    stream costs one redraw per frame instead of one per token.
+    """
+
+    def __init__(self, root: tk.Misc, text_widget: tk.Text, frame_ms: int = 16):
+        self.root = root
+        self.text_widget = text_widget
+        self.frame_ms = frame_ms
+        self._lock = threading.Lock()
+        self._pending: List[str] = []
+        self._scheduled = False
+        self._clear_first = False
+        self._on_done: Optional[Callable[[], None]] = None
+
+    def reset(self, clear_now: bool = True):
+        """Start a new stream; clear the widget now or on the first flush"""
+        with self._lock:
+            self._pending = []
+            self._on_done = None
+            self._clear_first = not clear_now
+        if clear_now:
+            self.text_widget.delete(1.0, tk.END)
+
+    def push(self, delta: str):
+        with self._lock:
+            self._pending.append(delta)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.root.after(self.frame_ms, self._flush)
+
+    def finish(self, on_done: Optional[Callable[[], None]] = None):
+        """Flush whatever is left, then run on_done on the Tk thread"""
+        with self._lock:
+            self._on_done = on_done
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.root.after(0, self._flush)
+
+    def _flush(self):
+        with self._lock:
+            text = ''.join(self._pending)
+            self._pending = []
+            self._scheduled = False
+            clear_first, self._clear_first = self._clear_first, False
+            on_done, self._on_done = self._on_done, None
+
+        with get_tracer().span('ui_update', chars=len(text)):
+            if clear_first:
+                self.text_widget.delete(1.0, tk.END)
+            if text:
+                self.text_widget.insert(tk.END, text)
+                self.text_widget.see(tk.END)
+        if on_done:
+            on_done()
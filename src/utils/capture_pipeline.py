@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from src.utils.image_preprocess import ImagePreprocessor
+from src.utils.ocr import OcrEngine, get_ocr_engine
+from src.utils.ocr_cache import OcrCache, read_image
+from src.utils.screenshot import ScreenshotTool
+
+BBox = Tuple[int, int, int, int]
+
+class CaptureResult:
+    """Outcome of one capture: recognized text, PNG path and stage timings (ms)"""
+
+    def __init__(self, bbox: BBox):
+        self.bbox = bbox
+        self.text = ""
+        self.ocr_cached = False  # Text came from the OCR cache
+        self.path: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+
+class CapturePipeline:
+    """Runs grab -> OCR -> display without touching the Tk thread.
+
+    Grab and OCR run as separate tasks on a bounded worker pool, PNG
+    encoding is handed to a single background writer (or skipped), and
+    every callback is delivered through `dispatch`, normally
+    `lambda fn, *args: root.after(0, fn, *args)`.
+    """
+
+    def __init__(self, dispatch: Callable[..., None], ocr_engine: Optional[OcrEngine] = None,
+                 screenshot_tool: Optional[ScreenshotTool] = None, executor: Optional[Executor] = None,
+                 max_workers: int = 2, save_png: bool = True, save_dir: str = ".",
+                 preprocessor: Optional[ImagePreprocessor] = None,
+                 ocr_cache: Optional[OcrCache] = None):
+        self.dispatch = dispatch
+        self.ocr_engine = ocr_engine or get_ocr_engine()
+        self.screenshot_tool = screenshot_tool or ScreenshotTool(self.ocr_engine, preprocessor,
+                                                                 ocr_cache)
+        self.preprocessor = preprocessor or self.screenshot_tool.preprocessor
+        self.ocr_cache = ocr_cache or self.screenshot_tool.ocr_cache
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers,
+                                                       thread_name_prefix="capture")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="png-writer")
+        self.save_png = save_png
+        self.save_dir = save_dir
+        self._lock = threading.Lock()
+        self.captures = 0
+
+    def submit(self, bbox: BBox, on_text: Callable[[CaptureResult], None],
+               on_error: Callable[[Exception], None],
+               on_grabbed: Optional[Callable[[CaptureResult], None]] = None):
+        """Capture bbox (x1, y1, x2, y2); callbacks run via dispatch"""
+        result = CaptureResult(bbox)
+        with self._lock:
+            self.captures += 1
+        self.executor.submit(self._grab, result, on_text, on_error, on_grabbed)
+
+    def _grab(self, result, on_text, on_error, on_grabbed):
+        try:
+            started = time.perf_counter()
+            image = self.screenshot_tool.take_screenshot(result.bbox)
+            result.timings['grab'] = (time.perf_counter() - started) * 1000
+
+            if self.save_png:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                result.path = os.path.join(self.save_dir, f"screenshot_{timestamp}.png")
+                self._writer.submit(image.save, result.path)
+            if on_grabbed:
+                self.dispatch(on_grabbed, result)
+
+            self.executor.submit(self._ocr, image, result, on_text, on_error)
+        except Exception as e:
+            self.dispatch(on_error, e)
+
+    def _ocr(self, image, result, on_text, on_error):
+        try:
+            self.recognize(image, result)
+            self.dispatch(on_text, result)
+        except Exception as e:
+            self.dispatch(on_error, e)
+
+    def recognize(self, image, result: CaptureResult) -> CaptureResult:
+        """Preprocess and OCR an already grabbed image on the calling thread"""
+        run = read_image(image, self.preprocessor, self.ocr_engine.image_to_string, self.ocr_cache)
+        result.text, result.ocr_cached = run.text, run.cached
+        result.timings.update(run.timings)
+        return result
+
+    def shutdown(self, wait: bool = True):
+        if self._owns_executor:
+            self.executor.shutdown(wait=wait)
+        self._writer.shutdown(wait=wait)  # Let pending PNGs finish writing
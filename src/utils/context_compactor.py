@@ -0,0 +1,148 @@
+import hashlib
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Set
+
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+_WHITESPACE = re.compile(r'\s+')
+_QUESTION_START = re.compile(
+    r'^(?:q(?:uestion)?\s*\d+|\d+[.)]|which|what|who|whom|whose|when|where|why|how|'
+    r'select|choose|identify|name|true or false|fill in|complete|calculate|find)\b', re.I)
+_OPTION = re.compile(r'^(?:\(?[a-fA-F][).:]|\(?[1-6][).]|[○●◯□☐]\s)\s*\S')
+_BOILERPLATE = re.compile(
+    r'cookie|privacy policy|terms of (?:use|service)|all rights reserved|©|copyright|'
+    r'sign (?:in|up)|log ?in|subscribe|newsletter|follow us|share on|advertisement', re.I)
+
+def estimate_tokens(text: str) -> int:
+    """Local token estimate: roughly one token per 4 characters of each word,
+    plus one per punctuation mark"""
+    return sum(math.ceil(len(piece) / 4) for piece in _TOKEN_PIECES.findall(text))
+
+class CompactionResult:
+    def __init__(self, text: str, tokens_before: int, tokens_after: int):
+        self.text = text
+        self.tokens_before = tokens_before
+        self.tokens_after = tokens_after
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+class ContextCompactor:
+    """Shrinks scraped page text to a token budget before it is sent to the model.
+
+    Whitespace is collapsed, blocks repeated within a page or across many
+    distinct pages (navigation, footers) are dropped; revisiting a page
+    does not count its blocks again, and if the text is still over
+    budget the blocks most likely to contain the question and its options
+    are kept, in their original order.
+    """
+
+    def __init__(self, token_budget: int = 1500, boilerplate_pages: int = 3,
+                 max_tracked_blocks: int = 20000, max_tracked_pages: int = 2000):
+        self.token_budget = token_budget
+        self.boilerplate_pages = boilerplate_pages  # Seen on this many pages = boilerplate
+        self.max_tracked_blocks = max_tracked_blocks
+        self.max_tracked_pages = max_tracked_pages
+        self.tokens_saved = 0
+        self.requests = 0
+        self._seen = Counter()  # Block digest -> number of distinct pages it appeared on
+        self._pages: 'OrderedDict[str, Set[str]]' = OrderedDict()  # Page -> digests counted for it
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _blocks(text: str) -> List[str]:
+        blocks = (_WHITESPACE.sub(' ', line).strip() for line in text.splitlines())
+        return [block for block in blocks if block]
+
+    @staticmethod
+    def _digest(block: str) -> str:
+        return hashlib.blake2b(block.lower().encode('utf-8'), digest_size=8).hexdigest()
+
+    def _drop_repeats(self, blocks: List[str], page: str) -> List[str]:
+        digests = [self._digest(block) for block in blocks]
+        with self._lock:
+            counted = self._pages.pop(page, set())
+            # Other pages only: this page's own earlier visit must not make it boilerplate
+            common = {digest for digest in set(digests)
+                      if self._seen[digest] - (digest in counted) >= self.boilerplate_pages}
+            new = set(digests) - counted
+            self._seen.update(new)
+            self._pages[page] = counted | new
+            if len(self._pages) > self.max_tracked_pages:
+                self._pages.popitem(last=False)
+            if len(self._seen) > self.max_tracked_blocks:
+                self._seen = Counter(dict(self._seen.most_common(self.max_tracked_blocks // 2)))
+
+        kept, in_page = [], set()
+        for block, digest in zip(blocks, digests):
+            if digest in in_page:
+                continue
+            # Recurring options such as "A) True" are still part of the question
+            if digest in common and self.score(block) <= 0:
+                continue
+            in_page.add(digest)
+            kept.append(block)
+        return kept
+
+    @staticmethod
+    def score(block: str) -> float:
+        """How likely a block is to be (part of) a quiz question"""
+        words = len(block.split())
+        score = 0.0
+        if '?' in block:
+            score += 3
+        if _QUESTION_START.match(block):
+            score += 2
+        if _OPTION.match(block):
+            score += 2
+        if _BOILERPLATE.search(block):
+            score -= 3
+        if words <= 2:
+            score -= 1  # Menu items, buttons, breadcrumbs
+        elif words > 80:
+            score -= 1  # Long article prose
+        return score
+
+    def _rank(self, blocks: List[str]) -> List[float]:
+        scores = [self.score(block) for block in blocks]
+        # Options follow their question; lift blocks next to a likely question
+        ranked = list(scores)
+        for i, value in enumerate(scores):
+            if value >= 3:
+                for j in (i - 1, i + 1, i + 2):
+                    if 0 <= j < len(scores):
+                        ranked[j] = max(ranked[j], scores[j] + 1.5)
+        return ranked
+
+    def _fit(self, blocks: List[str]) -> List[str]:
+        costs = [estimate_tokens(block) + 1 for block in blocks]
+        if sum(costs) <= self.token_budget:
+            return blocks
+
+        ranks = self._rank(blocks)
+        order = sorted(range(len(blocks)), key=lambda i: (-ranks[i], i))
+        chosen, used = set(), 0
+        for i in order:
+            if used + costs[i] <= self.token_budget:
+                chosen.add(i)
+                used += costs[i]
+        return [block for i, block in enumerate(blocks) if i in chosen]
+
+    def compact(self, text: str, page: Optional[str] = None) -> CompactionResult:
+        """Compact one page's text; page identifies it (e.g. its URL), else the text does"""
+        before = estimate_tokens(text)
+        page = page or self._digest(text)
+        blocks = self._fit(self._drop_repeats(self._blocks(text), page))
+        compacted = '\n'.join(blocks)
+        result = CompactionResult(compacted, before, estimate_tokens(compacted))
+        with self._lock:
+            self.requests += 1
+            self.tokens_saved += result.tokens_saved
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'requests': self.requests, 'tokens_saved': self.tokens_saved}
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+from urllib.parse import urlsplit
+
+from src.utils.paths import user_data_dir
+from src.utils.web_scraper import WebScraper
+
+class HttpCache:
+    """On-disk store of validators and parsed results for fetched pages.
+
+    Only the ETag/Last-Modified validators and the extracted content are
+    kept, so a page answered with 304 Not Modified is neither downloaded
+    nor parsed again.
+    """
+
+    def __init__(self, directory: Optional[Union[str, Path]] = None):
+        self.directory = Path(directory) if directory else user_data_dir() / 'http_cache'
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url: str) -> Path:
+        return self.directory / (hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, url: str) -> Optional[dict]:
+        try:
+            with open(self._path(url), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], content: dict):
+        entry = {'url': url, 'etag': etag, 'last_modified': last_modified,
+                 'stored': time.time(), 'content': content}
+        path = self._path(url)
+        # A unique temp file per write, so concurrent writers of one URL never share it
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.directory,
+                                         prefix=path.stem, suffix='.tmp', delete=False) as f:
+            json.dump(entry, f)
+        try:
+            os.replace(f.name, path)  # Atomic, so concurrent readers never see half a file
+        except OSError:
+            os.unlink(f.name)
+            raise
+
+class CrawlStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.pages = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.bytes_fetched = 0
+        self._lock = threading.Lock()
+
+    def record(self, fetched_bytes: int = 0, cache_hit: bool = False, error: bool = False):
+        with self._lock:
+            self.pages += 1
+            self.bytes_fetched += fetched_bytes
+            self.cache_hits += cache_hit
+            self.errors += error
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            elapsed = time.perf_counter() - self.started
+            return {
+                'pages': self.pages,
+                'errors': self.errors,
+                'bytes_fetched': self.bytes_fetched,
+                'cache_hit_rate': self.cache_hits / self.pages if self.pages else 0.0,
+                'pages_per_second': self.pages / elapsed if elapsed > 0 else 0.0,
+            }
+
+class Crawler:
+    """Fetches many quiz pages concurrently with per-host limits and revalidation"""
+
+    def __init__(self, scraper: Optional[WebScraper] = None, cache: Optional[HttpCache] = None,
+                 max_workers: int = 8, per_host: int = 2):
+        self.scraper = scraper or WebScraper()
+        self.cache = cache or HttpCache()
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.stats = CrawlStats()
+        self._host_limits: Dict[str, threading.Semaphore] = {}
+        self._host_lock = threading.Lock()
+
+    def _host_limit(self, url: str) -> threading.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._host_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.Semaphore(self.per_host)
+            return self._host_limits[host]
+
+    def fetch_page(self, url: str) -> dict:
+        """Scrape one URL, revalidating a cached copy instead of refetching it"""
+        cached = self.cache.get(url)
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        with self._host_limit(url):
+            response = self.scraper.fetch(url, headers=headers, stream=True)
+            try:
+                if response.status_code == 304 and cached:
+                    self.stats.record(cache_hit=True)
+                    return {**cached['content'], 'cached': True}
+
+                response.raise_for_status()
+                received = [0]
+                content = self.scraper.parse_stream(self.scraper.count_bytes(response, received), url,
+                                                    encoding=response.encoding)
+            finally:
+                response.close()
+
+        self.cache.put(url, response.headers.get('ETag'), response.headers.get('Last-Modified'), content)
+        self.stats.record(fetched_bytes=received[0])
+        return {**content, 'cached': False}
+
+    def crawl(self, urls: Iterable[str]) -> Iterator[dict]:
+        """Yield one record per URL in completion order; errors are reported, not raised"""
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crawl") as executor:
+            futures = {executor.submit(self.fetch_page, url): (index, url)
+                       for index, url in enumerate(urls)}
+            for future in as_completed(futures):
+                index, url = futures[future]
+                try:
+                    yield {'index': index, **future.result()}
+                except Exception as e:
+                    self.stats.record(error=True)
+                    yield {'index': index, 'url': url, 'error': str(e)}
+
+    def sitemap_urls(self, sitemap_url: str) -> List[str]:
+        """Page URLs listed in a sitemap, following nested sitemap indexes"""
+        response = self.scraper.fetch(sitemap_url)
+        response.raise_for_status()
+        root = ET.fromstring(response.content)
+
+        urls = []
+        for element in root.iter():
+            if element.tag.endswith('}loc') or element.tag == 'loc':
+                urls.append(element.text.strip())
+        if root.tag.endswith('sitemapindex'):
+            nested = []
+            for url in urls:
+                nested.extend(self.sitemap_urls(url))
+            return nested
+        return urls
@@ -0,0 +1,348 @@
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Common selectors for quiz questions, highest priority first
+QUESTION_SELECTORS = [
+    '.question-text',
+    '.quiz-question',
+    '[data-testid="question"]',
+    '.mcq-question'
+]
+
+# Subtrees dropped as soon as they open: never matched, never part of the text
+SKIP_TAGS = frozenset(['script', 'style', 'nav', 'noscript', 'template', 'svg'])
+
+VOID_TAGS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                       'link', 'meta', 'param', 'source', 'track', 'wbr'])
+
+# Opening or closing one of these breaks the line in the fallback page text
+BLOCK_TAGS = frozenset(['address', 'article', 'aside', 'blockquote', 'br', 'button', 'dd', 'div',
+                        'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1',
+                        'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'label', 'li', 'main', 'ol',
+                        'option', 'p', 'pre', 'section', 'table', 'td', 'th', 'tr', 'ul'])
+
+# A question's options are read from the elements after it until one of these opens
+OPTION_STOP_TAGS = frozenset(['article', 'aside', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+                              'header', 'main', 'section'])
+
+# Opening one of these closes an unterminated sibling of the same kind (<p>a<p>b)
+SELF_CLOSING_SIBLINGS = frozenset(['p', 'li', 'dt', 'dd', 'tr', 'td', 'th', 'option'])
+
+_SIMPLE_SELECTOR = re.compile(
+    r'^(?P<tag>[a-zA-Z][\w-]*)?'
+    r'(?P<classes>(?:\.[\w-]+)*)'
+    r'(?:\[(?P<attr>[\w-]+)(?:=["\']?(?P<value>[^"\'\]]*)["\']?)?\])?$')
+
+class CompiledSelectors:
+    """A selector list compiled into one matcher that is checked per start tag.
+
+    Supports the simple forms used for quiz pages: tag, .class, tag.class,
+    [attr] and [attr="value"], alone or combined.
+    """
+
+    def __init__(self, selectors: List[str]):
+        self.rules: List[Tuple[Optional[str], frozenset, Optional[str], Optional[str]]] = []
+        for selector in selectors:
+            match = _SIMPLE_SELECTOR.match(selector.strip())
+            if not match:
+                raise ValueError(f"Unsupported selector: {selector}")
+            classes = frozenset(c for c in match.group('classes').split('.') if c)
+            tag = match.group('tag')
+            self.rules.append((tag.lower() if tag else None, classes,
+                               match.group('attr'), match.group('value')))
+
+    def match(self, tag: str, attrs: Dict[str, str]) -> Optional[int]:
+        """Index of the highest-priority selector matching this element"""
+        element_classes = None
+        for priority, (rule_tag, classes, attr, value) in enumerate(self.rules):
+            if rule_tag and rule_tag != tag:
+                continue
+            if classes:
+                if element_classes is None:
+                    element_classes = set((attrs.get('class') or '').split())
+                if not classes <= element_classes:
+                    continue
+            if attr and (attr not in attrs or (value is not None and attrs[attr] != value)):
+                continue
+            return priority
+        return None
+
+class _Capture:
+    def __init__(self, priority: int, depth: int):
+        self.priority = priority
+        self.depth = depth
+        self.parts: List[str] = []
+
+class QuizQuestion:
+    """One question element of a page with the answer options found with it"""
+
+    def __init__(self, number: int, text: str, options: List[str]):
+        self.number = number
+        self.text = text
+        self.options = options
+
+    def as_dict(self) -> Dict[str, object]:
+        return {'number': self.number, 'question': self.text, 'options': self.options}
+
+class _ExtractionTarget:
+    """Parser event sink (lxml target interface) doing extraction in one pass"""
+
+    stop_early = True  # Finish once the top-priority selector has been read
+
+    def __init__(self, selectors: CompiledSelectors, skip_tags: frozenset):
+        self.selectors = selectors
+        self.skip_tags = skip_tags
+        self.stack: List[str] = []
+        self.skip_depth: Optional[int] = None
+        self.active: List[_Capture] = []
+        self.matches: Dict[int, str] = {}
+        self.page_parts: List[str] = []
+        self.done = False  # Set once the top-priority selector is complete
+
+    def start(self, tag, attrib):
+        tag = tag.lower()
+        if tag in SELF_CLOSING_SIBLINGS and self.stack and self.stack[-1] == tag:
+            self.end(tag)
+        self.stack.append(tag)
+        if self.skip_depth is not None:
+            return
+        if tag in BLOCK_TAGS:
+            self.page_parts.append('\n')
+        if tag in self.skip_tags:
+            self.skip_depth = len(self.stack)
+            return
+        priority = self.selectors.match(tag, attrib)
+        self.opened(tag, priority)
+        if priority is not None and priority not in self.matches \
+                and all(c.priority != priority for c in self.active):
+            self.active.append(_Capture(priority, len(self.stack)))
+
+    def end(self, tag):
+        tag = tag.lower()
+        if tag not in self.stack:
+            return  # Stray end tag
+        # Implicitly close anything left open inside this element
+        while self.stack:
+            depth = len(self.stack)
+            closed = self.stack.pop()
+            skipped = self.skip_depth is not None
+            if self.skip_depth == depth:
+                self.skip_depth = None
+            for capture in [c for c in self.active if c.depth == depth]:
+                self.active.remove(capture)
+                self.matches[capture.priority] = ''.join(capture.parts).strip()
+                if capture.priority == 0 and self.stop_early:
+                    self.done = True
+            if not skipped:
+                self.closed(closed, depth)
+            if closed in BLOCK_TAGS and self.skip_depth is None:
+                self.page_parts.append('\n')
+            if closed == tag:
+                break
+
+    def data(self, text):
+        if self.skip_depth is not None:
+            return
+        for capture in self.active:
+            capture.parts.append(text)
+        self.page_parts.append(text)
+
+    def opened(self, tag: str, priority: Optional[int]):
+        """Hook: a non-skipped element opened; priority is its best selector match"""
+
+    def closed(self, tag: str, depth: int):
+        """Hook: a non-skipped element at stack depth `depth` closed"""
+
+    def close(self):
+        for capture in self.active:
+            self.matches.setdefault(capture.priority, ''.join(capture.parts).strip())
+        self.active = []
+        return self
+
+    def result(self) -> str:
+        for priority in sorted(self.matches):
+            if self.matches[priority]:
+                return self.matches[priority]
+        # If no specific selector worked, fall back to the page text
+        lines = (line.strip() for line in ''.join(self.page_parts).splitlines())
+        return '\n'.join(line for line in lines if line)
+
+def _lines(parts: List[str]) -> List[str]:
+    return [line for line in (' '.join(l.split()) for l in ''.join(parts).splitlines()) if line]
+
+class _QuestionBlock:
+    def __init__(self, depth: int):
+        self.depth = depth  # Stack depth of the question element itself
+        self.in_node = True  # Still inside the question element
+        self.node_parts: List[str] = []
+        self.option_parts: List[str] = []
+        self.option_chars = 0
+
+    def add(self, text: str, limit: int):
+        if self.in_node:
+            self.node_parts.append(text)
+        elif self.option_chars < limit:
+            self.option_parts.append(text)
+            self.option_chars += len(text)
+
+    def question(self, number: int, max_options: int,
+                 max_option_length: int) -> Optional[QuizQuestion]:
+        node = _lines(self.node_parts)
+        if not node:
+            return None
+        options = [line for line in _lines(self.option_parts)
+                   if len(line) <= max_option_length][:max_options]
+        if options:
+            return QuizQuestion(number, ' '.join(node), options)
+        # Options inside the question element itself (e.g. a nested list)
+        return QuizQuestion(number, node[0], node[1:max_options + 1])
+
+class _QuestionTarget(_ExtractionTarget):
+    """Also records every question element and the options that follow it.
+
+    Options are the lines after a question element inside the same
+    parent, up to the next question or a sectioning element. The whole
+    page is read, since more questions can follow any match.
+    """
+
+    stop_early = False
+
+    def __init__(self, selectors: CompiledSelectors, skip_tags: frozenset,
+                 max_options: int = 10, max_option_length: int = 200):
+        super().__init__(selectors, skip_tags)
+        self.max_options = max_options
+        self.max_option_length = max_option_length
+        self.option_chars = max_options * max_option_length  # Bound on text kept per question
+        self.blocks: Dict[int, List[_QuestionBlock]] = {}
+        self.collecting: Dict[int, _QuestionBlock] = {}  # Per priority, the block still reading
+
+    def opened(self, tag: str, priority: Optional[int]):
+        for key, block in list(self.collecting.items()):
+            if not block.in_node and (tag in OPTION_STOP_TAGS or key == priority):
+                del self.collecting[key]
+            elif tag in BLOCK_TAGS:
+                block.add('\n', self.option_chars)
+        if priority is not None and priority not in self.collecting:
+            block = _QuestionBlock(len(self.stack))
+            self.collecting[priority] = block
+            self.blocks.setdefault(priority, []).append(block)
+
+    def closed(self, tag: str, depth: int):
+        for key, block in list(self.collecting.items()):
+            if depth < block.depth:
+                del self.collecting[key]  # The question's parent closed
+                continue
+            if tag in BLOCK_TAGS:
+                block.add('\n', self.option_chars)
+            if block.in_node and depth == block.depth:
+                block.in_node = False
+
+    def data(self, text):
+        super().data(text)
+        if self.skip_depth is None:
+            for block in self.collecting.values():
+                block.add(text, self.option_chars)
+
+    def questions(self) -> List[QuizQuestion]:
+        """Questions of the highest-priority selector that matched anything"""
+        for priority in sorted(self.blocks):
+            questions = []
+            for block in self.blocks[priority]:
+                question = block.question(len(questions) + 1, self.max_options,
+                                          self.max_option_length)
+                if question:
+                    questions.append(question)
+            if questions:
+                return questions
+        return []
+
+class _StdlibParser(HTMLParser):
+    """Feeds html.parser events into an _ExtractionTarget"""
+
+    def __init__(self, target: _ExtractionTarget):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, {name: value or '' for name, value in attrs})
+        if tag in VOID_TAGS:
+            self.target.end(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag, {name: value or '' for name, value in attrs})
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in VOID_TAGS:
+            self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+def _available_backend() -> str:
+    try:
+        import lxml.etree  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+class HtmlExtractor:
+    """Single-pass, streaming quiz text extraction.
+
+    Uses lxml's incremental parser when installed and html.parser
+    otherwise. Script, style and navigation subtrees are dropped as they
+    open, every selector is checked in the same pass, and parsing stops
+    early once the highest-priority selector has been read completely.
+    """
+
+    def __init__(self, selectors: Optional[List[str]] = None, skip_tags: frozenset = SKIP_TAGS,
+                 backend: str = 'auto'):
+        self.selectors = CompiledSelectors(selectors or QUESTION_SELECTORS)
+        self.skip_tags = skip_tags
+        self.backend = _available_backend() if backend == 'auto' else backend
+
+    def _parser(self, target: _ExtractionTarget):
+        if self.backend == 'lxml':
+            from lxml import etree
+            return etree.HTMLParser(target=target, remove_comments=True, recover=True)
+        return _StdlibParser(target)
+
+    def extract(self, html: str) -> str:
+        return self.extract_stream([html])
+
+    def extract_stream(self, chunks: Iterable[Union[str, bytes]],
+                       encoding: Optional[str] = None) -> str:
+        """Extract from an iterable of chunks; bytes are decoded incrementally"""
+        target = _ExtractionTarget(self.selectors, self.skip_tags)
+        return self._run(target, chunks, encoding).result()
+
+    def extract_questions(self, chunks: Iterable[Union[str, bytes]],
+                          encoding: Optional[str] = None) -> Tuple[str, List[QuizQuestion]]:
+        """extract_stream()'s text plus every question on the page, with its options"""
+        target = _QuestionTarget(self.selectors, self.skip_tags)
+        self._run(target, chunks, encoding)
+        return target.result(), target.questions()
+
+    def _run(self, target: _ExtractionTarget, chunks: Iterable[Union[str, bytes]],
+             encoding: Optional[str]) -> _ExtractionTarget:
+        parser = self._parser(target)
+        decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+
+        for chunk in chunks:
+            if isinstance(chunk, bytes):
+                chunk = decoder.decode(chunk)
+            if chunk:
+                parser.feed(chunk)
+            if target.done:
+                break
+        else:
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                parser.feed(tail)
+
+        parser.close()
+        if self.backend != 'lxml':
+            target.close()
+        return target
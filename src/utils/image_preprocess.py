@@ -0,0 +1,161 @@
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+class PreprocessProfile:
+    """Settings for one preprocessing profile; see PROFILES"""
+
+    def __init__(self, name: str, threshold: bool = True, block_size: int = 31,
+                 offset: float = 10.0, deskew: bool = False, max_skew: float = 5.0,
+                 target_text_height: int = 32, max_scale: float = 3.0, crop: bool = True,
+                 margin: int = 8, denoise: bool = True):
+        self.name = name
+        self.threshold = threshold  # Adaptive (local mean) binarization
+        self.block_size = block_size  # Side of the local window, in pixels
+        self.offset = offset  # How much darker than its surroundings ink must be
+        self.deskew = deskew
+        self.max_skew = max_skew  # Degrees searched either side of horizontal
+        self.target_text_height = target_text_height  # Line height tesseract reads best
+        self.max_scale = max_scale
+        self.crop = crop  # Crop to the text-bearing region
+        self.margin = margin
+        self.denoise = denoise  # Ignore isolated specks (noise, JPEG artifacts)
+
+PROFILES: Dict[str, PreprocessProfile] = {
+    # Grayscale only: what tesseract would do itself, minus the RGBA->RGB copy
+    'none': PreprocessProfile('none', threshold=False, target_text_height=0, crop=False,
+                              denoise=False),
+    # Cheap cleanup for crisp UI text
+    'fast': PreprocessProfile('fast', target_text_height=0, denoise=False),
+    'default': PreprocessProfile('default'),
+    # Photographed or rotated pages
+    'quality': PreprocessProfile('quality', deskew=True, block_size=41, target_text_height=40,
+                                 max_scale=4.0),
+}
+
+def to_grayscale(image: Image.Image) -> np.ndarray:
+    """Luminance as a uint8 array, compositing transparency onto white"""
+    if image.mode in ('RGBA', 'LA', 'P') and (image.mode != 'P' or 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        if rgba.getchannel('A').getextrema()[0] < 255:
+            rgba = Image.alpha_composite(Image.new('RGBA', rgba.size, 'white'), rgba)
+        image = rgba
+    return np.asarray(image.convert('L'))
+
+def normalize_polarity(gray: np.ndarray) -> np.ndarray:
+    """Make text dark on light; dark-mode captures are inverted"""
+    # A strided sample is plenty to tell the background shade
+    return 255 - gray if np.median(gray[::4, ::4]) < 128 else gray
+
+def box_mean(gray: np.ndarray, size: int) -> np.ndarray:
+    """Mean of the size x size window around each pixel (uint8 in, uint8 out)"""
+    return np.asarray(Image.fromarray(gray).filter(ImageFilter.BoxBlur(size // 2)))
+
+def adaptive_threshold(gray: np.ndarray, block_size: int, offset: float) -> np.ndarray:
+    """Boolean ink mask: pixels darker than their local mean by more than offset"""
+    local = box_mean(gray, block_size | 1).astype(np.int16)
+    return gray.astype(np.int16) < local - offset
+
+def despeckle(ink: np.ndarray) -> np.ndarray:
+    """Drop ink pixels with fewer than two inked neighbours"""
+    return ink & (box_mean(ink.astype(np.uint8) * 255, 3) > 255 * 2.5 / 9)
+
+def _inked(counts: np.ndarray, length: int) -> np.ndarray:
+    """Profile entries holding more ink than stray specks would"""
+    return counts >= max(3, length // 400)
+
+def text_bbox(ink: np.ndarray, margin: int) -> Optional[Tuple[int, int, int, int]]:
+    """(left, top, right, bottom) of the ink found through projection profiles"""
+    h, w = ink.shape
+    rows = np.flatnonzero(_inked(ink.sum(axis=1), w))
+    cols = np.flatnonzero(_inked(ink.sum(axis=0), h))
+    if not len(rows) or not len(cols):
+        return None
+    return (max(cols[0] - margin, 0), max(rows[0] - margin, 0),
+            min(cols[-1] + margin + 1, w), min(rows[-1] + margin + 1, h))
+
+def text_line_height(ink: np.ndarray) -> float:
+    """Median height of the runs of inked rows in the horizontal profile"""
+    rows = _inked(ink.sum(axis=1), ink.shape[1])
+    inked = np.concatenate(([False], rows, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(inked))
+    heights = edges[1::2] - edges[0::2]
+    heights = heights[heights > 2]  # Underlines and specks
+    return float(np.median(heights)) if len(heights) else 0.0
+
+def estimate_skew(ink: np.ndarray, max_angle: float, step: float = 0.5) -> float:
+    """Angle whose horizontal projection has the sharpest line/gap contrast"""
+    mask = Image.fromarray(ink.astype(np.uint8) * 255)
+    # Search on a downsampled copy; a few hundred pixels is plenty to find lines
+    scale = min(1.0, 600 / max(mask.size))
+    if scale < 1.0:
+        mask = mask.resize((max(int(mask.width * scale), 1), max(int(mask.height * scale), 1)))
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-max_angle, max_angle + step / 2, step):
+        rotated = np.asarray(mask.rotate(float(angle), resample=Image.NEAREST, expand=True))
+        score = float(np.var(rotated.sum(axis=1, dtype=np.float64)))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+class ImagePreprocessor:
+    """Cleans up a capture before OCR so tesseract sees fewer, cleaner pixels.
+
+    Converts to grayscale, fixes dark-mode polarity, crops to the text
+    region, optionally deskews, upscales small text towards the line
+    height tesseract reads best and binarizes with a local-mean threshold.
+    """
+
+    def __init__(self, profile: str = 'default'):
+        self.profile = PROFILES[profile]
+
+    def process(self, image: Image.Image) -> Image.Image:
+        profile = self.profile
+        gray = normalize_polarity(to_grayscale(image))
+        if not (profile.threshold or profile.crop or profile.target_text_height or profile.deskew):
+            return Image.fromarray(gray)
+
+        # Layout (crop, skew, line height) is read from a smoothed, despeckled mask
+        smooth = box_mean(gray, 3) if profile.denoise else gray
+        ink = adaptive_threshold(smooth, profile.block_size, profile.offset)
+        if profile.denoise:
+            ink = despeckle(ink)
+        if profile.crop:
+            bbox = text_bbox(ink, profile.margin)
+            if bbox:
+                left, top, right, bottom = bbox
+                gray, ink = gray[top:bottom, left:right], ink[top:bottom, left:right]
+
+        result = Image.fromarray(gray)
+        layout = Image.fromarray(ink.astype(np.uint8) * 255)
+        if profile.deskew:
+            angle = estimate_skew(ink, profile.max_skew)
+            if angle:
+                result = result.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+                layout = layout.rotate(angle, resample=Image.NEAREST, expand=True, fillcolor=0)
+
+        scale = 1.0
+        if profile.target_text_height:
+            height = text_line_height(np.asarray(layout) > 0)
+            if height and profile.target_text_height / height > 1.2:
+                scale = min(profile.target_text_height / height, profile.max_scale)
+                size = (round(result.width * scale), round(result.height * scale))
+                result = result.resize(size, Image.LANCZOS)
+                layout = layout.resize(size, Image.NEAREST)
+
+        if not profile.threshold:
+            return result
+        # Binarize after scaling so strokes stay smooth; grow the window to match
+        gray = np.asarray(result)
+        ink = adaptive_threshold(gray, round(profile.block_size * scale), profile.offset)
+        if profile.denoise:
+            # Keep only ink close to strokes that survived despeckling
+            near = box_mean(np.asarray(layout), (round(2 * scale) | 1) + 2) > 0
+            ink &= near
+        return Image.fromarray(np.where(ink, 0, 255).astype(np.uint8))
+
+def create_preprocessor(profile: Optional[str] = None) -> ImagePreprocessor:
+    """QUIZ_HELPER_OCR_PROFILE picks the profile when none is given"""
+    return ImagePreprocessor(profile or os.getenv('QUIZ_HELPER_OCR_PROFILE', 'default'))
@@ -0,0 +1,98 @@
+import os
+import queue
+import threading
+from typing import Optional
+
+class OcrEngine:
+    """Turns a PIL image into text. Implementations must be thread-safe."""
+
+    name = "base"
+
+    def image_to_string(self, image) -> str:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class TesserocrEngine(OcrEngine):
+    """Keeps warmed-up tesseract API handles in process.
+
+    Language data is loaded once per handle and images are handed over
+    as in-memory buffers, so a capture costs only the recognition itself.
+    Each handle serves one call at a time; `handles` sets how many
+    captures can be recognized concurrently.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str = 'eng', handles: int = 1, tessdata_path: Optional[str] = None):
+        import tesserocr  # Optional dependency; raises ImportError when missing
+
+        kwargs = {'lang': lang}
+        if tessdata_path:
+            kwargs['path'] = tessdata_path
+        self._apis = queue.Queue()
+        for _ in range(handles):
+            self._apis.put(tesserocr.PyTessBaseAPI(**kwargs))
+
+    def image_to_string(self, image) -> str:
+        api = self._apis.get()
+        try:
+            api.SetImage(image)
+            return api.GetUTF8Text()
+        finally:
+            self._apis.put(api)
+
+    def close(self):
+        while not self._apis.empty():
+            self._apis.get_nowait().End()
+
+class PytesseractEngine(OcrEngine):
+    """Fallback that runs the tesseract executable once per image"""
+
+    name = "pytesseract"
+
+    def __init__(self, lang: str = 'eng'):
+        import pytesseract
+
+        self._pytesseract = pytesseract
+        self.lang = lang
+        tesseract_path = os.getenv('TESSERACT_PATH')
+        if tesseract_path:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_path
+
+    def image_to_string(self, image) -> str:
+        return self._pytesseract.image_to_string(image, lang=self.lang)
+
+ENGINES = {
+    TesserocrEngine.name: TesserocrEngine,
+    PytesseractEngine.name: PytesseractEngine,
+}
+
+def create_ocr_engine(backend: str = 'auto', **kwargs) -> OcrEngine:
+    """Build an OCR engine; 'auto' prefers the in-process tesserocr backend"""
+    if backend != 'auto':
+        return ENGINES[backend](**kwargs)
+    try:
+        return TesserocrEngine(**kwargs)
+    except (ImportError, RuntimeError):
+        # tesserocr missing or unable to load language data
+        return PytesseractEngine(lang=kwargs.get('lang', 'eng'))
+
+_shared_engine: Optional[OcrEngine] = None
+_shared_lock = threading.Lock()
+
+def get_ocr_engine() -> OcrEngine:
+    """Return the process-wide OCR engine, warming it up on first use.
+
+    QUIZ_HELPER_OCR selects the backend ('auto', 'tesserocr' or 'pytesseract');
+    setting QUIZ_HELPER_OCR_TILED=1 splits tall captures across all cores.
+    """
+    global _shared_engine
+    with _shared_lock:
+        if _shared_engine is None:
+            _shared_engine = create_ocr_engine(os.getenv('QUIZ_HELPER_OCR', 'auto'))
+            if os.getenv('QUIZ_HELPER_OCR_TILED', '') not in ('', '0'):
+                from src.utils.tiled_ocr import TiledOcrEngine
+                _shared_engine = TiledOcrEngine(_shared_engine)
+        return _shared_engine
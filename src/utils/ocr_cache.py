@@ -0,0 +1,166 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from src.utils.tracing import get_tracer
+
+THUMBNAIL_SIZE = (512, 192)  # ~96 KB per entry
+
+def dhash(image: Image.Image, hash_size: int = 16) -> np.ndarray:
+    """Difference hash as packed bits: is each cell brighter than its right neighbour?"""
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.BOX)
+    pixels = np.asarray(small, dtype=np.int16)
+    return np.packbits(pixels[:, 1:] > pixels[:, :-1])
+
+def thumbnail(image: Image.Image) -> np.ndarray:
+    return np.asarray(image.convert('L').resize(THUMBNAIL_SIZE, Image.BOX))
+
+def max_cell_difference(a: np.ndarray, b: np.ndarray, cell: int = 8) -> float:
+    """Largest mean absolute difference over cell x cell blocks of two thumbnails"""
+    diff = np.abs(a.astype(np.int16) - b.astype(np.int16))
+    h, w = diff.shape
+    return float(diff.reshape(h // cell, cell, w // cell, cell).mean(axis=(1, 3)).max())
+
+class OcrKey:
+    def __init__(self, image: Image.Image, hash_size: int):
+        self.bits = dhash(image, hash_size)
+        self.aspect = image.width / max(image.height, 1)
+        self.thumbnail = thumbnail(image)
+
+class OcrCache:
+    """Recognized text keyed by perceptual hash, with a Hamming tolerance.
+
+    Keys should be computed on the preprocessed capture: it is cropped to
+    its text, so re-capturing the same region or a slightly shifted one
+    gives (nearly) the same image. Hashes within `max_distance` bits are
+    candidates; a candidate is only a hit if no 8x8 block of its
+    thumbnail differs by more than `max_cell_difference`, because quiz
+    pages that differ by one word hash almost identically. Entries are
+    evicted least recently used first.
+    """
+
+    def __init__(self, max_entries: int = 128, max_distance: int = 8, hash_size: int = 16,
+                 max_cell_difference: float = 4.0, max_aspect_change: float = 0.05):
+        self.max_entries = max_entries
+        self.max_distance = max_distance  # Out of hash_size ** 2 bits
+        self.hash_size = hash_size
+        self.max_cell_difference = max_cell_difference  # Grey levels, 0-255
+        self.max_aspect_change = max_aspect_change
+        self._entries: "OrderedDict[int, Tuple[OcrKey, str]]" = OrderedDict()
+        self._next_id = 0
+        self._matrix = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0  # Hits on a hash that was close but not identical
+        self.misses = 0
+
+    def key(self, image: Image.Image) -> OcrKey:
+        return OcrKey(image, self.hash_size)
+
+    def _index(self):
+        # Stacked hashes for one vectorized Hamming pass; rebuilt after changes
+        if self._matrix is None:
+            self._ids = list(self._entries)
+            keys = [key for key, _ in self._entries.values()]
+            self._matrix = np.array([key.bits for key in keys], dtype=np.uint8)
+            self._aspects = np.array([key.aspect for key in keys])
+        return self._ids, self._matrix, self._aspects
+
+    def _match(self, key: OcrKey) -> Optional[Tuple[int, int]]:
+        ids, matrix, aspects = self._index()
+        distances = np.unpackbits(matrix ^ key.bits, axis=1).sum(axis=1)
+        distances[np.abs(aspects - key.aspect) > self.max_aspect_change * key.aspect] = 1 << 30
+        for i in np.argsort(distances, kind='stable'):
+            if distances[i] > self.max_distance:
+                break
+            candidate, _ = self._entries[ids[i]]
+            if max_cell_difference(candidate.thumbnail, key.thumbnail) <= self.max_cell_difference:
+                return ids[i], int(distances[i])
+        return None
+
+    def get(self, key: OcrKey) -> Optional[str]:
+        with self._lock:
+            match = self._match(key) if self._entries else None
+            if match is None:
+                self.misses += 1
+                return None
+            entry_id, distance = match
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            self.near_hits += distance > 0
+            return self._entries[entry_id][1]
+
+    def put(self, key: OcrKey, text: str):
+        with self._lock:
+            self._entries[self._next_id] = (key, text)
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def recognize(self, image: Image.Image, ocr: Callable[[Image.Image], str]) -> str:
+        """Cached text for image, running ocr(image) on a miss"""
+        key = self.key(image)
+        text = self.get(key)
+        if text is None:
+            text = ocr(image)
+            self.put(key, text)
+        return text
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'entries': len(self._entries), 'hits': self.hits, 'near_hits': self.near_hits,
+                    'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def summary(self) -> str:
+        """Short hit/miss text for status bars"""
+        stats = self.stats()
+        return f"OCR cache {stats['hits']} hits / {stats['misses']} misses"
+
+class OcrRun:
+    """Text read from one image, whether the OCR cache had it, and stage timings (ms)"""
+
+    def __init__(self, text: str, cached: bool, timings: Dict[str, float]):
+        self.text = text
+        self.cached = cached
+        self.timings = timings
+
+def read_image(image: Image.Image, preprocessor, ocr: Callable[[Image.Image], str],
+               cache: OcrCache) -> OcrRun:
+    """Preprocess image and OCR it through cache, tracing both stages"""
+    tracer = get_tracer()
+    with tracer.span('preprocess', pixels=image.width * image.height) as span:
+        cleaned = preprocessor.process(image)
+    timings = {'preprocess': span.duration_ms}
+
+    with tracer.span('ocr', pixels=cleaned.width * cleaned.height) as span:
+        key = cache.key(cleaned)
+        text = cache.get(key)
+        cached = text is not None
+        if not cached:
+            text = ocr(cleaned)
+            cache.put(key, text)
+        text = text.strip()
+        span.set(cached=cached, chars=len(text))
+    timings['ocr'] = span.duration_ms
+    return OcrRun(text, cached, timings)
+
+_shared_cache: Optional[OcrCache] = None
+_shared_lock = threading.Lock()
+
+def get_ocr_cache() -> OcrCache:
+    """Return the process-wide OCR result cache"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = OcrCache()
+        return _shared_cache
@@ -0,0 +1,23 @@
+import os
+import sys
+from pathlib import Path
+
+APP_DIR_NAME = "QuizHelper"
+
+def user_data_dir() -> Path:
+    """Per-user directory for caches and indexes, created on first use.
+
+    QUIZ_HELPER_DATA_DIR overrides the platform default.
+    """
+    override = os.getenv('QUIZ_HELPER_DATA_DIR')
+    if override:
+        path = Path(override)
+    elif sys.platform == 'win32':
+        path = Path(os.getenv('LOCALAPPDATA', Path.home() / 'AppData' / 'Local')) / APP_DIR_NAME
+    elif sys.platform == 'darwin':
+        path = Path.home() / 'Library' / 'Application Support' / APP_DIR_NAME
+    else:
+        path = Path(os.getenv('XDG_DATA_HOME', Path.home() / '.local' / 'share')) / APP_DIR_NAME.lower()
+
+    path.mkdir(parents=True, exist_ok=True)
+    return path
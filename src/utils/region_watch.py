@@ -0,0 +1,146 @@
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from src.utils.screenshot import ScreenshotTool
+
+BBox = Tuple[int, int, int, int]
+
+class FrameDiffer:
+    """Cheap change detection on downsampled grayscale frames.
+
+    A changed quiz question can touch well under 0.1% of a region, about
+    as much as a blinking cursor, so the defaults are sensitive; frames
+    that pass but carry the same text are filtered after OCR.
+    """
+
+    def __init__(self, step: int = 4, pixel_delta: int = 12, threshold: float = 0.0001):
+        self.step = step  # Downsampling factor per side
+        self.pixel_delta = pixel_delta  # Grey levels a sample must move to count as changed
+        self.threshold = threshold  # Fraction of changed samples that counts as new content
+
+    def signature(self, image: Image.Image) -> np.ndarray:
+        small = image.reduce(self.step) if min(image.size) >= self.step else image
+        return np.asarray(small.convert('L'), dtype=np.int16)
+
+    def difference(self, previous: Optional[np.ndarray], current: np.ndarray) -> float:
+        """Fraction of samples that changed; 1.0 when there is nothing to compare against"""
+        if previous is None or previous.shape != current.shape:
+            return 1.0
+        return float(np.count_nonzero(np.abs(current - previous) > self.pixel_delta)) / current.size
+
+    def changed(self, previous: Optional[np.ndarray], current: np.ndarray) -> bool:
+        return self.difference(previous, current) > self.threshold
+
+class WatchStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.frames = 0
+        self.processed = 0
+        self.skipped = 0  # Unchanged frames that never reached OCR
+        self.errors = 0
+        self.grab_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, grab_ms: float, processed: bool = False, error: bool = False):
+        with self._lock:
+            self.frames += 1
+            self.grab_ms += grab_ms
+            self.processed += processed
+            self.skipped += not processed and not error
+            self.errors += error
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            elapsed = time.perf_counter() - self.started
+            return {
+                'frames': self.frames,
+                'processed': self.processed,
+                'skipped': self.skipped,
+                'errors': self.errors,
+                'fps': self.frames / elapsed if elapsed > 0 else 0.0,
+                'mean_grab_ms': self.grab_ms / self.frames if self.frames else 0.0,
+            }
+
+    def summary(self) -> str:
+        stats = self.as_dict()
+        return (f"watch {stats['processed']} processed / {stats['skipped']} skipped "
+                f"of {stats['frames']} frames, {stats['fps']:.1f} fps")
+
+class RegionWatcher:
+    """Grabs one screen region at a fixed rate and reacts only to real changes.
+
+    Each frame is compared with the last frame that was processed, so
+    slow changes (fades, typing) still add up to a change. on_change runs
+    on the watcher thread; no frames are grabbed while it is busy, so OCR
+    and analysis never queue up behind the capture loop.
+    """
+
+    def __init__(self, bbox: BBox, on_change: Callable[[Image.Image], None],
+                 screenshot_tool: Optional[ScreenshotTool] = None, fps: float = 2.0,
+                 threshold: float = 0.0001, differ: Optional[FrameDiffer] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        self.bbox = bbox
+        self.on_change = on_change
+        self.on_error = on_error
+        self.screenshot_tool = screenshot_tool or ScreenshotTool()
+        self.fps = fps
+        self.differ = differ or FrameDiffer(threshold=threshold)
+        self.stats = WatchStats()
+        self._reference: Optional[np.ndarray] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._reference = None
+        self.stats = WatchStats()
+        self._thread = threading.Thread(target=self._run, name="region-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def poll(self) -> bool:
+        """Grab and check one frame; True when it was handed to on_change"""
+        started = time.perf_counter()
+        try:
+            image = self.screenshot_tool.take_screenshot(self.bbox)
+        except Exception as e:
+            self.stats.record(0.0, error=True)
+            if self.on_error:
+                self.on_error(e)
+            return False
+        grab_ms = (time.perf_counter() - started) * 1000
+
+        signature = self.differ.signature(image)
+        if not self.differ.changed(self._reference, signature):
+            self.stats.record(grab_ms)
+            return False
+
+        self._reference = signature
+        self.stats.record(grab_ms, processed=True)
+        try:
+            self.on_change(image)
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
+        return True
+
+    def _run(self):
+        interval = 1.0 / self.fps
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            self.poll()
+            self._stop.wait(max(0.0, interval - (time.perf_counter() - started)))
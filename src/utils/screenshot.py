@@ -1,15 +1,65 @@
-from PIL import ImageGrab
+from PIL import Image, ImageGrab
+import threading
 import tkinter as tk
 from typing import Tuple, Optional
+from src.utils.image_preprocess import ImagePreprocessor, create_preprocessor
+from src.utils.ocr import OcrEngine, get_ocr_engine
+from src.utils.ocr_cache import OcrCache, get_ocr_cache, read_image
+from src.utils.tracing import get_tracer
 
 class ScreenshotTool:
-    def __init__(self):
+    def __init__(self, ocr_engine: Optional[OcrEngine] = None,
+                 preprocessor: Optional[ImagePreprocessor] = None,
+                 ocr_cache: Optional[OcrCache] = None, backend: str = 'auto'):
         self.start_pos = None
         self.end_pos = None
         self.overlay_window = None
+        self._ocr_engine = ocr_engine
+        self.preprocessor = preprocessor or create_preprocessor()
+        self.ocr_cache = ocr_cache or get_ocr_cache()  # Repeat captures skip OCR
+        # mss grabs a region several times faster than ImageGrab; optional dependency
+        self.backend = backend
+        if backend == 'auto':
+            try:
+                import mss  # noqa: F401
+                self.backend = 'mss'
+            except ImportError:
+                self.backend = 'pil'
+        self._local = threading.local()  # mss handles must stay on their own thread
+
+    @property
+    def ocr_engine(self) -> OcrEngine:
+        # Resolved lazily so capture-only users never load tesseract
+        if self._ocr_engine is None:
+            self._ocr_engine = get_ocr_engine()
+        return self._ocr_engine
 
     def take_screenshot(self, bbox: Optional[Tuple[int, int, int, int]] = None):
-        return ImageGrab.grab(bbox=bbox)
+        with get_tracer().span('capture', backend=self.backend) as span:
+            image = self._grab_mss(bbox) if self.backend == 'mss' else ImageGrab.grab(bbox=bbox)
+            span.set(pixels=image.width * image.height)
+        return image
+
+    def _grab_mss(self, bbox):
+        sct = getattr(self._local, 'mss', None)
+        if sct is None:
+            import mss
+            sct = self._local.mss = mss.mss()
+        if bbox:
+            x1, y1, x2, y2 = bbox
+            region = {'left': x1, 'top': y1, 'width': x2 - x1, 'height': y2 - y1}
+        else:
+            region = sct.monitors[0]  # All monitors, like ImageGrab.grab()
+        shot = sct.grab(region)
+        return Image.frombytes('RGB', shot.size, shot.bgra, 'raw', 'BGRX')
+
+    def extract_text(self, image) -> str:
+        return read_image(image, self.preprocessor, self.ocr_engine.image_to_string,
+                          self.ocr_cache).text
+
+    def capture_text(self, bbox: Optional[Tuple[int, int, int, int]] = None) -> str:
+        """Capture a region and return the text recognized in it"""
+        return self.extract_text(self.take_screenshot(bbox))
 
 class ScreenshotSelector:
     def __init__(self, parent):
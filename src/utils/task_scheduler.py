@@ -0,0 +1,211 @@
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+# Lower runs first
+INTERACTIVE = 0
+BACKGROUND = 10
+
+class TaskCancelled(Exception):
+    """Raised by TaskHandle.result() for a cancelled task"""
+
+class TaskHandle:
+    """Tracks one scheduled call: its state, result and timings"""
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict, priority: int, key: Optional[str]):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.key = key
+        self.submitted = time.perf_counter()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._result = None
+        self._error: Optional[BaseException] = None
+        self._callbacks: List[Callable[['TaskHandle'], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Cancel the task; a running task sees `cancelled` and should stop early"""
+        self._cancelled.set()
+        if self.started is None:
+            self._finish(None, TaskCancelled())
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        if not self._done.wait(timeout):
+            raise TimeoutError("Task did not finish in time")
+        if self._error:
+            raise self._error
+        return self._result
+
+    def add_done_callback(self, callback: Callable[['TaskHandle'], None]):
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish(self, result, error):
+        with self._lock:
+            if self._done.is_set():
+                return
+            self.finished = time.perf_counter()
+            self._result, self._error = result, error
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+_local = threading.local()
+
+def current_task() -> Optional[TaskHandle]:
+    """Handle of the task running on this worker thread, if any"""
+    return getattr(_local, 'task', None)
+
+class TaskScheduler:
+    """Bounded worker pool with priorities, supersession and timed shutdown.
+
+    Tasks submitted with the same `key` supersede each other: the older
+    one is cancelled, so re-analyzing never leaves stale work queued.
+    submit() is call-compatible with concurrent.futures.Executor.submit.
+    """
+
+    def __init__(self, max_workers: int = 4, history: int = 256):
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, TaskHandle] = {}
+        self._waits = deque(maxlen=history)
+        self._latencies = deque(maxlen=history)
+        self._running = 0
+        self._completed = 0
+        self._cancelled = 0
+        self._closed = False
+        self._workers = [threading.Thread(target=self._worker, name=f"scheduler-{i}", daemon=True)
+                         for i in range(max_workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, fn: Callable, *args, priority: int = INTERACTIVE,
+               key: Optional[str] = None, **kwargs) -> TaskHandle:
+        handle = TaskHandle(fn, args, kwargs, priority, key)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Scheduler has been shut down")
+            if key:
+                previous = self._by_key.get(key)
+                if previous and not previous.done():
+                    previous.cancel()
+                self._by_key[key] = handle
+        self._queue.put((priority, next(self._sequence), handle))
+        return handle
+
+    def cancel(self, key: str):
+        with self._lock:
+            handle = self._by_key.get(key)
+        if handle:
+            handle.cancel()
+
+    def _worker(self):
+        while True:
+            _, _, handle = self._queue.get()
+            if handle is None:  # Shutdown sentinel
+                return
+            if handle.cancelled:
+                self._record(handle, cancelled=True)
+                continue
+
+            handle.started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+            _local.task = handle
+            try:
+                handle._finish(handle.fn(*handle.args, **handle.kwargs), None)
+            except BaseException as e:
+                handle._finish(None, e)
+            finally:
+                _local.task = None
+                with self._lock:
+                    self._running -= 1
+                self._record(handle, cancelled=handle.cancelled)
+
+    def _record(self, handle: TaskHandle, cancelled: bool):
+        with self._lock:
+            if handle.key and self._by_key.get(handle.key) is handle:
+                del self._by_key[handle.key]
+            if cancelled:
+                self._cancelled += 1
+                return
+            self._completed += 1
+            self._waits.append((handle.started - handle.submitted) * 1000)
+            self._latencies.append((handle.finished - handle.submitted) * 1000)
+
+    @staticmethod
+    def _percentile(values, fraction: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            waits, latencies = list(self._waits), list(self._latencies)
+            return {
+                'queue_depth': self._queue.qsize(),
+                'running': self._running,
+                'completed': self._completed,
+                'cancelled': self._cancelled,
+                'wait_p50_ms': self._percentile(waits, 0.5),
+                'latency_p50_ms': self._percentile(latencies, 0.5),
+                'latency_p95_ms': self._percentile(latencies, 0.95),
+            }
+
+    def summary(self) -> str:
+        """Short queue/latency text for status bars"""
+        stats = self.stats()
+        return (f"queue {stats['queue_depth']}, task p50 {stats['latency_p50_ms']:.0f} ms / "
+                f"p95 {stats['latency_p95_ms']:.0f} ms")
+
+    def shutdown(self, deadline: float = 2.0):
+        """Cancel queued work and wait up to `deadline` seconds for running tasks"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        while True:
+            try:
+                _, _, handle = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if handle:
+                handle.cancel()
+        for _ in self._workers:
+            self._queue.put((float('inf'), next(self._sequence), None))
+
+        end = time.monotonic() + deadline
+        for worker in self._workers:
+            worker.join(timeout=max(end - time.monotonic(), 0))
+
+_shared_scheduler: Optional[TaskScheduler] = None
+_shared_lock = threading.Lock()
+
+def get_scheduler() -> TaskScheduler:
+    """Return the scheduler shared by every window of the app"""
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = TaskScheduler()
+        return _shared_scheduler
@@ -0,0 +1,156 @@
+import difflib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from src.utils.ocr import OcrEngine, create_ocr_engine
+
+Band = Tuple[int, int]
+
+def find_bands(ink_rows: np.ndarray, count: int, min_gap: int = 3, overlap: int = 40) -> List[Band]:
+    """Split rows [0, len) into about `count` bands, cutting in whitespace.
+
+    ink_rows holds the amount of ink per row. Each cut goes to the middle
+    of the whitespace gap closest to the ideal position; when no gap is
+    near, the cut goes through the text and both bands extend `overlap`
+    rows past it so every line is read whole at least once.
+    """
+    height = len(ink_rows)
+    if count <= 1 or height < 2 * count:
+        return [(0, height)]
+
+    # Centres of runs of at least min_gap blank rows
+    blank = np.concatenate(([False], ink_rows == 0, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(blank))
+    starts, ends = edges[0::2], edges[1::2]
+    keep = (ends - starts) >= min_gap
+    gaps = ((starts[keep] + ends[keep]) // 2)
+    gaps = gaps[(gaps > 0) & (gaps < height)]
+
+    window = height / count / 2  # How far a cut may move to find whitespace
+    bands, top = [], 0
+    for i in range(1, count):
+        ideal = height * i / count
+        nearby = gaps[np.abs(gaps - ideal) <= window] if len(gaps) else gaps
+        if len(nearby):
+            cut = int(nearby[np.abs(nearby - ideal).argmin()])
+            if cut <= top:
+                continue
+            bands.append((top, cut))
+            top = cut
+        else:
+            cut = int(ideal)
+            if cut <= top:
+                continue
+            bands.append((top, min(cut + overlap, height)))
+            top = max(cut - overlap, top + 1)
+    bands.append((top, height))
+    return bands
+
+def _similar(a: str, b: str) -> bool:
+    a, b = ' '.join(a.split()), ' '.join(b.split())
+    return a == b or difflib.SequenceMatcher(None, a, b).ratio() >= 0.8
+
+def stitch(texts: List[str], overlapping: Optional[List[bool]] = None,
+           max_overlap_lines: int = 6) -> str:
+    """Join band texts, dropping lines read twice where bands overlap.
+
+    overlapping[i] tells whether band i + 1 overlaps band i (default: all
+    do). Around a cut through text, the previous band may end and the
+    next one begin with a half line; those are skipped when the lines
+    between them match.
+    """
+    lines: List[str] = []
+    for i, text in enumerate(texts):
+        new = [line for line in text.splitlines() if line.strip()]
+        if i == 0 or (overlapping is not None and not overlapping[i - 1]):
+            lines.extend(new)
+            continue
+        best = (0, 0, 0)  # Matched lines, lines dropped from prev's end, lines skipped in new
+        for drop in (0, 1):
+            for skip in (0, 1):
+                tail = lines[:len(lines) - drop]
+                limit = min(max_overlap_lines, len(tail), len(new) - skip)
+                for k in range(limit, best[0], -1):
+                    if all(_similar(a, b) for a, b in zip(tail[-k:], new[skip:skip + k])):
+                        best = (k, drop, skip)
+                        break
+        matched, drop, skip = best
+        if matched:
+            del lines[len(lines) - drop:]
+            new = new[skip + matched:]
+        lines.extend(new)
+    return '\n'.join(lines)
+
+_worker_engine: Optional[OcrEngine] = None
+
+def _init_worker(backend: str, lang: str):
+    global _worker_engine
+    # One core per band: keep tesseract from starting its own OpenMP threads
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    _worker_engine = create_ocr_engine(backend, lang=lang)
+
+def _ocr_band(mode: str, size: Tuple[int, int], data: bytes) -> str:
+    return _worker_engine.image_to_string(Image.frombytes(mode, size, data))
+
+class TiledOcrEngine(OcrEngine):
+    """Splits tall images into bands and recognizes them on all cores.
+
+    Images shorter than `min_height` go straight to the wrapped engine.
+    Larger ones are cut along whitespace into one band per worker
+    process (or `tiles` bands), recognized in a persistent process pool
+    and stitched back together.
+    """
+
+    name = "tiled"
+
+    def __init__(self, engine: Optional[OcrEngine] = None, workers: Optional[int] = None,
+                 min_height: int = 1200, min_band_height: int = 300, lang: str = 'eng'):
+        self.engine = engine or create_ocr_engine()
+        self.workers = workers or os.cpu_count() or 1
+        self.min_height = min_height
+        self.min_band_height = min_band_height
+        self.lang = lang
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: never fork a process that is running Tk and worker threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker, initargs=(self.engine.name, self.lang))
+            return self._pool
+
+    def bands(self, image: Image.Image, tiles: Optional[int] = None) -> List[Band]:
+        gray = np.asarray(image.convert('L'))
+        ink_rows = np.count_nonzero(gray < 128, axis=1)
+        count = tiles or min(self.workers, image.height // self.min_band_height)
+        return find_bands(ink_rows, count)
+
+    def image_to_string(self, image: Image.Image, tiles: Optional[int] = None) -> str:
+        if tiles is None and (image.height < self.min_height or self.workers < 2):
+            return self.engine.image_to_string(image)
+        bands = self.bands(image, tiles)
+        if len(bands) == 1:
+            return self.engine.image_to_string(image)
+
+        crops = [image.crop((0, top, image.width, bottom)) for top, bottom in bands]
+        futures = [self.pool.submit(_ocr_band, crop.mode, crop.size, crop.tobytes())
+                   for crop in crops]
+        overlapping = [bands[i][1] > bands[i + 1][0] for i in range(len(bands) - 1)]
+        return stitch([future.result() for future in futures], overlapping)
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+        self.engine.close()
@@ -0,0 +1,161 @@
+import cProfile
+import json
+import math
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+class Span:
+    """One timed stage: monotonic start, duration and size attributes"""
+
+    __slots__ = ('stage', 'start', 'duration_ms', 'attrs', 'error', 'thread')
+
+    def __init__(self, stage: str, start: float, attrs: Dict[str, Any]):
+        self.stage = stage
+        self.start = start
+        self.duration_ms = 0.0
+        self.attrs = attrs
+        self.error: Optional[str] = None
+        self.thread = threading.current_thread().name
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def as_dict(self) -> Dict[str, Any]:
+        record = {'stage': self.stage, 'start': round(self.start, 6),
+                  'duration_ms': round(self.duration_ms, 3), 'thread': self.thread, **self.attrs}
+        if self.error:
+            record['error'] = self.error
+        return record
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+class Tracer:
+    """Keeps the last `capacity` spans in memory and optionally logs them.
+
+    Spans are cheap enough to leave on: a perf_counter pair and a deque
+    append. With log_path set every finished span is also appended to a
+    JSON-lines file. profile_stage turns on cProfile for the spans of one
+    stage; dump_profile() writes the merged result for snakeviz/pstats.
+    """
+
+    def __init__(self, capacity: int = 2000, log_path: Optional[str] = None,
+                 profile_stage: Optional[str] = None):
+        self.spans: deque = deque(maxlen=capacity)
+        self.log_path = log_path
+        self.profile_stage = profile_stage
+        self._log = open(log_path, 'a', encoding='utf-8', buffering=1) if log_path else None
+        self._listeners: List[Callable[[Span], None]] = []
+        self._profiles: Dict[int, cProfile.Profile] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[Span], None]):
+        """Call listener(span) for every finished span (e.g. a sampling profiler marker)"""
+        self._listeners.append(listener)
+
+    @contextmanager
+    def span(self, stage: str, **attrs) -> Iterator[Span]:
+        """Time the with-block as one span; add sizes with span.set(...)"""
+        span = Span(stage, time.perf_counter(), attrs)
+        profiler = self._start_profile(stage)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+                self._local.profiling = False
+            span.duration_ms = (time.perf_counter() - span.start) * 1000
+            self._finish(span)
+
+    def record(self, stage: str, started: float, **attrs) -> Span:
+        """Add a span for work timed elsewhere, from its perf_counter() start"""
+        span = Span(stage, started, attrs)
+        span.duration_ms = (time.perf_counter() - started) * 1000
+        self._finish(span)
+        return span
+
+    def _finish(self, span: Span):
+        self.spans.append(span)  # deque.append is atomic
+        if self._log:
+            line = json.dumps(span.as_dict())
+            with self._lock:
+                if self._log:
+                    self._log.write(line + '\n')
+        for listener in self._listeners:
+            listener(span)
+
+    def _start_profile(self, stage: str) -> Optional[cProfile.Profile]:
+        # cProfile profiles one thread; keep one profiler per thread and merge on dump
+        if stage != self.profile_stage or getattr(self._local, 'profiling', False):
+            return None
+        ident = threading.get_ident()
+        with self._lock:
+            profiler = self._profiles.setdefault(ident, cProfile.Profile())
+        try:
+            profiler.enable()
+        except ValueError:
+            return None  # Another profiler is already active on this thread
+        self._local.profiling = True
+        return profiler
+
+    def dump_profile(self, path: str) -> bool:
+        """Write merged cProfile stats of the profiled stage; False when none were taken"""
+        with self._lock:
+            profiles = [p for p in self._profiles.values() if p.getstats()]
+        if not profiles:
+            return False
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        return True
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """count, p50, p95 and max duration (ms) per stage over the ring buffer"""
+        by_stage: Dict[str, List[float]] = {}
+        for span in list(self.spans):
+            by_stage.setdefault(span.stage, []).append(span.duration_ms)
+        result = {}
+        for stage, durations in by_stage.items():
+            durations.sort()
+            result[stage] = {'count': len(durations), 'p50': percentile(durations, 0.5),
+                             'p95': percentile(durations, 0.95), 'max': durations[-1]}
+        return result
+
+    def summary(self) -> str:
+        return ', '.join(f"{stage} p50 {s['p50']:.0f} / p95 {s['p95']:.0f} ms"
+                         for stage, s in self.stats().items())
+
+    def close(self):
+        if self._log:
+            with self._lock:
+                self._log.close()
+                self._log = None
+
+_shared_tracer: Optional[Tracer] = None
+_shared_lock = threading.Lock()
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer.
+
+    QUIZ_HELPER_TRACE names a JSON-lines file to log every span to, and
+    QUIZ_HELPER_PROFILE a stage (e.g. 'ocr') to run under cProfile.
+    """
+    global _shared_tracer
+    with _shared_lock:
+        if _shared_tracer is None:
+            _shared_tracer = Tracer(log_path=os.getenv('QUIZ_HELPER_TRACE') or None,
+                                    profile_stage=os.getenv('QUIZ_HELPER_PROFILE') or None)
+        return _shared_tracer
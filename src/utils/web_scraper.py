@@ -1,46 +1,80 @@
-import requests
-from bs4 import BeautifulSoup
-from typing import Dict
+from typing import Dict, Iterable, Optional, Union
+from src.api.transport import HttpTransport, get_transport
+from src.utils.html_extract import HtmlExtractor
+from src.utils.tracing import get_tracer
 
 class WebScraper:
-    def __init__(self):
+    def __init__(self, transport: Optional[HttpTransport] = None,
+                 extractor: Optional[HtmlExtractor] = None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
+        # Pooled session with connect/read timeouts, shared with the API client
+        self.transport = transport or get_transport()
+        # Single-pass extraction; lxml when installed, html.parser otherwise
+        self.extractor = extractor or HtmlExtractor()
+        self.chunk_size = 64 * 1024
 
-    def scrape_quiz_content(self, url: str) -> Dict[str, str]:
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None, stream: bool = False):
+        """GET a page through the pooled transport"""
+        return self.transport.get(url, headers={**self.headers, **(headers or {})}, stream=stream)
+
+    def parse_html(self, html: str, url: str, include_html: bool = False) -> Dict[str, str]:
+        return self.parse_stream([html], url, include_html=include_html)
+
+    def parse_stream(self, chunks: Iterable[Union[str, bytes]], url: str,
+                     encoding: Optional[str] = None, include_html: bool = False) -> Dict[str, str]:
+        """Extract quiz content while the body is still arriving.
+
+        'question' holds the best single match (or the page text) and
+        'questions' every question element with its options. The raw HTML
+        is only kept when include_html is set; otherwise each chunk is
+        discarded as soon as the parser has consumed it.
+        """
+        kept = []
+        if include_html:
+            chunks = self._keep(chunks, kept)
+
+        text, questions = self.extractor.extract_questions(chunks, encoding=encoding)
+        result = {
+            'question': text,
+            'questions': [question.as_dict() for question in questions],
+            'url': url
+        }
+        if include_html:
+            for _ in chunks:
+                pass  # Extraction may stop early; still read the rest of the page
+            raw = ''.join(chunk if isinstance(chunk, str) else chunk.decode(encoding or 'utf-8', 'replace')
+                          for chunk in kept)
+            result['html'] = raw  # Save HTML for AI context
+        return result
+
+    @staticmethod
+    def _keep(chunks, kept):
+        for chunk in chunks:
+            kept.append(chunk)
+            yield chunk
+
+    def scrape_quiz_content(self, url: str, include_html: bool = False) -> Dict[str, str]:
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find quiz content - adjust selectors based on target websites
-            question_text = ""
-            
-            # Common selectors for quiz questions
-            possible_selectors = [
-                '.question-text',
-                '.quiz-question',
-                '[data-testid="question"]',
-                '.mcq-question'
-            ]
-            
-            for selector in possible_selectors:
-                element = soup.select_one(selector)
-                if element:
-                    question_text = element.text.strip()
-                    break
-            
-            # If no specific selector worked, try to get all text
-            if not question_text:
-                question_text = soup.get_text()
-            
-            return {
-                'question': question_text,
-                'url': url,
-                'html': response.text  # Save HTML for AI context
-            }
-            
+            with get_tracer().span('scrape', url=url) as span:
+                response = self.fetch(url, stream=True)
+                try:
+                    response.raise_for_status()
+                    received = [0]
+                    content = self.parse_stream(self.count_bytes(response, received), url,
+                                                encoding=response.encoding,
+                                                include_html=include_html)
+                    span.set(bytes=received[0], chars=len(content['question']))
+                    return content
+                finally:
+                    response.close()
+
         except Exception as e:
-            raise Exception(f"Failed to scrape URL: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Failed to scrape URL: {str(e)}")
+
+    def count_bytes(self, response, received):
+        """Iterate the body in chunks, adding their sizes to received[0]"""
+        for chunk in response.iter_content(self.chunk_size):
+            received[0] += len(chunk)
+            yield chunk